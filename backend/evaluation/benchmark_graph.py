@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+End-to-end graph benchmark with offline Spotify and OpenAI stand-ins.
+
+Drives the scripted multi-turn conversations in replay/conversations.json
+through main_graph.graph (with its checkpointer, one thread per conversation)
+using FakeSpotify, ScriptedChatModel and a synthetic catalogue for the vibe
+search, and reports:
+
+- turn latency percentiles
+- per-node timing (router, agents, Spotify subgraph nodes)
+- LLM calls per model and Spotify Web API calls per method, in total and per turn
+
+Injected latencies (--spotify-latency-ms, --llm-latency-ms) stand in for the
+network so regressions in call counts show up as time. No API keys needed.
+
+Usage:
+    python benchmark_graph.py [--repeat 3] [--spotify-latency-ms 0] [--llm-latency-ms 0]
+                              [--rows 5000] [--output graph_report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict
+from uuid import UUID
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ["INTENT_MODEL_ENABLED"] = os.getenv("INTENT_MODEL_ENABLED", "false")
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
+
+from replay import install_replay, uninstall_replay
+from synthetic_catalogue import write_synthetic_catalogue
+
+CONVERSATIONS_PATH = os.path.join(os.path.dirname(__file__), 'replay', 'conversations.json')
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph node run (including subgraph nodes)"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.visited = []
+        self._started: Dict[UUID, tuple] = {}
+        self._open = set()
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata=None, name=None, **kwargs: Any):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        task = metadata.get("langgraph_checkpoint_ns")
+        # Only the outermost run of each node task: conditional edges and
+        # channel writes run nested under the same task
+        if not node or node == "__start__" or name != node or task in self._open:
+            return
+        self._open.add(task)
+        self._started[run_id] = (node, task, time.perf_counter())
+        self.visited.append(node)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, task, start = started
+            self._open.discard(task)
+            self.samples[node].append(time.perf_counter() - start)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self.on_chain_end(None, run_id=run_id)
+
+
+def load_conversations(path: str = CONVERSATIONS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    if values.size == 0:
+        return None
+    return {
+        "n": int(values.size),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def build_script(conversations):
+    return {turn['user'].strip().lower(): turn for conv in conversations for turn in conv['turns']}
+
+
+def use_synthetic_catalogue(rows: int, directory: str):
+    """Serve search_music_by_vibe from a synthetic catalogue, offline"""
+    from src.tools import database_search_tool
+
+    path = write_synthetic_catalogue(os.path.join(directory, "synthetic_dataset.csv"), rows)
+    database_search_tool._searcher = database_search_tool.MusicDatabaseSearcher(path, spotify_fallback=False)
+
+
+def run_benchmark(repeat: int = 3, spotify_latency_ms: float = 0.0, llm_latency_ms: float = 0.0,
+                  rows: int = 5000, conversations=None):
+    conversations = conversations or load_conversations()
+    replay = install_replay(build_script(conversations), spotify_latency_ms, llm_latency_ms)
+    timer = NodeTimer()
+    turn_samples, turns = [], []
+    totals_llm, totals_spotify = Counter(), Counter()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir, contextlib.redirect_stdout(io.StringIO()):
+            use_synthetic_catalogue(rows, tmpdir)
+            from src.agent.main_graph import graph
+
+            for iteration in range(repeat):
+                for conv_index, conversation in enumerate(conversations):
+                    config = {"configurable": {"thread_id": f"replay_{iteration}_{conv_index}"},
+                              "callbacks": [timer]}
+                    for turn in conversation['turns']:
+                        replay.reset_counts()
+                        timer.visited = []
+                        start = time.perf_counter()
+                        result = graph.invoke({"messages": [HumanMessage(content=turn['user'])]}, config=config)
+                        elapsed = time.perf_counter() - start
+
+                        llm_calls = replay.llm_calls()
+                        spotify_calls = dict(replay.spotify.calls)
+                        totals_llm.update(llm_calls)
+                        totals_spotify.update(spotify_calls)
+                        turn_samples.append(elapsed)
+                        if iteration == 0:
+                            reply = next((m.content for m in reversed(result["messages"]) if isinstance(m, AIMessage)
+                                          and m.content), "")
+                            turns.append({
+                                "conversation": conversation['name'],
+                                "user": turn['user'],
+                                "nodes": timer.visited,
+                                "ms": round(elapsed * 1000, 3),
+                                "llm_calls": {k: v for k, v in llm_calls.items() if v},
+                                "spotify_calls": spotify_calls,
+                                "history_messages": len(result["messages"]),
+                                "reply": reply[:120],
+                            })
+    finally:
+        uninstall_replay()
+
+    n_turns = len(turn_samples)
+    return {
+        "conversations": len(conversations),
+        "turns": n_turns,
+        "repeat": repeat,
+        "injected_latency_ms": {"spotify": spotify_latency_ms, "llm": llm_latency_ms},
+        "turn_latency": percentiles(turn_samples),
+        "nodes": {node: percentiles(samples) for node, samples in sorted(timer.samples.items())},
+        "llm_calls": {"total": dict(totals_llm), "per_turn": round(sum(totals_llm.values()) / n_turns, 3)},
+        "spotify_calls": {"total": dict(totals_spotify.most_common()),
+                          "per_turn": round(sum(totals_spotify.values()) / n_turns, 3)},
+        "per_turn": turns,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full graph turns offline")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs over every scripted conversation")
+    parser.add_argument("--spotify-latency-ms", type=float, default=0.0, help="Injected delay per Spotify call")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Injected delay per LLM call")
+    parser.add_argument("--rows", type=int, default=5000, help="Synthetic catalogue size for vibe search")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.repeat, args.spotify_latency_ms, args.llm_latency_ms, args.rows)
+
+    print("🎧 Graph Replay Benchmark")
+    print("=" * 50)
+    latency = report['turn_latency']
+    print(f"Turns: {report['turns']}  p50={latency['p50_ms']:.1f}ms  p95={latency['p95_ms']:.1f}ms")
+    print(f"LLM calls/turn: {report['llm_calls']['per_turn']}  Spotify calls/turn: {report['spotify_calls']['per_turn']}")
+    print("Nodes:")
+    for node, stats in report['nodes'].items():
+        print(f"  {node:22s} n={stats['n']:4d}  p50={stats['p50_ms']:8.2f}ms  p95={stats['p95_ms']:8.2f}ms")
+    print("Per turn (first run):")
+    for turn in report['per_turn']:
+        calls = sum(turn['spotify_calls'].values())
+        print(f"  [{turn['conversation']}] '{turn['user']}' {turn['ms']:.1f}ms "
+              f"llm={sum(turn['llm_calls'].values())} spotify={calls} via {' > '.join(turn['nodes'])}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Routing benchmark: accuracy and latency of the rule-based intent classifier and
+the optional local intent model (intent_model.py).
+
+Runs every query in router_queries.json (optionally preceded by a scripted
+conversation) through classify_with_context and spotify_router, and reports
+accuracy against the labelled routes plus latency percentiles with a short and
+a long (multi-KB tool output) conversation history, comparing a summary rebuilt
+from the whole window with the incremental one the router node maintains (only
+the new query is scanned). No network access needed.
+
+Usage:
+    python benchmark_router.py [--repeat 200] [--output router_report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+# classify_with_context is measured as the rule router; the model is scored separately
+os.environ["INTENT_MODEL_ENABLED"] = "false"
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from src.agent.main_graph import classify_with_context, system_prompt
+from src.agent.spotify_router import spotify_router
+from src.agent.conversation_context import update_conversation_context
+from src.agent.intent_model import IntentModel, confidence_threshold
+
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), 'router_queries.json')
+
+
+def load_cases(path: str = QUERIES_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_messages(case, long_history: bool = False):
+    """Conversation for a labelled case: system prompt, optional padding, context, query"""
+    messages = [SystemMessage(content=system_prompt)]
+    if long_history:
+        for i in range(4):
+            messages.append(HumanMessage(content=f"show me playlist number {i}"))
+            messages.append(ToolMessage(tool_call_id=f"call_{i}", content="1. Some Track by Some Artist (from Some Album)\n" * 80))
+            messages.append(AIMessage(content="Here are the tracks from that playlist! 🎧"))
+    for i, text in enumerate(case.get('context', [])):
+        messages.append(HumanMessage(content=text) if i % 2 == 0 else AIMessage(content=text))
+    messages.append(HumanMessage(content=case['query']))
+    # Message ids as assigned by the add_messages reducer; the incremental summary keys on them
+    for i, msg in enumerate(messages):
+        msg.id = f"msg_{i}"
+    return messages
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1e6
+    return {
+        "p50_us": round(float(np.percentile(values, 50)), 1),
+        "p95_us": round(float(np.percentile(values, 95)), 1),
+        "p99_us": round(float(np.percentile(values, 99)), 1),
+        "mean_us": round(float(values.mean()), 1),
+    }
+
+
+def time_router(fn, conversations, repeat: int):
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for messages in conversations:
+                start = time.perf_counter()
+                fn(messages)
+                samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def evaluate_accuracy(cases, model):
+    main_correct, spotify_correct, spotify_total = 0, 0, 0
+    model_correct, hybrid_correct = 0, 0
+    misroutes = []
+    threshold = confidence_threshold()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for case in cases:
+            messages = build_messages(case)
+            route = classify_with_context(messages)
+            if route == case['route']:
+                main_correct += 1
+            else:
+                misroutes.append({"query": case['query'], "expected": case['route'], "got": route})
+
+            predicted, confidence = model.predict(case['query'], update_conversation_context(None, messages))
+            model_correct += predicted == case['route']
+            hybrid_correct += (predicted if confidence >= threshold else route) == case['route']
+
+            if case.get('spotify_route'):
+                spotify_total += 1
+                if spotify_router({"messages": messages}) == case['spotify_route']:
+                    spotify_correct += 1
+
+    return {
+        "main_accuracy": round(main_correct / len(cases), 3),
+        "model_accuracy": round(model_correct / len(cases), 3),
+        "hybrid_accuracy": round(hybrid_correct / len(cases), 3),
+        "model_threshold": threshold,
+        "spotify_accuracy": round(spotify_correct / spotify_total, 3) if spotify_total else None,
+        "misroutes": misroutes,
+    }
+
+
+def run_benchmark(repeat: int = 200):
+    cases = load_cases()
+    start = time.perf_counter()
+    model = IntentModel.load()
+    training_ms = round((time.perf_counter() - start) * 1000, 1)
+    short = [build_messages(case) for case in cases]
+    long = [build_messages(case, long_history=True) for case in cases]
+
+    # Summary of everything but the query, as the router node leaves it after the previous turn
+    previous = {id(messages): update_conversation_context(None, messages[:-1]) for messages in long}
+
+    def classify_rebuilt(messages):
+        return classify_with_context(messages)
+
+    def classify_incremental(messages):
+        context = update_conversation_context(previous[id(messages)], messages)
+        return classify_with_context(messages, context)
+
+    def classify_model(messages):
+        context = update_conversation_context(previous[id(messages)], messages)
+        return model.predict(messages[-1].content, context)
+
+    def route_spotify(messages):
+        context = update_conversation_context(previous[id(messages)], messages)
+        return spotify_router({"messages": messages, "conversation_context": context})
+
+    report = {
+        "queries": len(cases),
+        "model_training_ms": training_ms,
+        "accuracy": evaluate_accuracy(cases, model),
+        "latency": {
+            "classifier_short_history_rebuilt": time_router(classify_rebuilt, short, repeat),
+            "classifier_long_history_rebuilt": time_router(classify_rebuilt, long, repeat),
+            "classifier_long_history_incremental": time_router(classify_incremental, long, repeat),
+            "intent_model_long_history_incremental": time_router(classify_model, long, repeat),
+            "spotify_router_long_history_incremental": time_router(route_spotify, long, repeat),
+        },
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the intent router")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions over the corpus")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.repeat)
+
+    print("🎛️  Router Benchmark")
+    print("=" * 50)
+    print(f"Queries: {report['queries']}")
+    print(f"Main classifier accuracy: {report['accuracy']['main_accuracy']:.1%}")
+    print(f"Intent model accuracy: {report['accuracy']['model_accuracy']:.1%} "
+          f"(trained in {report['model_training_ms']}ms)")
+    print(f"Model + rule fallback accuracy: {report['accuracy']['hybrid_accuracy']:.1%} "
+          f"(threshold {report['accuracy']['model_threshold']})")
+    print(f"Spotify router accuracy: {report['accuracy']['spotify_accuracy']:.1%}")
+    for name, stats in report['latency'].items():
+        print(f"{name:40s} p50={stats['p50_us']:8.1f}us  p95={stats['p95_us']:8.1f}us")
+    if report['accuracy']['misroutes']:
+        print("\nMisrouted queries:")
+        for miss in report['accuracy']['misroutes']:
+            print(f"  '{miss['query']}' -> {miss['got']} (expected {miss['expected']})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Offline search benchmark for the vibe search engine (MusicDatabaseSearcher).
+
+Runs the fixed query set in search_queries.json against the local dataset (or a
+synthetic catalogue with the same schema when data/dataset.csv is missing) with
+the Spotify fallback disabled, and reports:
+
+- load time, RSS after loading and the bytes held by the track store and
+  embedding matrix
+- cold (first call) and warm latency percentiles, per query category
+  (unfiltered vibe/similar queries vs genre-filtered/popularity queries)
+- query construction alone (text_to_database_vector), uncached and from the
+  query-vector cache
+- track-seeded recommendations (recommend_for_track) against the Spotify
+  cascade of get_recommendations_by_track, replayed on a stand-in client that
+  counts calls and waits --spotify-rtt-ms per call
+- the cost of diversified (MMR) re-ranking: warm latency with diversify off/on
+- throughput with N concurrent threads, and the batch API
+  (search_similar_music_batch) against the single-query path
+- the audio-feature relevance, genre consistency, similarity coherence and
+  diversity metrics from MusicRAGMetrics, computed directly on the results
+- peak RSS
+
+No network or API keys needed. The JSON report can be diffed across versions.
+
+Usage:
+    python benchmark_search.py [--dataset path.csv] [--rows 20000] [--repeat 20]
+                               [--threads 1,4,8] [--spotify-rtt-ms 100]
+                               [--output search_report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from src.tools.database_search_tool import MusicDatabaseSearcher
+from music_rag_metrics import MusicRAGMetrics
+from synthetic_catalogue import write_synthetic_catalogue
+
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), 'search_queries.json')
+DEFAULT_DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'dataset.csv')
+FILTERED_CATEGORIES = {"genre", "popularity"}
+
+
+def load_queries(path: str = QUERIES_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / 2**20 if platform.system() == "Darwin" else peak / 2**10, 1)
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    if values.size == 0:
+        return None
+    return {
+        "n": int(values.size),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def as_metric_recommendations(results):
+    """Searcher results in the shape MusicRAGMetrics scores"""
+    return [
+        {
+            "track": f"{r['track_name']} by {r['artists']}",
+            "similarity_score": r['similarity'],
+            "vibe_profile": {
+                feature: r['audio_features'][feature]
+                for feature in ("danceability", "energy", "valence", "acousticness")
+            },
+            **({"genre": r['genre']} if r.get('genre') else {}),
+        }
+        for r in results
+    ]
+
+
+def _quiet_nan(fn, *args):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return fn(*args)
+
+
+def quality_metrics(queries, results_by_query):
+    metrics = MusicRAGMetrics()
+    per_category = {}
+    for q in queries:
+        # similarity_coherence correlates constant scores (e.g. popularity results) -> nan -> 0
+        recs = as_metric_recommendations(results_by_query[q['query']])
+        scores = {
+            "audio_feature_relevance": metrics.audio_feature_relevance(q['query'], recs),
+            "genre_consistency": metrics.genre_consistency(q['query'], recs),
+            "similarity_coherence": _quiet_nan(metrics.similarity_coherence, recs),
+            "diversity_score": metrics.diversity_score(recs),
+            "response_completeness": 1.0 if recs else 0.0,
+        }
+        per_category.setdefault(q['category'], []).append(scores)
+
+    summary = {}
+    for category, rows in per_category.items():
+        summary[category] = {name: round(float(np.mean([row[name] for row in rows])), 4) for name in rows[0]}
+    every = [row for rows in per_category.values() for row in rows]
+    summary["overall"] = {name: round(float(np.mean([row[name] for row in every])), 4) for name in every[0]}
+    return summary
+
+
+def measure_throughput(searcher, queries, threads: int, repeat: int, top_k: int):
+    jobs = [q['query'] for q in queries] * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda query: searcher.search_similar_music(query, top_k=top_k), jobs))
+    elapsed = time.perf_counter() - start
+    return {"threads": threads, "queries": len(jobs), "seconds": round(elapsed, 3),
+            "qps": round(len(jobs) / elapsed, 1)}
+
+
+def measure_batch_throughput(searcher, queries, repeat: int, top_k: int):
+    """Queries/second of one batch call vs the same queries one at a time"""
+    texts = [q['query'] for q in queries] * repeat
+    start = time.perf_counter()
+    single = [searcher.search_similar_music(text, top_k=top_k) for text in texts]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = searcher.search_similar_music_batch(texts, top_k=top_k)
+    batch_seconds = time.perf_counter() - start
+
+    # Agreement on queries with a real match (all-zero similarities are ties in any order)
+    overlaps = [
+        len({r['track_name'] for r in a} & {r['track_name'] for r in b}) / max(1, len(a))
+        for a, b in zip(single[:len(queries)], batch[:len(queries)])
+        if a and a[0]['similarity'] > 0
+    ]
+    return {
+        "queries": len(texts),
+        "single_qps": round(len(texts) / single_seconds, 1),
+        "batch_qps": round(len(texts) / batch_seconds, 1),
+        "speedup": round(single_seconds / batch_seconds, 2),
+        "overlap_at_k": round(float(np.mean(overlaps)), 4) if overlaps else None,
+    }
+
+
+def measure_query_construction(searcher, queries, repeat: int):
+    """Latency of text_to_database_vector alone: uncached (cache cleared first) and cached"""
+    texts = [q['query'] for q in queries]
+    uncached, cached = [], []
+    for _ in range(repeat):
+        searcher._query_vectors.clear()
+        for samples in (uncached, cached):
+            for text in texts:
+                start = time.perf_counter()
+                searcher.text_to_database_vector(text)
+                samples.append(time.perf_counter() - start)
+    return {"uncached": percentiles(uncached), "cached": percentiles(cached)}
+
+
+def measure_diversify(searcher, queries, repeat: int, top_k: int):
+    """Warm latency of the same queries without and with diversify (MMR re-ranking)"""
+    texts = [q['query'] for q in queries]
+    samples = {"off": [], "on": []}
+    for text in texts:
+        searcher.search_similar_music(text, top_k=top_k, diversify=True)
+    for _ in range(repeat):
+        for mode, diversify in (("off", False), ("on", True)):
+            for text in texts:
+                start = time.perf_counter()
+                searcher.search_similar_music(text, top_k=top_k, diversify=diversify)
+                samples[mode].append(time.perf_counter() - start)
+    return {mode: percentiles(values) for mode, values in samples.items()}
+
+
+class CountingSpotify:
+    """Stand-in Spotify client: canned responses after rtt_ms each, with a call count"""
+
+    def __init__(self, rtt_ms: float, limit: int):
+        self.rtt = rtt_ms / 1000
+        self.limit = limit
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    @staticmethod
+    def _track(i):
+        return {"id": f"t{i}", "name": f"Track {i}", "artists": [{"id": f"a{i}", "name": f"Artist {i}"}],
+                "preview_url": None}
+
+    def search(self, q, type, limit):
+        self._call()
+        return {"tracks": {"items": [self._track(0)]}}
+
+    def recommendations(self, seed_tracks, limit):
+        self._call()
+        return {"tracks": [self._track(i) for i in range(1, limit + 1)]}
+
+    def audio_features(self, ids):
+        self._call()
+        return [{"danceability": 0.5, "energy": 0.5, "valence": 0.5, "tempo": 120.0} for _ in ids]
+
+
+def measure_track_recommendations(searcher, repeat: int, top_k: int, spotify_rtt_ms: float, seeds: int = 20):
+    """recommend_for_track latency on catalogue seeds vs the Spotify cascade (calls x spotify_rtt_ms)"""
+    from src.tools import database_search_tool
+    from src.tools.spotify import base as spotify_base
+    from src.tools.spotify.recommendations import get_recommendations_by_track
+
+    rng = np.random.default_rng(0)
+    positions = rng.choice(len(searcher.tracks), size=min(seeds, len(searcher.tracks)), replace=False)
+    pairs = [(searcher.tracks.names[p], searcher.tracks.artists[p].split(";")[0]) for p in positions]
+    local = []
+    for _ in range(repeat):
+        for name, artist in pairs:
+            start = time.perf_counter()
+            searcher.recommend_for_track(name, artist, top_k=top_k)
+            local.append(time.perf_counter() - start)
+
+    client = CountingSpotify(spotify_rtt_ms, top_k)
+    spotify = []
+    previous, database_search_tool._searcher = database_search_tool._searcher, searcher
+    spotify_base.set_spotify_client_factory(lambda: client)
+    try:
+        for _ in range(max(1, repeat // 10)):
+            start = time.perf_counter()
+            # A seed outside the catalogue takes the Spotify path (search, recommendations, per-track features)
+            get_recommendations_by_track.invoke({"track_name": "Not In The Catalogue", "artist_name": "Nobody",
+                                                 "limit": top_k})
+            spotify.append(time.perf_counter() - start)
+    finally:
+        spotify_base.set_spotify_client_factory(None)
+        database_search_tool._searcher = previous
+
+    runs = max(1, repeat // 10)
+    return {
+        "local": percentiles(local),
+        "spotify": dict(percentiles(spotify), calls=client.calls // runs, rtt_ms=spotify_rtt_ms),
+    }
+
+
+def run_benchmark(dataset: str = None, rows: int = 20000, repeat: int = 20,
+                  threads=(1, 4, 8), top_k: int = 10, queries=None, spotify_rtt_ms: float = 100):
+    queries = queries or load_queries()
+    tmpdir = None
+    if not dataset:
+        dataset = DEFAULT_DATASET if os.path.exists(DEFAULT_DATASET) else None
+    if dataset is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        dataset = write_synthetic_catalogue(os.path.join(tmpdir.name, "synthetic_dataset.csv"), rows)
+        source = f"synthetic ({rows} rows)"
+    else:
+        source = os.path.abspath(dataset)
+
+    try:
+        quiet = contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            searcher = MusicDatabaseSearcher(dataset, spotify_fallback=False)
+            load_seconds = time.perf_counter() - start
+            rss_loaded = rss_mb()
+
+            if searcher.tracks is None:
+                raise RuntimeError(f"Could not load dataset {dataset}")
+
+            cold, warm = {}, {}
+            results_by_query = {}
+            for q in queries:
+                start = time.perf_counter()
+                results_by_query[q['query']] = searcher.search_similar_music(q['query'], top_k=top_k)
+                cold.setdefault(q['category'], []).append(time.perf_counter() - start)
+
+            for _ in range(repeat):
+                for q in queries:
+                    start = time.perf_counter()
+                    searcher.search_similar_music(q['query'], top_k=top_k)
+                    warm.setdefault(q['category'], []).append(time.perf_counter() - start)
+
+            def split(samples):
+                filtered = [s for c, values in samples.items() if c in FILTERED_CATEGORIES for s in values]
+                unfiltered = [s for c, values in samples.items() if c not in FILTERED_CATEGORIES for s in values]
+                return {
+                    "unfiltered": percentiles(unfiltered),
+                    "filtered": percentiles(filtered),
+                    "by_category": {c: percentiles(values) for c, values in samples.items()},
+                }
+
+            query_vector = measure_query_construction(searcher, queries, repeat)
+            diversify = measure_diversify(searcher, queries, repeat, top_k)
+            track_recommendations = measure_track_recommendations(searcher, repeat, top_k, spotify_rtt_ms)
+            throughput = [measure_throughput(searcher, queries, n, max(1, repeat // 4), top_k) for n in threads]
+            batch = measure_batch_throughput(searcher, queries, max(1, repeat // 4), top_k)
+            quality = quality_metrics(queries, results_by_query)
+
+        return {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "dataset": source,
+            "tracks": len(searcher.tracks),
+            "queries": len(queries),
+            "top_k": top_k,
+            "load_seconds": round(load_seconds, 3),
+            "memory_mb": {
+                "before_load": rss_before,
+                "after_load": rss_loaded,
+                "peak": peak_rss_mb(),
+                "store_mb": {name: round(size / 2**20, 2) for name, size in searcher.memory_report().items()},
+            },
+            "latency": {"cold": split(cold), "warm": split(warm)},
+            "query_vector": query_vector,
+            "diversify": diversify,
+            "track_recommendations": track_recommendations,
+            "throughput": throughput,
+            "batch": batch,
+            "quality": quality,
+        }
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the vibe search engine")
+    parser.add_argument("--dataset", help="Dataset CSV (default: data/dataset.csv, else a synthetic catalogue)")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic catalogue size")
+    parser.add_argument("--repeat", type=int, default=20, help="Warm repetitions over the query set")
+    parser.add_argument("--threads", default="1,4,8", help="Comma-separated thread counts for throughput")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--spotify-rtt-ms", type=float, default=100,
+                        help="Simulated Spotify round trip for the track recommendation comparison")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    threads = [int(n) for n in args.threads.split(",") if n]
+    report = run_benchmark(args.dataset, args.rows, args.repeat, threads, args.top_k,
+                           spotify_rtt_ms=args.spotify_rtt_ms)
+
+    print("🎵 Vibe Search Benchmark")
+    print("=" * 50)
+    print(f"Dataset: {report['dataset']} ({report['tracks']} tracks)")
+    print(f"Load: {report['load_seconds']}s, RSS {report['memory_mb']['after_load']}MB "
+          f"(peak {report['memory_mb']['peak']}MB)")
+    for phase in ("cold", "warm"):
+        for kind in ("unfiltered", "filtered"):
+            stats = report['latency'][phase][kind]
+            if stats:
+                print(f"{phase:4s} {kind:10s} p50={stats['p50_ms']:8.2f}ms  p95={stats['p95_ms']:8.2f}ms")
+    for kind, stats in report['query_vector'].items():
+        print(f"query vector {kind:8s} p50={stats['p50_ms'] * 1000:8.1f}us  p95={stats['p95_ms'] * 1000:8.1f}us")
+    for mode, stats in report['diversify'].items():
+        print(f"diversify {mode:3s}      p50={stats['p50_ms']:8.2f}ms  p95={stats['p95_ms']:8.2f}ms")
+    recs = report['track_recommendations']
+    print(f"track recs local   p50={recs['local']['p50_ms']:8.2f}ms  p95={recs['local']['p95_ms']:8.2f}ms")
+    print(f"track recs spotify p50={recs['spotify']['p50_ms']:8.2f}ms  "
+          f"({recs['spotify']['calls']} calls at {recs['spotify']['rtt_ms']:g}ms)")
+    for run in report['throughput']:
+        print(f"{run['threads']:2d} threads: {run['qps']:8.1f} queries/s")
+    batch = report['batch']
+    print(f"batch:      {batch['batch_qps']:8.1f} queries/s vs {batch['single_qps']:.1f} single "
+          f"({batch['speedup']}x over {batch['queries']} queries)")
+    print("Quality (overall):")
+    for name, value in report['quality']['overall'].items():
+        print(f"  {name}: {value:.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ Comprehensive analysis of RAGAs evaluation results for music RAG system
 
 import os
 import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '.'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from datasets import Dataset
 from ragas import evaluate
@@ -16,7 +16,7 @@ import json
 import pandas as pd
 
 # Import your components
-from app.tools.vector_search_tool import search_music_by_vibe
+from src.tools.database_search_tool import search_music_by_vibe
 
 load_dotenv()
 
@@ -3,10 +3,14 @@
 Custom Music-Specific RAG Evaluation Metrics
 """
 
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
 import numpy as np
 import json
 from typing import List, Dict, Any
-from app.tools.vector_search_tool import search_music_by_vibe
+from src.tools.database_search_tool import search_music_by_vibe
 
 class MusicRAGMetrics:
     """Custom evaluation metrics specific to music recommendation"""
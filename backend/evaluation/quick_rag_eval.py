@@ -15,7 +15,7 @@ from dotenv import load_dotenv
 import json
 
 # Import your components
-from src.tools.vector_search_tool import search_music_by_vibe
+from src.tools.database_search_tool import search_music_by_vibe
 
 load_dotenv()
 
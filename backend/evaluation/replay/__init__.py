@@ -0,0 +1,60 @@
+"""
+Offline record/replay stand-ins for Spotify and OpenAI.
+
+install_replay() routes get_spotify_client() to a FakeSpotify and get_llm() to
+ScriptedChatModel instances (one per purpose), so full graph turns run without
+network access or API keys. Use RecordingSpotify around a real client to
+capture responses that FakeSpotify(recording=...) replays later.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from .fake_spotify import FakeSpotify, RecordingSpotify
+from .scripted_llm import ScriptedChatModel
+
+
+@dataclass
+class Replay:
+    spotify: FakeSpotify
+    models: Dict[str, ScriptedChatModel] = field(default_factory=dict)
+
+    def reset_counts(self):
+        self.spotify.reset_counts()
+        for model in self.models.values():
+            model.reset_counts()
+
+    def llm_calls(self) -> Dict[str, int]:
+        return {model.model_name: model.calls for model in self.models.values()}
+
+
+def install_replay(script: Optional[dict] = None, spotify_latency_ms: float = 0.0,
+                   llm_latency_ms: float = 0.0, recording: Optional[str] = None) -> Replay:
+    """Point the Spotify client and LLM registry at offline stand-ins"""
+    from src.core.llm import LLMMetricsCallback, set_llm_factory
+    from src.tools.spotify.base import set_spotify_client_factory
+
+    spotify = FakeSpotify(latency_ms=spotify_latency_ms, recording=recording)
+    models = {
+        purpose: ScriptedChatModel(model_name=f"scripted-{purpose}", script=script or {},
+                                   latency_ms=llm_latency_ms,
+                                   callbacks=[LLMMetricsCallback(f"scripted-{purpose}")])
+        for purpose in ("tools", "chat")
+    }
+    set_spotify_client_factory(lambda: spotify)
+    set_llm_factory(lambda purpose: models[purpose])
+    # Without a key the web search tool answers locally instead of calling Tavily
+    os.environ.pop("TAVILY_API_KEY", None)
+    return Replay(spotify, models)
+
+
+def uninstall_replay():
+    from src.core.llm import set_llm_factory
+    from src.tools.spotify.base import set_spotify_client_factory
+
+    set_spotify_client_factory(None)
+    set_llm_factory(None)
+
+
+__all__ = ['FakeSpotify', 'RecordingSpotify', 'ScriptedChatModel', 'Replay', 'install_replay', 'uninstall_replay']
@@ -0,0 +1,384 @@
+"""
+Offline stand-in for spotipy.Spotify.
+
+FakeSpotify answers the Web API calls the Spotify tools make with realistic,
+deterministic fixture data (a small library of real artists and tracks), can
+sleep a configurable time per call to mimic network latency, and counts every
+call by method. Responses recorded from the real API with RecordingSpotify are
+replayed verbatim when a call matches.
+"""
+
+import copy
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import Counter
+
+ARTISTS = [
+    ("Radiohead", ["alternative rock", "art rock"], 78),
+    ("Billie Eilish", ["art pop", "electropop"], 90),
+    ("Kendrick Lamar", ["hip hop", "west coast rap"], 89),
+    ("BLACKPINK", ["k-pop", "k-pop girl group"], 84),
+    ("Taylor Swift", ["pop", "singer-songwriter"], 100),
+    ("Daft Punk", ["electro", "french house"], 80),
+    ("Frank Ocean", ["alternative r&b", "neo soul"], 82),
+    ("Tame Impala", ["psychedelic rock", "neo-psychedelic"], 79),
+    ("SZA", ["r&b", "pop"], 88),
+    ("Arctic Monkeys", ["garage rock", "indie rock"], 85),
+]
+
+TRACKS = [
+    ("Creep", 0), ("Karma Police", 0), ("No Surprises", 0),
+    ("bad guy", 1), ("Happier Than Ever", 1), ("ocean eyes", 1),
+    ("HUMBLE.", 2), ("Money Trees", 2), ("Alright", 2),
+    ("How You Like That", 3), ("Pink Venom", 3), ("DDU-DU DDU-DU", 3),
+    ("Anti-Hero", 4), ("Cruel Summer", 4), ("Blank Space", 4),
+    ("Get Lucky", 5), ("One More Time", 5), ("Instant Crush", 5),
+    ("Pink + White", 6), ("Nights", 6), ("Thinkin Bout You", 6),
+    ("The Less I Know The Better", 7), ("Let It Happen", 7), ("Borderline", 7),
+    ("Kill Bill", 8), ("Good Days", 8), ("Snooze", 8),
+    ("Do I Wanna Know?", 9), ("505", 9), ("R U Mine?", 9),
+]
+
+PLAYLISTS = [("Chill Vibes", 0.3), ("Gym Mix", 0.9), ("Road Trip", 0.6), ("Late Night", 0.2)]
+
+USER_ID = "replay_user"
+
+
+def _image(seed: str):
+    return [{"url": f"https://i.scdn.co/image/{seed}", "height": 640, "width": 640}]
+
+
+def _slug(text: str) -> str:
+    return "".join(c for c in text.lower() if c.isalnum())[:22].ljust(22, "0")
+
+
+def _artist(index: int) -> dict:
+    name, genres, popularity = ARTISTS[index]
+    artist_id = _slug(f"artist{name}")
+    return {
+        "id": artist_id,
+        "name": name,
+        "uri": f"spotify:artist:{artist_id}",
+        "genres": genres,
+        "popularity": popularity,
+        "followers": {"total": popularity * 123_457},
+        "images": _image(artist_id),
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"},
+        "type": "artist",
+    }
+
+
+def _track(index: int) -> dict:
+    name, artist_index = TRACKS[index]
+    track_id = _slug(f"track{name}")
+    artist = _artist(artist_index)
+    return {
+        "id": track_id,
+        "name": name,
+        "uri": f"spotify:track:{track_id}",
+        "artists": [{"id": artist["id"], "name": artist["name"], "uri": artist["uri"]}],
+        "album": {
+            "id": _slug(f"album{name}"),
+            "name": f"{name} (Single)",
+            "images": _image(track_id),
+            "release_date": f"{2010 + index % 14}-0{1 + index % 9}-15",
+        },
+        "popularity": 95 - index,
+        "duration_ms": 180_000 + index * 1_500,
+        "explicit": index % 4 == 0,
+        "preview_url": None,
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "type": "track",
+    }
+
+
+def _audio_features(index: int) -> dict:
+    return {
+        "id": _track(index)["id"],
+        "danceability": round(0.3 + (index * 37 % 60) / 100, 3),
+        "energy": round(0.2 + (index * 53 % 75) / 100, 3),
+        "valence": round(0.1 + (index * 29 % 80) / 100, 3),
+        "acousticness": round((index * 17 % 90) / 100, 3),
+        "instrumentalness": round((index * 7 % 30) / 100, 3),
+        "tempo": 80.0 + index * 3,
+    }
+
+
+def _page(items, limit=None, key=None):
+    items = items[:limit] if limit else items
+    page = {"items": items, "total": len(items), "limit": limit or len(items), "next": None, "offset": 0}
+    return {key: page} if key else page
+
+
+def call_key(method: str, arguments: dict) -> str:
+    """Stable key for a call: method name plus the arguments it was given, by name"""
+    return json.dumps([method, {k: v for k, v in arguments.items() if k != "self"}], sort_keys=True, default=str)
+
+
+def bound_arguments(method, args, kwargs) -> dict:
+    """Explicitly passed arguments of a FakeSpotify method call, by parameter name"""
+    return inspect.signature(getattr(FakeSpotify, method)).bind(None, *args, **kwargs).arguments
+
+
+def api_call(method):
+    """Count, delay and (when recorded) replay a Spotify Web API call"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        name = method.__name__
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if self._recorded:
+            recorded = self._recorded.get(call_key(name, bound_arguments(name, args, kwargs)))
+            if recorded is not None:
+                return copy.deepcopy(recorded)
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class FakeSpotify:
+    """Deterministic spotipy.Spotify replacement for offline runs"""
+
+    def __init__(self, latency_ms: float = 0.0, recording: str = None):
+        self.latency_ms = latency_ms
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._recorded = {}
+        if recording:
+            with open(recording) as f:
+                self._recorded = json.load(f)
+        self._followed = {_artist(i)["id"] for i in (0, 2, 6)}
+        self._playlists = [self._playlist(i, name) for i, (name, _) in enumerate(PLAYLISTS)]
+        self._playlist_tracks = {p["id"]: [i for i in range(len(TRACKS)) if (i + n) % 3 == 0]
+                                 for n, p in enumerate(self._playlists)}
+
+    def _playlist(self, index: int, name: str) -> dict:
+        playlist_id = _slug(f"playlist{name}")
+        return {
+            "id": playlist_id,
+            "name": name,
+            "description": f"{name} picks",
+            "owner": {"id": USER_ID, "display_name": "Replay User"},
+            "public": index % 2 == 0,
+            "collaborative": False,
+            "tracks": {"total": len(TRACKS) // 3},
+            "images": _image(playlist_id),
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+            "uri": f"spotify:playlist:{playlist_id}",
+        }
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+
+    # --- user -----------------------------------------------------------
+    @api_call
+    def current_user(self):
+        return {
+            "id": USER_ID, "display_name": "Replay User", "country": "US", "product": "premium",
+            "followers": {"total": 12}, "images": _image(USER_ID),
+            "external_urls": {"spotify": f"https://open.spotify.com/user/{USER_ID}"},
+        }
+
+    me = current_user
+
+    @api_call
+    def user(self, user):
+        return {
+            "id": user, "display_name": user, "followers": {"total": 3}, "images": [],
+            "external_urls": {"spotify": f"https://open.spotify.com/user/{user}"},
+        }
+
+    # --- tracks ---------------------------------------------------------
+    @api_call
+    def current_user_top_tracks(self, limit=20, offset=0, time_range="medium_term"):
+        shift = {"short_term": 3, "medium_term": 0, "long_term": 7}.get(time_range, 0)
+        return _page([_track((i * 7 + shift) % len(TRACKS)) for i in range(len(TRACKS))], limit)
+
+    @api_call
+    def current_user_recently_played(self, limit=50, after=None, before=None):
+        return _page([{"track": _track(i), "played_at": f"2024-05-01T{10 + i % 12:02d}:00:00Z"}
+                      for i in range(len(TRACKS) - 1, -1, -1)], limit)
+
+    @api_call
+    def current_user_saved_tracks(self, limit=20, offset=0, market=None):
+        return _page([{"track": _track(i), "added_at": f"2024-04-{1 + i % 28:02d}T12:00:00Z"}
+                      for i in range(0, len(TRACKS), 2)], limit)
+
+    @api_call
+    def audio_features(self, tracks=None):
+        by_id = {_track(i)["id"]: i for i in range(len(TRACKS))}
+        return [_audio_features(by_id[t]) if t in by_id else None for t in (tracks or [])]
+
+    @api_call
+    def recommendations(self, seed_artists=None, seed_genres=None, seed_tracks=None, limit=20, country=None, **kwargs):
+        seeds = len(seed_artists or []) + len(seed_tracks or []) + len(seed_genres or [])
+        count = min(limit, len(TRACKS))
+        return {"tracks": [_track((i * 5 + seeds) % len(TRACKS)) for i in range(count)], "seeds": []}
+
+    # --- search ---------------------------------------------------------
+    @api_call
+    def search(self, q, limit=10, offset=0, type="track", market=None):
+        words = [w for w in q.lower().replace("artist:", " ").replace("track:", " ").split() if w]
+
+        def score(text):
+            return sum(w in text.lower() for w in words)
+
+        result = {}
+        if "track" in type:
+            label = [f"{name} {ARTISTS[artist][0]}" for name, artist in TRACKS]
+            ranked = sorted(range(len(TRACKS)), key=lambda i: -score(label[i]))
+            matches = [i for i in ranked if score(label[i])] or ranked
+            result.update(_page([_track(i) for i in matches], limit, "tracks"))
+        if "artist" in type:
+            ranked = sorted(range(len(ARTISTS)), key=lambda i: -score(ARTISTS[i][0]))
+            matches = [i for i in ranked if score(ARTISTS[i][0])] or ranked
+            result.update(_page([_artist(i) for i in matches], limit, "artists"))
+        return result
+
+    # --- artists --------------------------------------------------------
+    def _artist_index(self, artist_id):
+        return next((i for i in range(len(ARTISTS)) if _artist(i)["id"] == artist_id), 0)
+
+    @api_call
+    def current_user_top_artists(self, limit=20, offset=0, time_range="medium_term"):
+        shift = {"short_term": 2, "medium_term": 0, "long_term": 5}.get(time_range, 0)
+        return _page([_artist((i + shift) % len(ARTISTS)) for i in range(len(ARTISTS))], limit)
+
+    @api_call
+    def current_user_followed_artists(self, limit=20, after=None):
+        return _page([_artist(i) for i in range(len(ARTISTS)) if _artist(i)["id"] in self._followed], limit, "artists")
+
+    @api_call
+    def current_user_following_artists(self, ids=None):
+        return [artist_id in self._followed for artist_id in (ids or [])]
+
+    @api_call
+    def user_follow_artists(self, ids=None):
+        self._followed.update(ids or [])
+
+    @api_call
+    def user_unfollow_artists(self, ids=None):
+        self._followed.difference_update(ids or [])
+
+    @api_call
+    def artist(self, artist_id):
+        return _artist(self._artist_index(artist_id))
+
+    @api_call
+    def artist_top_tracks(self, artist_id, country="US"):
+        index = self._artist_index(artist_id)
+        return {"tracks": [_track(i) for i in range(len(TRACKS)) if TRACKS[i][1] == index]}
+
+    @api_call
+    def artist_albums(self, artist_id, album_type=None, country=None, limit=20, offset=0):
+        index = self._artist_index(artist_id)
+        albums = [dict(_track(i)["album"], artists=_track(i)["artists"])
+                  for i in range(len(TRACKS)) if TRACKS[i][1] == index]
+        return _page(albums, limit)
+
+    @api_call
+    def album_tracks(self, album_id, limit=50, offset=0, market=None):
+        return _page([_track(i) for i in range(len(TRACKS)) if _track(i)["album"]["id"] == album_id], limit)
+
+    @api_call
+    def artist_related_artists(self, artist_id):
+        index = self._artist_index(artist_id)
+        return {"artists": [_artist((index + k) % len(ARTISTS)) for k in (1, 3, 5)]}
+
+    # --- playlists ------------------------------------------------------
+    def _find_playlist(self, playlist_id):
+        return next((p for p in self._playlists if p["id"] == playlist_id), self._playlists[0])
+
+    def _items(self, playlist_id, limit=None):
+        return _page([{"track": _track(i), "added_at": "2024-03-01T12:00:00Z"}
+                      for i in self._playlist_tracks.get(playlist_id, [])], limit)
+
+    @api_call
+    def current_user_playlists(self, limit=50, offset=0):
+        return _page(copy.deepcopy(self._playlists), limit)
+
+    @api_call
+    def user_playlists(self, user, limit=50, offset=0):
+        return _page(copy.deepcopy(self._playlists), limit)
+
+    @api_call
+    def playlist(self, playlist_id, fields=None, market=None, additional_types=("track",)):
+        playlist = copy.deepcopy(self._find_playlist(playlist_id))
+        playlist["tracks"] = self._items(playlist_id)
+        return playlist
+
+    @api_call
+    def playlist_tracks(self, playlist_id, fields=None, limit=100, offset=0, market=None, additional_types=("track",)):
+        return self._items(playlist_id, limit)
+
+    playlist_items = playlist_tracks
+
+    @api_call
+    def next(self, result):
+        return None
+
+    @api_call
+    def user_playlist_create(self, user, name, public=True, collaborative=False, description=""):
+        playlist = self._playlist(len(self._playlists), name)
+        playlist.update(public=public, description=description, tracks={"total": 0})
+        self._playlists.append(playlist)
+        self._playlist_tracks[playlist["id"]] = []
+        return copy.deepcopy(playlist)
+
+    def _track_index(self, uri_or_id):
+        track_id = str(uri_or_id).split(":")[-1]
+        return next((i for i in range(len(TRACKS)) if _track(i)["id"] == track_id), None)
+
+    @api_call
+    def playlist_add_items(self, playlist_id, items, position=None):
+        tracks = self._playlist_tracks.setdefault(playlist_id, [])
+        tracks.extend(i for i in map(self._track_index, items) if i is not None)
+        return {"snapshot_id": f"snapshot{len(tracks)}"}
+
+    @api_call
+    def playlist_remove_all_occurrences_of_items(self, playlist_id, items, snapshot_id=None):
+        remove = {self._track_index(item) for item in items}
+        self._playlist_tracks[playlist_id] = [i for i in self._playlist_tracks.get(playlist_id, []) if i not in remove]
+        return {"snapshot_id": "snapshot"}
+
+    @api_call
+    def current_user_follow_playlist(self, playlist_id, public=True):
+        return None
+
+    @api_call
+    def current_user_unfollow_playlist(self, playlist_id):
+        return None
+
+    @api_call
+    def playlist_is_following(self, playlist_id, user_ids):
+        return [True for _ in user_ids]
+
+
+class RecordingSpotify:
+    """Wraps a real spotipy client and records every response for later replay"""
+
+    def __init__(self, client, path: str):
+        self._client = client
+        self._path = path
+        self._recorded = {}
+
+    def __getattr__(self, method):
+        target = getattr(self._client, method)
+        if not callable(target) or not hasattr(FakeSpotify, method):
+            return target
+
+        def record(*args, **kwargs):
+            result = target(*args, **kwargs)
+            self._recorded[call_key(method, bound_arguments(method, args, kwargs))] = result
+            return result
+        return record
+
+    def save(self):
+        with open(self._path, "w") as f:
+            json.dump(self._recorded, f, indent=1, default=str)
+        return self._path
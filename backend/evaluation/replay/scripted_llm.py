@@ -0,0 +1,102 @@
+"""
+Scripted stand-in for the OpenAI chat models.
+
+ScriptedChatModel answers from a script keyed by the user's message: with tools
+bound it emits the scripted tool call (or the first bound tool whose name shares
+a word with the message), after a tool result it writes a short summary, and
+without tools it returns the scripted casual reply. An optional per-call latency
+stands in for the model's response time; every call is counted.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+
+def _tool_name(tool) -> str:
+    if isinstance(tool, dict):
+        return tool.get("name") or tool.get("function", {}).get("name")
+    return getattr(tool, "name", None) or getattr(tool, "__name__", str(tool))
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays scripted tool calls and replies"""
+
+    model_name: str = "scripted"
+    script: Dict[str, dict] = {}
+    latency_ms: float = 0.0
+    default_reply: str = "Right on! 🎵 What's next on your musical journey?"
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _tool_calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def tool_calls(self) -> int:
+        return self._tool_calls
+
+    def reset_counts(self):
+        with self._lock:
+            self._calls = 0
+            self._tool_calls = 0
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tool_names=[_tool_name(tool) for tool in tools], **kwargs)
+
+    def _turn(self, messages: List[BaseMessage]) -> dict:
+        user = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        text = user.content.strip().lower() if user else ""
+        return dict(self.script.get(text, {}), user=text)
+
+    def _respond(self, messages: List[BaseMessage], tool_names: Optional[List[str]]) -> AIMessage:
+        turn = self._turn(messages)
+        last = messages[-1] if messages else None
+
+        if isinstance(last, ToolMessage):
+            summary = re.sub(r"\s+", " ", str(last.content))[:300]
+            return AIMessage(content=turn.get("reply") or f"Here's what I found 🎧 {summary}")
+
+        if tool_names:
+            tool, args = turn.get("tool"), turn.get("args", {})
+            if tool not in tool_names:
+                # Routed to an agent without the scripted tool: query its closest tool
+                words = set(re.findall(r"[a-z]+", turn["user"]))
+                tool = next((name for name in tool_names if words & set(name.split("_"))), tool_names[0])
+                args = {"query": turn["user"]}
+            with self._lock:
+                self._tool_calls += 1
+                call_id = f"call_{self._tool_calls}"
+            return AIMessage(content="", tool_calls=[{"name": tool, "args": args, "id": call_id}])
+
+        return AIMessage(content=turn.get("reply") or self.default_reply)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None,
+                  tool_names: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        with self._lock:
+            self._calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        message = self._respond(messages, tool_names)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = max(1, len(str(message.content)) // 4)
+        message.usage_metadata = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                                  "total_tokens": prompt_tokens + completion_tokens}
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}},
+        )
@@ -5,10 +5,10 @@ Simple test of music recommendation system before RAGAs evaluation
 
 import os
 import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '.'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 import json
-from app.tools.vector_search_tool import search_music_by_vibe
+from src.tools.database_search_tool import search_music_by_vibe
 
 def test_music_system():
     """Test the music recommendation system"""
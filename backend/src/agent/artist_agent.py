@@ -6,6 +6,7 @@ from ..tools.spotify import (
     get_top_artists, search_artist_info, get_followed_artists,
     follow_artist, unfollow_artist, check_if_following_artist
 )
+from ..tools.database_search_tool import find_similar_artists
 from .base import BaseAgent
 
 class ArtistAgent(BaseAgent):
@@ -29,6 +30,7 @@ You can help users with:
 - Managing followed artists (follow/unfollow)
 - Getting information about specific artists
 - Checking if they're following specific artists
+- Finding artists similar to a given artist (from the local music catalogue, no Spotify call needed)
 
 Use the available tools to help users discover and manage artists on Spotify."""
 
@@ -36,7 +38,8 @@ Use the available tools to help users discover and manage artists on Spotify."""
     def _tools(self) -> List[Any]:
         return [
             get_top_artists, search_artist_info, get_followed_artists,
-            follow_artist, unfollow_artist, check_if_following_artist
+            follow_artist, unfollow_artist, check_if_following_artist,
+            find_similar_artists
         ]
 
     def artist_agent(self, state):
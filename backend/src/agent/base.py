@@ -11,11 +11,12 @@ from langgraph.prebuilt import create_react_agent
 class BaseAgent:
     """Base class for all agents with shared LLM initialization"""
 
-    @cached_property
+    @property
     def _llm(self):
-        from langchain_openai import ChatOpenAI
+        from ..core.llm import get_llm
 
-        return ChatOpenAI(model="gpt-4o", temperature=0.7)
+        # Shared across agents: the registry keeps one pooled client per model
+        return get_llm("tools")
 
     @property
     @abstractmethod
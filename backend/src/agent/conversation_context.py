@@ -0,0 +1,145 @@
+"""
+Incrementally maintained conversation summary used for routing.
+
+Instead of lowercasing and re-joining the last 6-10 messages on every turn, the
+router node folds only the messages appended since its previous run into a small
+summary stored in ChatState["conversation_context"]:
+
+- window: per-message routing tags for the last CONTEXT_WINDOW messages
+- keywords: rolling union of those tags
+- last_artist / last_topic: most recent entities mentioned by the user
+
+Routing then costs O(query length) regardless of how long the history is.
+"""
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from .intent_rules import SYSTEM_PROMPT_PREFIX, intent_rules
+
+# Largest window any router looks at (spotify_router uses the last 10 messages)
+CONTEXT_WINDOW = 10
+
+ARTIST_PATTERNS = [
+    re.compile(r"\b(?:who is|whos|who's|tell me about)\s+([a-z0-9][a-z0-9 &.'$-]*)"),
+    re.compile(r"\b(?:follow|unfollow)\s+(?!(?:them|him|her|it)\b)([a-z0-9][a-z0-9 &.'$-]*?)(?:\s+on spotify)?$"),
+    re.compile(r"\b(?:songs|music|tracks) (?:by|from)\s+([a-z0-9][a-z0-9 &.'$-]*)"),
+]
+
+# Query tag -> topic, in priority order
+TOPIC_TAGS = [
+    ("wrapped", "wrapped"),
+    ("playlist", "playlist"),
+    ("follow", "follow"),
+    ("recommendation", "recommendation"),
+    ("vibe", "recommendation"),
+    ("artist_word", "artist"),
+]
+
+
+def _extract_artist(text: str) -> Optional[str]:
+    for pattern in ARTIST_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            name = match.group(1).strip(" ?!.")
+            if name:
+                return name
+    return None
+
+
+def _message_entry(msg) -> dict:
+    content = getattr(msg, 'content', None)
+    if not content or not isinstance(content, str):
+        return {"tags": [], "content": False, "system_prompt": False}
+    return {
+        "tags": sorted(intent_rules.message_tags(content)),
+        "content": True,
+        "system_prompt": content.startswith(SYSTEM_PROMPT_PREFIX),
+    }
+
+
+@lru_cache(maxsize=1)
+def _system_prompt_entry() -> dict:
+    # Imported lazily: main_graph itself depends on this module
+    from .main_graph import system_prompt
+    return _message_entry(HumanMessage(content=system_prompt))
+
+
+def update_conversation_context(context: Optional[dict], messages: list,
+                                assume_system_prompt: bool = False) -> dict:
+    """Fold the messages appended since the previous update into the summary.
+
+    `assume_system_prompt` marks a new summary as describing a conversation the DJ
+    system prompt is prepended to (as the main router reads it).
+    """
+    context = dict(context) if context else {
+        "last_message_id": None,
+        "window": [],
+        "keywords": [],
+        "assume_system_prompt": assume_system_prompt,
+        "has_system_prompt": False,
+        "last_artist": None,
+        "last_topic": None,
+    }
+
+    # Walk back to the last message we already summarised; only newer ones are scanned.
+    # If it is gone (history trimmed or a fresh client-side state) fall back to the tail.
+    last_id = context["last_message_id"]
+    start = max(0, len(messages) - CONTEXT_WINDOW)
+    if last_id is not None:
+        for i in range(len(messages) - 1, -1, -1):
+            if getattr(messages[i], 'id', None) == last_id:
+                start = i + 1
+                break
+        else:
+            context["window"] = []
+    else:
+        context["window"] = []
+    new_messages = messages[start:]
+    if not new_messages:
+        return context
+
+    window = list(context["window"])
+    for msg in new_messages:
+        entry = _message_entry(msg)
+        window.append(entry)
+        context["has_system_prompt"] = context["has_system_prompt"] or entry["system_prompt"]
+
+        if isinstance(msg, HumanMessage) and entry["content"]:
+            text = msg.content.lower()
+            artist = _extract_artist(text)
+            if artist:
+                context["last_artist"] = artist
+            query_tags = intent_rules.query_tags(text)
+            for tag, topic in TOPIC_TAGS:
+                if tag in query_tags:
+                    context["last_topic"] = topic
+                    break
+
+    context["window"] = window[-CONTEXT_WINDOW:]
+    context["keywords"] = sorted(set().union(*(entry["tags"] for entry in context["window"])))
+    context["last_message_id"] = getattr(messages[-1], 'id', None)
+    return context
+
+
+def window_tags(context: dict, size: int, skip_system_prompt: bool = False,
+                recent: int = 0) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Tags of the last `size` messages (and of the last `recent` of those with content).
+
+    When the summary assumes the DJ system prompt is prepended and the prompt is not
+    stored in the history, it is counted as the oldest message of the window.
+    """
+    entries = context["window"]
+    if context["assume_system_prompt"] and not skip_system_prompt and not context["has_system_prompt"]:
+        entries = [_system_prompt_entry()] + entries
+    entries = [
+        entry for entry in entries[-size:]
+        if entry["content"] and not (skip_system_prompt and entry["system_prompt"])
+    ]
+    tags = frozenset().union(*(entry["tags"] for entry in entries))
+    recent_tags = frozenset().union(*(entry["tags"] for entry in entries[-recent:])) if recent else frozenset()
+    return tags, recent_tags
+
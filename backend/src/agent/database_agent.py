@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Any, List
 from langchain_core.messages import SystemMessage, AIMessage, ToolMessage
 import json
-from ..tools.database_search_tool import search_music_by_vibe
+from ..tools.database_search_tool import search_music_by_vibe, search_music_by_vibe_batch, find_similar_artists
 from .base import BaseAgent
 
 class DatabaseAgent(BaseAgent):
@@ -26,12 +26,15 @@ You can help users with:
 - Discovering new songs based on their preferences
 - Providing music recommendations for different activities
 - Searching the music database for similar tracks
+- Finding artists similar to an artist the user names
 
-Use the database search tool to find music that matches the user's requested vibe or mood."""
+Use the database search tool to find music that matches the user's requested vibe or mood.
+When the user wants several different vibes at once (e.g. a playlist with a warm-up, a peak and a cool-down), use the batch search tool with one query per vibe.
+For "artists like X" questions, use the similar artists tool."""
 
     @property
     def _tools(self) -> List[Any]:
-        return [search_music_by_vibe]
+        return [search_music_by_vibe, search_music_by_vibe_batch, find_similar_artists]
 
     def database_agent(self, state):
         """Process database search requests with state management"""
@@ -58,8 +61,9 @@ Use the database search tool to find music that matches the user's requested vib
                 print(f"[Database Agent] Executing tool: {tool_name}({tool_args})")
                 
                 try:
-                    # Execute the search_music_by_vibe tool
-                    tool_output = search_music_by_vibe.invoke(tool_args or {})
+                    # Execute the requested search tool
+                    tool = next((t for t in self._tools if t.name == tool_name), search_music_by_vibe)
+                    tool_output = tool.invoke(tool_args or {})
                     
                     if not tool_output or str(tool_output).strip() == "":
                         tool_output = f"The {tool_name} tool completed but returned no results."
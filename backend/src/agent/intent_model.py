@@ -0,0 +1,127 @@
+"""
+Optional local intent model for the main router.
+
+A TF-IDF + logistic regression classifier trained at startup from the labelled
+queries in intent_training.json. Besides the query words it sees the routing
+tags of the previous message (e.g. an assistant reply asking to follow an
+artist), taken from the incremental conversation summary.
+
+Scoring does not go through scikit-learn: the fitted vocabulary, idf weights
+and coefficients are copied into plain dicts/arrays so a prediction costs a
+tokenization plus a handful of dot products (tens of microseconds).
+
+Enable with INTENT_MODEL_ENABLED=true. Predictions below
+INTENT_MODEL_THRESHOLD confidence fall back to the rule router.
+"""
+
+import json
+import os
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+TRAINING_PATH = os.path.join(os.path.dirname(__file__), 'intent_training.json')
+
+
+def model_enabled() -> bool:
+    return os.getenv("INTENT_MODEL_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def confidence_threshold() -> float:
+    return float(os.getenv("INTENT_MODEL_THRESHOLD", "0.5"))
+
+
+def context_features(context: Optional[dict]) -> List[str]:
+    """Tokens for the routing tags of the message before the query"""
+    if not context:
+        return []
+    previous = [entry for entry in context["window"][:-1] if entry["content"] and not entry["system_prompt"]]
+    if not previous:
+        return []
+    return [f"ctx_{tag}" for tag in previous[-1]["tags"]]
+
+
+def model_input(query: str, context: Optional[dict] = None) -> str:
+    return " ".join([query.lower()] + context_features(context))
+
+
+class IntentModel:
+    """Linear intent classifier scored without scikit-learn at inference time"""
+
+    def __init__(self, vectorizer, classifier):
+        self.routes = [str(route) for route in classifier.classes_]
+        self._analyzer = vectorizer.build_analyzer()
+        self._vocabulary = {term: int(index) for term, index in vectorizer.vocabulary_.items()}
+        self._idf = vectorizer.idf_.astype(np.float64)
+        self._weights = classifier.coef_.T.astype(np.float64)  # (n_features, n_routes)
+        self._intercept = classifier.intercept_.astype(np.float64)
+
+    @classmethod
+    def train(cls, examples: List[dict]) -> 'IntentModel':
+        """Fit on [{"query", "route", optional "context": [...]}, ...]"""
+        from langchain_core.messages import AIMessage, HumanMessage
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        from .conversation_context import update_conversation_context
+
+        texts, labels = [], []
+        for example in examples:
+            messages = [HumanMessage(content=t) if i % 2 == 0 else AIMessage(content=t)
+                        for i, t in enumerate(example.get('context', []))]
+            messages.append(HumanMessage(content=example['query']))
+            texts.append(model_input(example['query'], update_conversation_context(None, messages)))
+            labels.append(example['route'])
+
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+        features = vectorizer.fit_transform(texts)
+        classifier = LogisticRegression(C=10.0, max_iter=1000)
+        classifier.fit(features, labels)
+        return cls(vectorizer, classifier)
+
+    @classmethod
+    def load(cls, path: str = TRAINING_PATH) -> 'IntentModel':
+        with open(path) as f:
+            return cls.train(json.load(f))
+
+    def scores(self, query: str, context: Optional[dict] = None) -> dict:
+        """Probability of every route for the query"""
+        counts = Counter(
+            self._vocabulary[term] for term in self._analyzer(model_input(query, context))
+            if term in self._vocabulary
+        )
+        logits = self._intercept.copy()
+        if counts:
+            indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            # sublinear tf * idf, l2-normalised, as TfidfVectorizer computes it
+            values = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))) * self._idf[indices]
+            values /= np.sqrt(values @ values)
+            logits += values @ self._weights[indices]
+        logits = np.exp(logits - logits.max())
+        probabilities = logits / logits.sum()
+        return dict(zip(self.routes, probabilities.tolist()))
+
+    def predict(self, query: str, context: Optional[dict] = None) -> Tuple[str, float]:
+        """(route, confidence) for the query"""
+        scores = self.scores(query, context)
+        route = max(scores, key=scores.get)
+        return route, scores[route]
+
+
+_intent_model = None
+
+
+def get_intent_model() -> Optional[IntentModel]:
+    """Trained model when INTENT_MODEL_ENABLED is set, trained once per process"""
+    global _intent_model
+    if not model_enabled():
+        return None
+    if _intent_model is None:
+        try:
+            _intent_model = IntentModel.load()
+            print(f"[Intent Model] Trained on {TRAINING_PATH} (routes: {_intent_model.routes})")
+        except Exception as e:
+            print(f"[Intent Model] Could not train intent model, using rules only: {e}")
+            _intent_model = False
+    return _intent_model or None
@@ -0,0 +1,162 @@
+"""
+Table-driven intent rules shared by the main classifier and the Spotify router.
+
+The keyword sets, regex patterns and ordered routing rules live in
+intent_rules.json. At import time every keyword set and pattern list needed for
+the query is compiled into ONE alternation with a named group per set, and a
+single finditer() pass reports every set present in the text (patterns only
+test for presence, so they use bounded spans rather than greedy captures). The
+same is done for the conversation context; per-message context tags are kept in
+the incremental conversation summary (see conversation_context.py) so a message
+is only scanned once no matter how many turns it stays in the window.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), 'intent_rules.json')
+
+SYSTEM_PROMPT_PREFIX = 'You are DJ Spotify'
+
+
+class _SetScanner:
+    """Which named sets occur in a text, from one left-to-right pass over a combined alternation.
+
+    The alternation (one named group per set, inside a lookahead so every start position is
+    tried) finds the next position where any set not yet seen fires; the scan then resumes
+    just after it with an alternation of the remaining sets. The text is traversed once and
+    there is at most one search() call per set found. Because an alternation only reports its
+    first matching branch (e.g. "follow them" is both a follow keyword and a contextual_action
+    pattern), the remaining sets are also tried with an anchored match at each hit position.
+    """
+
+    def __init__(self, named_alternatives: Dict[str, str]):
+        self.names = tuple(named_alternatives)
+        self._alternatives = dict(named_alternatives)
+        self._single = {name: re.compile(alternation) for name, alternation in named_alternatives.items()}
+        self._combined = lru_cache(maxsize=256)(self._compile)
+
+    def _compile(self, names: Tuple[str, ...]):
+        return re.compile("(?=" + "|".join(f"(?P<{name}>{self._alternatives[name]})" for name in names) + ")")
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        found, position = set(), 0
+        remaining = self.names
+        while remaining:
+            match = self._combined(remaining).search(text, position)
+            if match is None:
+                break
+            position = match.start()
+            found.add(match.lastgroup)
+            found.update(name for name in remaining
+                         if name not in found and self._single[name].match(text, position))
+            remaining = tuple(name for name in remaining if name not in found)
+            position += 1
+        return frozenset(found)
+
+
+def _compile_sets(named_alternatives: Dict[str, str]) -> Optional[_SetScanner]:
+    """Scanner reporting every named set that occurs in a text"""
+    return _SetScanner(named_alternatives) if named_alternatives else None
+
+
+class IntentRules:
+    """Compiled form of the routing rule table"""
+
+    def __init__(self, table: dict):
+        self.classifiers = table['classifiers']
+        self.exact_phrases = {name: frozenset(phrases) for name, phrases in table.get('exact_phrases', {}).items()}
+
+        alternations = {
+            name: "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            for name, keywords in table.get('keyword_sets', {}).items()
+        }
+        alternations.update({
+            name: "|".join(f"(?:{p})" for p in patterns)
+            for name, patterns in table.get('patterns', {}).items()
+        })
+
+        query_sets, context_sets = set(), set(table.get('context_sets', []))
+        for classifier in self.classifiers.values():
+            for rule in classifier['rules']:
+                query_sets.update(rule.get('query_all', []) + rule.get('query_any', []))
+                context_sets.update(rule.get('context_any', []) + rule.get('recent_context_any', []))
+
+        unknown = (query_sets | context_sets) - set(alternations) - set(self.exact_phrases)
+        if unknown:
+            raise ValueError(f"Intent rules reference undefined sets: {sorted(unknown)}")
+
+        self._query_regex = _compile_sets({n: a for n, a in alternations.items() if n in query_sets})
+        self._context_regex = _compile_sets({n: a for n, a in alternations.items() if n in context_sets})
+        self._query_exact = {n: p for n, p in self.exact_phrases.items() if n in query_sets}
+
+    @classmethod
+    def load(cls, path: str = RULES_PATH) -> 'IntentRules':
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _match(scanner: Optional[_SetScanner], text: str) -> FrozenSet[str]:
+        return frozenset() if scanner is None else scanner.scan(text)
+
+    def query_tags(self, query: str) -> FrozenSet[str]:
+        """Sets present in the (lowercased) query, including exact-phrase matches"""
+        tags = set(self._match(self._query_regex, query))
+        stripped = query.strip()
+        tags.update(name for name, phrases in self._query_exact.items() if stripped in phrases)
+        return frozenset(tags)
+
+    def message_tags(self, content: str) -> FrozenSet[str]:
+        """Context sets present in a single message"""
+        return self._match(self._context_regex, content.lower())
+
+    def evaluate(self, classifier: str, query: str, context: Iterable[str],
+                 recent_context: Iterable[str] = ()) -> Tuple[str, Optional[str]]:
+        """Return (route, rule name) for the first matching rule, or the default route"""
+        spec = self.classifiers[classifier]
+        query_tags = self.query_tags(query)
+        context = frozenset(context)
+        recent_context = frozenset(recent_context)
+        word_count = None
+
+        for rule in spec['rules']:
+            if not query_tags.issuperset(rule.get('query_all', ())):
+                continue
+            if 'query_any' in rule and query_tags.isdisjoint(rule['query_any']):
+                continue
+            if 'context_any' in rule and context.isdisjoint(rule['context_any']):
+                continue
+            if 'recent_context_any' in rule and recent_context.isdisjoint(rule['recent_context_any']):
+                continue
+            if 'max_words' in rule:
+                if word_count is None:
+                    word_count = len(query.split())
+                if word_count > rule['max_words']:
+                    continue
+            return rule['route'], rule['name']
+
+        return spec['default'], None
+
+    def classify(self, classifier: str, messages: list,
+                 context: Optional[dict] = None) -> Tuple[str, Optional[str]]:
+        """Classify the last message of a conversation with the given rule set.
+
+        `context` is the incremental conversation summary; it is built from the
+        messages when not supplied.
+        """
+        from .conversation_context import update_conversation_context, window_tags
+
+        if context is None:
+            context = update_conversation_context(None, messages)
+        spec = self.classifiers[classifier]
+        query = messages[-1].content.lower() if messages else ""
+        context_tags, recent_tags = window_tags(
+            context, spec['context_window'], spec.get('skip_system_prompt', False), spec.get('recent_window', 0)
+        )
+        return self.evaluate(classifier, query, context_tags, recent_tags)
+
+
+intent_rules = IntentRules.load()
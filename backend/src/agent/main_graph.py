@@ -1,9 +1,10 @@
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, ToolMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 import json
-import re
 from .spotify_router import spotify_router
+from .intent_rules import intent_rules
+from .conversation_context import update_conversation_context, window_tags
+from .intent_model import confidence_threshold, get_intent_model
 from .playlist_agent import playlist_agent
 from .artist_agent import artist_agent
 from .song_agent import song_agent
@@ -12,6 +13,7 @@ from .web_agent import web_agent
 from .database_agent import database_agent
 from ..core.schema import ChatState
 from ..core.memory import memory
+from ..core.llm import get_llm
 
 # DJ Spotify system prompt for the multiagent system
 system_prompt = """You are DJ Spotify, a knowledgeable and enthusiastic music assistant with access to the user's Spotify data and comprehensive music search capabilities. 
@@ -103,21 +105,16 @@ Your speaking style:
 
 Remember: You're their knowledgeable music companion who gets information from reliable sources, not from memory! 🎤"""
 
-# Initialize main LLM
-llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
+def handle_memory_and_conversation(state: ChatState, context: dict) -> list:
+    """Handle memory system and conversational elements before routing to agents.
 
-def handle_memory_and_conversation(state: ChatState) -> ChatState:
-    """Handle memory system and conversational elements before routing to agents"""
+    Returns the messages to append when the turn is answered here (a remembered
+    preference or a casual reply), otherwise an empty list so the turn is routed.
+    """
     messages = state["messages"]
     
-    # Add system prompt to the beginning if not already present
-    if not messages or not any(getattr(msg, 'content', '').startswith('You are DJ Spotify') for msg in messages):
-        system_message = SystemMessage(content=system_prompt)
-        messages = [system_message] + messages
-        state["messages"] = messages
-    
     # Check for "remember" keyword in user input
-    user_input = state["messages"][-1].content if state["messages"] else ""
+    user_input = messages[-1].content if messages else ""
     if user_input.lower().startswith("remember "):
         # Extract what the user wants to remember
         memory_item = user_input[9:].strip()  # Remove "remember " prefix
@@ -127,13 +124,7 @@ def handle_memory_and_conversation(state: ChatState) -> ChatState:
         response_text = f"Got it! I'll remember that {memory_item}. 🎵 That's a solid preference to keep in mind for our music chats! Anything else you want to explore or discover? 🎧"
         
         # Add the memory as a system message for context, then the response
-        system_memory = SystemMessage(content=memory_note)
-        response = AIMessage(content=response_text)
-        
-        # Add both messages to maintain the memory context
-        state["messages"].append(system_memory)
-        state["messages"].append(response)
-        return {"messages": state["messages"]}
+        return [SystemMessage(content=memory_note), AIMessage(content=response_text)]
     
     # Check for conversational responses that don't need tool usage
     user_input_lower = user_input.lower().strip()
@@ -143,29 +134,15 @@ def handle_memory_and_conversation(state: ChatState) -> ChatState:
         "i see", "got it", "makes sense", "interesting", "good", "bad", "awesome"
     ]
     
-    # Before treating as conversational, check if it's a contextual action response
-    # Look for recent context that might make "yes/no" meaningful for Spotify actions
-    recent_context = []
-    for msg in messages[-6:]:  # Look at last 6 messages for context
-        if hasattr(msg, 'content') and msg.content:
-            recent_context.append(msg.content.lower())
-    
-    context_text = " ".join(recent_context)
+    # Before treating as conversational, check if it's a contextual action response.
+    # Tags of the last 6 messages come from the incremental conversation summary.
+    context_tags, _ = window_tags(context, 6)
     
     # Check if "yes" or "no" is in response to a follow/unfollow question
-    if user_input_lower in ["yes", "yeah", "sure", "yep", "y"]:
-        if any(follow_indicator in context_text for follow_indicator in [
-            "follow", "would you like to follow", "want to follow", "follow them", 
-            "follow on spotify", "start following"]):
-            # This "yes" is likely confirming a follow action - don't treat as conversational
-            return state
-    
-    if user_input_lower in ["no", "nah", "nope", "n"]:
-        if any(follow_indicator in context_text for follow_indicator in [
-            "follow", "would you like to follow", "want to follow", "follow them",
-            "follow on spotify", "start following", "unfollow", "stop following"]):
-            # This "no" is likely declining a follow action - don't treat as conversational
-            return state
+    if user_input_lower in ["yes", "yeah", "sure", "yep", "y", "no", "nah", "nope", "n"]:
+        if "follow_prompt" in context_tags:
+            # This "yes"/"no" is likely answering a follow action - don't treat as conversational
+            return []
     
     is_conversational = (
         len(user_input_lower.split()) <= 3 and 
@@ -174,13 +151,13 @@ def handle_memory_and_conversation(state: ChatState) -> ChatState:
     
     # Additional check: if there's recent follow/artist context, don't treat short responses as conversational
     if (user_input_lower in ["yes", "no", "yeah", "nah", "sure", "yep", "nope"] and
-        any(follow_context in context_text for follow_context in [
-            "follow", "artist", "blackpink", "spotify", "would you like"])):
+        "action_prompt" in context_tags):
         is_conversational = False
     
     if is_conversational:
         # Let the AI respond naturally without tools for conversational inputs
-        conversational_llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
+        # Shared client on the cheaper small-talk model
+        conversational_llm = get_llm("chat")
         
         # Create a simple prompt for conversational responses
         conversational_prompt = """You are DJ Spotify, a friendly music assistant. The user just said something casual/conversational. 
@@ -193,234 +170,71 @@ def handle_memory_and_conversation(state: ChatState) -> ChatState:
         
         Do NOT use any tools or search for information. Just respond conversationally."""
         
-        # Get the user's conversational input
-        user_message = state["messages"][-1].content
-        
         # Create messages for the conversational response
         conv_messages = [
             SystemMessage(content=conversational_prompt),
-            HumanMessage(content=user_message)
+            HumanMessage(content=user_input)
         ]
         
         try:
             # Get AI response without tools
             conv_response = conversational_llm.invoke(conv_messages)
-            response = AIMessage(content=conv_response.content)
-            state["messages"].append(response)
+            return [AIMessage(content=conv_response.content)]
         except Exception as e:
             print(f"[Conversational Handler] Error: {e}")
             # Fallback to a simple response
-            response = AIMessage(content="Right on! 🎵 What's next on your musical journey?")
-            state["messages"].append(response)
-        
-        return {"messages": state["messages"]}
+            return [AIMessage(content="Right on! 🎵 What's next on your musical journey?")]
     
-    return state
+    return []
 
-def classify_with_context(messages: list) -> str:
-    """Classifier that considers conversation context"""
+def classify_with_context(messages: list, context: dict = None) -> str:
+    """Classifier that considers conversation context.
+
+    Routing rules live in intent_rules.json and are evaluated in a single pass over
+    the query plus the tags kept in the incremental conversation summary. When the
+    local intent model is enabled its prediction wins if it is confident enough.
+    """
+    if context is None:
+        context = update_conversation_context(None, messages)
     current_query = messages[-1].content.lower() if messages else ""
-    
-    # Get recent conversation context (last 3-4 messages for context)
-    context_messages = []
-    for msg in messages[-6:]:  # Look at last 6 messages (3 user + 3 assistant pairs)
-        if hasattr(msg, 'content') and msg.content:
-            context_messages.append(msg.content.lower())
-    
-    context = " ".join(context_messages)
-    
+
     print(f"[Classifier] Current query: {current_query}")
-    print(f"[Classifier] Context: {context[:200]}...")
-    
-    # Direct Spotify Wrapped detection (including "wrap" keyword)
-    wrapped_keywords = ["wrapped", "wrap", "year in review", "music summary", "recap", "annual summary", "yearly recap", "my year"]
-    if any(keyword in current_query for keyword in wrapped_keywords):
-        print(f"[Classifier] Direct Spotify Wrapped detection")
-        return "spotify"
-    
-    # Time periods + context suggesting wrapped (e.g., "6 months" after wrapped discussion)
-    time_periods = ["month", "months", "week", "weeks", "year", "years", "days", "6 months", "1 month", "4 weeks"]
-    if (any(period in current_query for period in time_periods) and 
-        any(wrapped_term in context for wrapped_term in wrapped_keywords)):
-        print(f"[Classifier] Time period in wrapped context")
-        return "spotify"
-    
-    # Check for conversational continuations
-    continuation_patterns = [
-        "how about", "how abt", "what about", "what abt", "and", "also",
-        "too", "as well", "same for", "for", "now", "next"
-    ]
-    
-    # Check for contextual references that need Spotify actions
-    contextual_spotify_patterns = [
-        r"follow (them|him|her|it)",           # "follow them"
-        r"unfollow (them|him|her|it)",         # "unfollow them" 
-        r"add (them|him|her|it|this|that)",    # "add them to playlist"
-        r"save (them|him|her|it|this|that)",   # "save this song"
-        r"like (them|him|her|it|this|that)",   # "like this artist"
-        r"follow .+ on spotify",               # "follow them on spotify"
-        r"add .+ to playlist",                 # "add this to playlist"
-    ]
-    
-    # Check if current query has contextual references that suggest Spotify actions
-    if any(re.search(pattern, current_query) for pattern in contextual_spotify_patterns):
-        # Look for artist/song mentions in recent context to confirm it's a Spotify action
-        # Also check for recent artist names that could be resolved from "them/him/her"
-        context_indicators = [
-            "artist", "song", "track", "music", "album", "spotify", "playlist",
-            "top", "recently", "listening", "played"
-        ]
-        
-        # Look for potential artist names in recent context
-        artist_name_patterns = [
-            r"who is ([a-zA-Z0-9\s]+)",
-            r"whos ([a-zA-Z0-9\s]+)", 
-            r"tell me about ([a-zA-Z0-9\s]+)",
-            r"([a-zA-Z0-9\s]+) is a",
-            r"([a-zA-Z0-9\s]+) artist",
-            r"([a-zA-Z0-9\s]+) musician"
-        ]
-        
-        recent_artist = None
-        for msg_content in context_messages[-3:]:  # Check last 3 messages for artist names
-            for pattern in artist_name_patterns:
-                match = re.search(pattern, msg_content, re.IGNORECASE)
-                if match:
-                    recent_artist = match.group(1).strip()
-                    break
-            if recent_artist:
-                break
-        
-        if any(indicator in context for indicator in context_indicators) or recent_artist:
-            print(f"[Classifier] Contextual Spotify action detected: {current_query}")
-            if recent_artist:
-                print(f"[Classifier] Recent artist context: {recent_artist}")
-            return "spotify"
-    
-    # Special handling for "yes/no" responses that might be confirming Spotify actions
-    if current_query.strip() in ["yes", "yeah", "sure", "yep", "y", "no", "nah", "nope", "n"]:
-        # Check if there's recent follow-related context
-        if any(follow_indicator in context for follow_indicator in [
-            "follow", "would you like to follow", "want to follow", "follow them",
-            "follow on spotify", "start following", "blackpink", "artist"]):
-            print(f"[Classifier] Contextual follow response detected: {current_query}")
-            return "spotify"
-        
-        # Check if there's recent playlist-related context
-        if any(playlist_indicator in context for playlist_indicator in [
-            "playlist", "add to playlist", "create playlist", "would you like to add"]):
-            print(f"[Classifier] Contextual playlist response detected: {current_query}")
-            return "spotify"
-    
-    # If current query is short and seems like a continuation
-    if (len(current_query.split()) <= 3 and 
-        any(pattern in current_query for pattern in continuation_patterns)):
-        
-        # Check what was discussed recently in context
-        if any(spotify_term in context for spotify_term in [
-            "top tracks", "top artists", "my playlist", "recently played", 
-            "saved tracks", "spotify", "wrapped", "my music"]):
-            
-            # Check for Spotify Wrapped context specifically
-            if any(wrapped_term in context for wrapped_term in [
-                "wrapped", "wrap", "year in review", "music summary", "annual summary", "yearly recap", "my year"]):
-                print(f"[Classifier] Contextual routing: spotify (wrapped from context)")
-                return "spotify"
-            # Determine what specific Spotify topic based on current query + context
-            elif "artist" in current_query or ("top" in context and "track" in context and "artist" in current_query):
-                print(f"[Classifier] Contextual routing: spotify (artists from context)")
-                return "spotify"
-            elif "track" in current_query or "song" in current_query:
-                print(f"[Classifier] Contextual routing: spotify (tracks from context)")
-                return "spotify"
-            elif "playlist" in current_query:
-                print(f"[Classifier] Contextual routing: spotify (playlists from context)")
-                return "spotify"
-            else:
-                # General Spotify context detected
-                print(f"[Classifier] Contextual routing: spotify (general from context)")
-                return "spotify"
-    
-    # For ambiguous queries about artists/tracks, check context
-    if current_query in ["artists", "tracks", "songs", "playlists"]:
-        if any(spotify_term in context for spotify_term in [
-            "top", "my", "recently", "saved", "spotify", "wrapped"]):
-            print(f"[Classifier] Contextual routing: spotify ('{current_query}' in Spotify context)")
-            return "spotify"
-    
-    # Expand common abbreviations and informal language
-    query_expansions = {
-        "how abt": "how about",
-        "what abt": "what about", 
-        "artists": "top artists",
-        "tracks": "top tracks",
-        "songs": "top songs",
-        "follow them": "follow artist",
-        "unfollow them": "unfollow artist",
-        "add them": "add to playlist",
-        "save them": "save tracks"
-    }
-    
-    expanded_query = current_query
-    for abbrev, expansion in query_expansions.items():
-        if abbrev in expanded_query:
-            expanded_query = expanded_query.replace(abbrev, expansion)
-    
-    # If query was expanded and now contains Spotify keywords, use Spotify
-    if expanded_query != current_query:
-        # Check expanded query against Spotify keywords
-        spotify_keywords = ["wrapped", "wrap", "spotify wrapped", "year in review", "music summary", 
-                           "top tracks", "top artists", "my playlist", "my music", "recently played"]
-        if any(keyword in expanded_query for keyword in spotify_keywords):
-            print(f"[Classifier] Expanded '{current_query}' to '{expanded_query}' -> spotify")
-            return "spotify"
-    
-    # Final classification using base classifier logic integrated here
-    # Database search keywords for music recommendation based on vibe/characteristics
-    database_keywords = [
-        "chill", "danceable", "upbeat", "energetic", "mellow", "relaxing",
-        "happy", "sad", "melancholic", "aggressive", "peaceful", "intense",
-        "high energy", "low energy", "acoustic", "electronic", "instrumental",
-        "with vocals", "no vocals", "fast tempo", "slow tempo", "dreamy",
-        "atmospheric", "ambient", "lo-fi", "vibe", "mood", "feels like", 
-        "reminds me of", "music for", "songs for", "tracks that"
-    ]
-    
-    # Recommendation patterns
-    recommendation_patterns = [
-        r"recommend (me )?some", r"suggest (me )?some", r"find me (some )?music",
-        r"give me (some )?songs", r"i want (some )?music", r"music for .+",
-        r"songs for .+", r"what should i listen to", r"looking for .+ music",
-        r"need .+ songs", r"similar to .+", r"like .+ by .+", r"songs like .+"
-    ]
-    
-    # Check for recommendation requests
-    if any(keyword in current_query for keyword in database_keywords):
-        if any(rec_word in current_query for rec_word in ["recommend", "suggest", "find", "give me", "i want", "looking for", "need"]):
-            print(f"[Classifier] Database recommendation request detected")
-            return "database"
-    
-    if any(re.search(pattern, current_query) for pattern in recommendation_patterns):
-        print(f"[Classifier] Database similarity/recommendation pattern detected")
-        return "database"
-    
-    # Default to web for general music information
-    print(f"[Classifier] Defaulting to web search")
-    return "web"
+    print(f"[Classifier] Context keywords: {context['keywords']}")
+    if context.get("last_artist"):
+        print(f"[Classifier] Recent artist context: {context['last_artist']}")
+
+    model = get_intent_model()
+    if model is not None:
+        predicted, confidence = model.predict(current_query, context)
+        if confidence >= confidence_threshold():
+            print(f"[Classifier] Intent model -> {predicted} ({confidence:.2f})")
+            return predicted
+        print(f"[Classifier] Intent model unsure ({predicted} {confidence:.2f}), falling back to rules")
+
+    route, rule = intent_rules.classify("main", messages, context)
+
+    if rule:
+        print(f"[Classifier] Rule '{rule}' -> {route}")
+    else:
+        print(f"[Classifier] Defaulting to web search")
+    return route
+
+def router_node(state: ChatState) -> dict:
+    """Update the conversation summary and answer memory/conversational turns directly"""
+    # The DJ system prompt is read as the start of every conversation
+    context = update_conversation_context(state.get("conversation_context"), state["messages"],
+                                          assume_system_prompt=True)
+    handled = handle_memory_and_conversation(state, context)
+    return {"conversation_context": context, "messages": handled}
 
 def router(state: ChatState) -> str:
     """Enhanced router with memory and conversation handling"""
-    # First handle memory and conversational elements
-    updated_state = handle_memory_and_conversation(state)
-    
-    # If we handled a memory or conversational response, we're done
-    if len(updated_state["messages"]) > len(state["messages"]):
-        # Update the state with the new messages
-        state["messages"] = updated_state["messages"]
+    # If the router node already answered with a memory or conversational response, we're done
+    if state["messages"] and isinstance(state["messages"][-1], AIMessage):
         return "conversation_handled"
     
     # Otherwise, proceed with context-aware routing
-    classification = classify_with_context(state["messages"])
+    classification = classify_with_context(state["messages"], state.get("conversation_context"))
     
     print(f"[Main Router] Query: {state['messages'][-1].content}")
     print(f"[Main Router] Classification: {classification}")
@@ -450,7 +264,7 @@ def conversation_handler(state: ChatState) -> ChatState:
 
 # 3. Build the main graph
 main_builder = StateGraph(ChatState)
-main_builder.add_node("router", lambda x: x)
+main_builder.add_node("router", router_node)
 main_builder.add_node("spotify", spotify_subgraph)
 main_builder.add_node("web", web_agent)
 main_builder.add_node("database", database_agent)
@@ -5,7 +5,8 @@ from langchain_core.messages import SystemMessage, AIMessage, ToolMessage
 from ..tools.spotify import (
     get_playlist_names, get_playlists_with_details, get_playlist_tracks,
     get_recent_playlists, follow_playlist, unfollow_playlist, check_if_following_playlist,
-    create_playlist, add_track_to_playlist, remove_track_from_playlist, search_and_add_to_playlist
+    create_playlist, add_track_to_playlist, remove_track_from_playlist, search_and_add_to_playlist,
+    add_tracks_to_playlist, remove_tracks_from_playlist, build_playlist_from_vibe
 )
 from .base import BaseAgent
 
@@ -30,8 +31,11 @@ class PlaylistAgent(BaseAgent):
         - Getting playlist tracks
         - Following and unfollowing playlists
         - Creating new playlists
-        - Adding and removing tracks from playlists
+        - Adding and removing tracks from playlists (use add_tracks_to_playlist / remove_tracks_from_playlist
+          with the full list whenever more than one song is involved)
         - Searching and adding songs to playlists
+        - Building a whole playlist from a vibe or mood in one step (prefer build_playlist_from_vibe
+          over adding tracks one at a time when the user asks for a themed playlist)
 
         Use the available tools to help users manage their Spotify playlists effectively."""
 
@@ -40,7 +44,8 @@ class PlaylistAgent(BaseAgent):
         return [
             get_playlist_names, get_playlists_with_details, get_playlist_tracks,
             get_recent_playlists, follow_playlist, unfollow_playlist, check_if_following_playlist,
-            create_playlist, add_track_to_playlist, remove_track_from_playlist, search_and_add_to_playlist
+            create_playlist, add_track_to_playlist, remove_track_from_playlist, search_and_add_to_playlist,
+            add_tracks_to_playlist, remove_tracks_from_playlist, build_playlist_from_vibe
         ]
 
     def playlist_agent(self, state):
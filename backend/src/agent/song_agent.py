@@ -4,7 +4,7 @@ from typing import Any, List
 from langchain_core.messages import SystemMessage, AIMessage, ToolMessage
 from ..tools.spotify import (
     get_top_tracks, get_recently_played, search_tracks, get_saved_tracks,
-    get_recommendations_by_track
+    get_recommendations_by_track, get_recommendations_by_audio_features
 )
 from .base import BaseAgent
 
@@ -28,6 +28,7 @@ class SongAgent(BaseAgent):
             - Searching for specific tracks
             - Managing saved tracks
             - Getting song recommendations
+            - Recommending songs with target audio features (energy, danceability, tempo, ...)
 
             Use the available tools to fetch Spotify data and provide helpful responses about songs and tracks."""
 
@@ -35,7 +36,7 @@ class SongAgent(BaseAgent):
     def _tools(self) -> List[Any]:
         return [
             get_top_tracks, get_recently_played, search_tracks, get_saved_tracks,
-            get_recommendations_by_track
+            get_recommendations_by_track, get_recommendations_by_audio_features
         ]
 
     def song_agent(self, state):
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from typing import Any, List
-from langchain_core.messages import SystemMessage, AIMessage, ToolMessage
-from ..tools.tavily_tool import search_music_info
+from langchain_core.messages import SystemMessage, AIMessage, HumanMessage, ToolMessage
+from ..tools.knowledge_store import get_knowledge_store, parse_question
+from ..tools.tavily_tool import cache_ttl, search_music_info
 from .base import BaseAgent
 
 class WebAgent(BaseAgent):
@@ -39,6 +40,16 @@ Use the web search tool to find accurate and up-to-date information."""
         
         print(f"[Web Agent] Processing query with {len(messages)} messages")
         
+        # Answer known artists/genres locally: no LLM calls and no web search
+        question = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        knowledge = get_knowledge_store() if parse_question(question) else None
+        if knowledge is not None:
+            local_answer = knowledge.lookup(question)
+            if local_answer:
+                print(f"[Web Agent] Answered from local knowledge")
+                state["messages"].append(AIMessage(content=local_answer))
+                return {"messages": state["messages"]}
+        
         # Create LLM with tools bound
         web_llm = self._llm.bind_tools(self._tools)
         
@@ -50,6 +61,7 @@ Use the web search tool to find accurate and up-to-date information."""
         if hasattr(response, 'tool_calls') and response.tool_calls:
             # Process all tool calls and collect responses
             tool_responses = []
+            web_answered = False
             for tool_call in response.tool_calls:
                 tool_name = tool_call["name"]
                 tool_args = tool_call.get("args", {})
@@ -65,6 +77,7 @@ Use the web search tool to find accurate and up-to-date information."""
                         tool_output = f"The {tool_name} tool completed but returned no results."
                     
                     print(f"[Web Agent] Tool output: {len(str(tool_output))} characters")
+                    web_answered = web_answered or str(tool_output).startswith("🎵")
                     
                     tool_message = ToolMessage(
                         tool_call_id=tool_call_id,
@@ -86,6 +99,8 @@ Use the web search tool to find accurate and up-to-date information."""
             try:
                 final_response = web_llm.invoke(state["messages"])
                 state["messages"].append(final_response)
+                if knowledge is not None and web_answered:
+                    knowledge.remember(question, final_response.content, ttl=cache_ttl(question))
             except Exception as e:
                 print(f"[Web Agent] Final response error: {e}")
                 error_response = AIMessage(content="Sorry, I encountered an error processing your music search request.")
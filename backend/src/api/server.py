@@ -1,7 +1,9 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, PlainTextResponse
 from pydantic import BaseModel
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 import os
@@ -10,6 +12,13 @@ import urllib.parse
 from langchain_core.messages import HumanMessage
 from ..agent.main_graph import graph
 from ..core.schema import ChatState
+from ..core.memory import memory
+from ..core.llm import llm_metrics
+from ..core.metrics import registry, CONTENT_TYPE, chat_requests, chat_latency, chats_in_flight
+from ..core.tracing import tracer, span, new_id, traced_config
+from ..core.deadline import deadline, chat_budget
+from ..tools.spotify.base import instrument_spotify_client
+from ..tools.database_search_tool import get_searcher
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +29,13 @@ app = FastAPI(title="Music Recommendation Bot API")
 class ChatMessage(BaseModel):
     message: str
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 10
+
+# Largest batch accepted by /search/batch
+MAX_BATCH_QUERIES = 200
+
 # Memory is now handled by LangGraph's InMemorySaver with thread IDs
 # No need for manual conversation_sessions
 
@@ -142,9 +158,8 @@ async def logout():
                 user_id = user_info['id']
                 
                 # Clear LangGraph memory for this user
-                print(f"Memory reset for user: {user_id} (handled by LangGraph checkpointer)")
-                # Note: LangGraph memory can be cleared by using different thread IDs
-                # For now, we'll rely on the in-memory nature resetting on server restart
+                memory.delete_thread(f"user_{user_id}")
+                print(f"Memory reset for user: {user_id}")
             except:
                 pass  # If token is invalid, just continue with logout
         
@@ -183,9 +198,54 @@ async def get_user_profile():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting user profile: {str(e)}")
 
+@app.get("/memory/report")
+async def memory_report():
+    """Per-thread conversation memory footprint"""
+    threads = memory.footprint_report()
+    return {
+        "threads": threads,
+        "total_threads": len(threads),
+        "total_bytes": sum(thread["bytes"] for thread in threads)
+    }
+
+@app.get("/llm/metrics")
+async def llm_metrics_report():
+    """Per-model LLM call latency and token usage"""
+    return {"models": llm_metrics.report()}
+
+@app.get("/metrics")
+async def metrics():
+    """Operational metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+@app.get("/metrics/traces")
+async def trace_metrics():
+    """Span latency per node, LLM call, tool and outbound request, plus recent traces"""
+    return dict(tracer.summary(), llm=llm_metrics.report())
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """Vibe search for many queries at once (one similarity matrix product)"""
+    if not request.queries or len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {MAX_BATCH_QUERIES} queries")
+    if not 1 <= request.top_k <= 50:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 50")
+
+    searcher = await run_in_threadpool(get_searcher)
+    results = await run_in_threadpool(searcher.search_similar_music_batch, request.queries, request.top_k)
+    return {"results": [{"query": query, "recommendations": matches}
+                        for query, matches in zip(request.queries, results)]}
+
 @app.post("/chat")
-async def chat(message: ChatMessage):
+async def chat(message: ChatMessage, response: Response, x_trace_id: Optional[str] = Header(None)):
     """Handle chat messages using the LangGraph agent"""
+    trace_id = x_trace_id or new_id()
+    response.headers["X-Trace-Id"] = trace_id
+    with chats_in_flight.track_inprogress(), chat_latency.time(), span("chat", kind="request", trace_id=trace_id), \
+            deadline(chat_budget()):
+        return _chat(message, trace_id)
+
+def _chat(message: ChatMessage, trace_id: str):
     try:
         # Check if user is authenticated
         sp_oauth = get_spotify_oauth()
@@ -195,20 +255,20 @@ async def chat(message: ChatMessage):
             raise HTTPException(status_code=401, detail="Not authenticated")
         
         # Get user ID for session management
-        sp = spotipy.Spotify(auth=token_info['access_token'])
+        sp = instrument_spotify_client(spotipy.Spotify(auth=token_info['access_token']))
         user_info = sp.current_user()
         user_id = user_info['id']
         
         # Use thread ID based on user ID for memory persistence
         thread_id = f"user_{user_id}"
-        config = {"configurable": {"thread_id": thread_id}}
+        config = traced_config({"configurable": {"thread_id": thread_id}}, trace_id)
         
         # Create state with just the new user message
         # LangGraph's checkpointer will automatically restore and maintain conversation history
         user_message = HumanMessage(content=message.message)
         state = {"messages": [user_message]}
         
-        print(f"[Server] Invoking graph with new message: '{message.message}'")
+        print(f"[Server] Invoking graph with new message: '{message.message}' (trace {trace_id})")
         
         # Invoke graph - checkpointer handles conversation history
         result = graph.invoke(state, config=config)
@@ -228,13 +288,15 @@ async def chat(message: ChatMessage):
             ai_response = "Hey! I'm having some trouble with that response. Mind trying again? 🎧"
         
         # No need to manually manage conversation_sessions - LangGraph handles it
-        return {"response": ai_response}
+        chat_requests.inc(status="ok")
+        return {"response": ai_response, "trace_id": trace_id}
         
     except Exception as e:
         print(f"Chat error: {str(e)}")
+        chat_requests.inc(status="error")
         # Return a DJ-style error message
         error_response = f"Yo, I hit a technical snag there! 🎵 Let's try that again - {str(e)}"
-        return {"response": error_response}
+        return {"response": error_response, "trace_id": trace_id}
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,7 +4,9 @@ Core components including memory and schema definitions.
 The main graph and classifier are now in the agent package.
 """
 
-from .memory import memory
+from .memory import memory, BoundedCheckpointer, create_checkpointer
 from .schema import ChatState
+from .llm import get_llm, llm_metrics
+from .tracing import tracer, span
 
-__all__ = ['memory', 'ChatState']
+__all__ = ['memory', 'BoundedCheckpointer', 'create_checkpointer', 'ChatState', 'get_llm', 'llm_metrics', 'tracer', 'span']
@@ -0,0 +1,44 @@
+"""
+Per-request time budgets.
+
+/chat runs each turn inside deadline(CHAT_BUDGET_SECONDS). The deadline lives in
+a context variable, so it follows the request into graph nodes and tools, which
+size their own timeouts with remaining() (e.g. the Tavily tool downgrades to a
+basic search or skips the call when little time is left).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# time.monotonic() value the current request must finish by
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Run the block with a budget of seconds; an enclosing, earlier deadline still wins"""
+    if seconds is None:
+        yield
+        return
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget (never negative), or None without a deadline"""
+    current = _deadline.get()
+    return None if current is None else max(0.0, current - time.monotonic())
+
+
+def chat_budget() -> Optional[float]:
+    """Seconds a chat turn may take end to end: CHAT_BUDGET_SECONDS (default 45, blank = no budget)"""
+    budget = os.getenv("CHAT_BUDGET_SECONDS", "45")
+    return float(budget) if budget else None
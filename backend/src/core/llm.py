@@ -0,0 +1,227 @@
+"""
+Shared chat model clients for the music bot.
+
+Every LLM call goes through get_llm(purpose). Clients are created once per
+(model, temperature) and all of them share one pooled httpx client, so the
+conversational path and every agent reuse the same keep-alive connections to
+the OpenAI API instead of opening a new client per message or per agent.
+
+Purposes pick the model:
+- "tools": agents that reason over tool calls (LLM_TOOLS_MODEL, default gpt-4o)
+- "chat":  small talk answered without tools (LLM_CHAT_MODEL, default gpt-4o-mini)
+
+Every client reports latency and token usage per model to a shared
+LLMMetrics instance (see llm_metrics.report()).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .metrics import registry
+from .tracing import httpx_event_hooks
+
+# purpose -> (model env var, default model, temperature)
+LLM_PURPOSES = {
+    "tools": ("LLM_TOOLS_MODEL", "gpt-4o", 0.7),
+    "chat": ("LLM_CHAT_MODEL", "gpt-4o-mini", 0.7),
+}
+
+# Latency samples kept per model for percentiles
+LATENCY_SAMPLES = 500
+
+
+class LLMMetrics:
+    """Per-model call counts, errors, latency and token usage"""
+
+    def __init__(self, max_samples: int = LATENCY_SAMPLES):
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self._models: Dict[str, dict] = {}
+
+    def _stats(self, model: str) -> dict:
+        stats = self._models.get(model)
+        if stats is None:
+            stats = self._models[model] = {
+                "calls": 0,
+                "errors": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_seconds": 0.0,
+                "latencies": deque(maxlen=self._max_samples),
+            }
+        return stats
+
+    def record(self, model: str, seconds: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, error: bool = False):
+        with self._lock:
+            stats = self._stats(model)
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["total_seconds"] += seconds
+            stats["latencies"].append(seconds)
+
+    def report(self) -> Dict[str, dict]:
+        """Summary per model: calls, errors, tokens and latency percentiles in ms"""
+        with self._lock:
+            snapshot = {model: dict(stats, latencies=sorted(stats["latencies"]))
+                        for model, stats in self._models.items()}
+
+        report = {}
+        for model, stats in snapshot.items():
+            latencies = stats.pop("latencies")
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+            total_seconds = stats.pop("total_seconds")
+            report[model] = dict(
+                stats,
+                mean_ms=round(total_seconds / stats["calls"] * 1000, 1) if stats["calls"] else None,
+                p50_ms=percentile(0.5),
+                p95_ms=percentile(0.95),
+            )
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._models.clear()
+
+
+llm_metrics = LLMMetrics()
+
+
+def _collect_llm_metrics():
+    """Per-model LLM usage for the Prometheus /metrics endpoint"""
+    report = llm_metrics.report()
+    yield ("musicbot_llm_calls_total", "counter", "LLM calls per model",
+           [({"model": model}, stats["calls"]) for model, stats in report.items()])
+    yield ("musicbot_llm_errors_total", "counter", "Failed LLM calls per model",
+           [({"model": model}, stats["errors"]) for model, stats in report.items()])
+    yield ("musicbot_llm_tokens_total", "counter", "LLM tokens per model and direction",
+           [({"model": model, "type": kind}, stats[f"{kind}_tokens"])
+            for model, stats in report.items() for kind in ("prompt", "completion")])
+
+
+registry.register_collector(_collect_llm_metrics)
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Times every chat model run of one client and records its token usage"""
+
+    def __init__(self, model: str, metrics: LLMMetrics = llm_metrics):
+        self.model = model
+        self.metrics = metrics
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def _elapsed(self, run_id: UUID) -> float:
+        started = self._started.pop(run_id, None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            # Streaming responses only carry usage on the message
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+        self.metrics.record(self.model, self._elapsed(run_id), prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.metrics.record(self.model, self._elapsed(run_id), error=True)
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=30.0,
+    )
+
+
+_lock = threading.Lock()
+_llm_factory = None
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_clients: Dict[tuple, Any] = {}
+
+
+def _shared_http_clients():
+    global _http_client, _http_async_client
+    if _http_client is None:
+        timeout = httpx.Timeout(float(os.getenv("LLM_REQUEST_TIMEOUT", "60")), connect=5.0)
+        _http_client = httpx.Client(limits=_pool_limits(), timeout=timeout,
+                                    event_hooks=httpx_event_hooks())
+        _http_async_client = httpx.AsyncClient(limits=_pool_limits(), timeout=timeout,
+                                               event_hooks=httpx_event_hooks(asynchronous=True))
+    return _http_client, _http_async_client
+
+
+def model_for(purpose: str) -> str:
+    if purpose not in LLM_PURPOSES:
+        raise ValueError(f"Unknown LLM purpose '{purpose}' (expected one of {sorted(LLM_PURPOSES)})")
+    env_var, default_model, _ = LLM_PURPOSES[purpose]
+    return os.getenv(env_var, default_model)
+
+
+def set_llm_factory(factory):
+    """Serve get_llm(purpose) from factory(purpose) (e.g. a scripted model); None restores OpenAI"""
+    global _llm_factory
+    _llm_factory = factory
+
+
+def get_llm(purpose: str = "tools"):
+    """Shared chat model client for a purpose ("tools" or "chat")"""
+    from langchain_openai import ChatOpenAI
+
+    model = model_for(purpose)
+    if _llm_factory is not None:
+        return _llm_factory(purpose)
+    temperature = LLM_PURPOSES[purpose][2]
+    key = (model, temperature)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            http_client, http_async_client = _shared_http_clients()
+            client = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                callbacks=[LLMMetricsCallback(model)],
+            )
+            _clients[key] = client
+            print(f"[LLM] Created {model} client for '{purpose}'")
+    return client
+
+
+def reset_llm_clients():
+    """Drop cached clients (e.g. after changing the model env vars)"""
+    global _http_client, _http_async_client
+    with _lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        _http_async_client = None
@@ -1,3 +1,353 @@
+"""
+Conversation memory (LangGraph checkpointer) for the music bot.
+
+By default threads are kept in process RAM. Set CHECKPOINT_BACKEND=sqlite to
+persist them to a SQLite file instead, which survives restarts and can be
+shared by several uvicorn workers. Either way the saver is wrapped in a
+BoundedCheckpointer that evicts idle threads, caps the message history kept
+per thread and compacts superseded checkpoints.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 
-memory = InMemorySaver()
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # optional dependency: langgraph-checkpoint-sqlite
+    SqliteSaver = None
+
+
+def trim_messages_for_storage(messages: list, max_messages: int) -> list:
+    """Keep the DJ system prompt, remembered preferences and the last max_messages messages.
+
+    The kept window always starts at a user message so an assistant tool call is
+    never stored without the tool results that answer it.
+    """
+    if not max_messages or len(messages) <= max_messages:
+        return list(messages)
+
+    pinned = [
+        msg for msg in messages
+        if isinstance(msg, SystemMessage) and (
+            msg.content.startswith("You are DJ Spotify") or msg.content.startswith("[USER PREFERENCE")
+        )
+    ]
+    pinned_ids = {id(msg) for msg in pinned}
+    history = [msg for msg in messages if id(msg) not in pinned_ids]
+
+    start = max(0, len(history) - max_messages)
+    while start < len(history) and not isinstance(history[start], HumanMessage):
+        start += 1
+    if start == len(history):
+        # No user message inside the window - keep the most recent turn intact instead
+        human_positions = [i for i, msg in enumerate(history) if isinstance(msg, HumanMessage)]
+        start = human_positions[-1] if human_positions else 0
+
+    return pinned + history[start:]
+
+
+class BoundedCheckpointer(BaseCheckpointSaver):
+    """Checkpointer wrapper that keeps conversation memory bounded.
+
+    - ttl_seconds: threads idle for longer than this are deleted
+    - max_messages: message history stored per thread (system prompt and remembered
+      preferences are always kept)
+    - keep_checkpoints: number of root checkpoints kept per thread; older ones (and
+      finished subgraph checkpoints) are compacted away after every save
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver, ttl_seconds: Optional[float] = None,
+                 max_messages: Optional[int] = None, keep_checkpoints: Optional[int] = None,
+                 sweep_interval: float = 60.0):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.keep_checkpoints = keep_checkpoints
+        self.sweep_interval = sweep_interval
+        self._last_seen: Dict[str, float] = {}
+        self._last_sweep = 0.0
+        self._lock = threading.RLock()
+
+        if self._is_sqlite:
+            with self.saver.cursor() as cur:
+                cur.execute(
+                    "CREATE TABLE IF NOT EXISTS thread_activity ("
+                    "thread_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+                )
+
+    @property
+    def _is_sqlite(self) -> bool:
+        return SqliteSaver is not None and isinstance(self.saver, SqliteSaver)
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver interface
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config):
+        return self.saver.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        if self.max_messages and checkpoint_ns == "":
+            messages = checkpoint["channel_values"].get("messages")
+            if messages and len(messages) > self.max_messages:
+                checkpoint = {
+                    **checkpoint,
+                    "channel_values": {
+                        **checkpoint["channel_values"],
+                        "messages": trim_messages_for_storage(messages, self.max_messages),
+                    },
+                }
+
+        saved_config = self.saver.put(config, checkpoint, metadata, new_versions)
+
+        self._touch(thread_id)
+        if self.keep_checkpoints and checkpoint_ns == "":
+            self.compact_thread(thread_id)
+        self._maybe_sweep()
+        return saved_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.saver.delete_thread(thread_id)
+            self._last_seen.pop(thread_id, None)
+            if self._is_sqlite:
+                with self.saver.cursor() as cur:
+                    cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    # The graph may be driven with ainvoke (CLI). Both backends are synchronous, so the
+    # async variants simply call through, the same way InMemorySaver does.
+
+    async def aget_tuple(self, config):
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    # ------------------------------------------------------------------
+    # Eviction and compaction
+    # ------------------------------------------------------------------
+
+    def _touch(self, thread_id: str) -> None:
+        now = time.time()
+        self._last_seen[thread_id] = now
+        if self._is_sqlite:
+            with self.saver.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO thread_activity (thread_id, last_seen) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET last_seen = excluded.last_seen",
+                    (thread_id, now),
+                )
+
+    def _activity(self) -> Dict[str, float]:
+        """Last activity time per thread (shared across workers for SQLite)"""
+        if self._is_sqlite:
+            with self.saver.cursor(transaction=False) as cur:
+                cur.execute("SELECT thread_id, last_seen FROM thread_activity")
+                return {row[0]: row[1] for row in cur.fetchall()}
+        return dict(self._last_seen)
+
+    def _maybe_sweep(self) -> None:
+        if not self.ttl_seconds:
+            return
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        self.evict_idle_threads(now)
+
+    def evict_idle_threads(self, now: Optional[float] = None) -> List[str]:
+        """Delete threads that have been idle for longer than ttl_seconds"""
+        if not self.ttl_seconds:
+            return []
+        now = now if now is not None else time.time()
+        expired = [
+            thread_id for thread_id, last_seen in self._activity().items()
+            if now - last_seen > self.ttl_seconds
+        ]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        if expired:
+            print(f"[Memory] Evicted {len(expired)} idle thread(s)")
+        return expired
+
+    def compact_thread(self, thread_id: str) -> int:
+        """Drop all but the newest keep_checkpoints root checkpoints of a thread.
+
+        Checkpoint IDs are time-ordered, so anything older than the oldest kept root
+        checkpoint (including finished subgraph namespaces) is no longer needed.
+        Returns the number of checkpoints removed.
+        """
+        if not self.keep_checkpoints:
+            return 0
+        with self._lock:
+            if self._is_sqlite:
+                return self._compact_sqlite(thread_id)
+            if isinstance(self.saver, InMemorySaver):
+                return self._compact_in_memory(thread_id)
+        return 0
+
+    def _compact_in_memory(self, thread_id: str) -> int:
+        saver = self.saver
+        namespaces = saver.storage.get(thread_id)
+        if not namespaces or len(namespaces.get("", {})) <= self.keep_checkpoints:
+            return 0
+
+        cutoff = sorted(namespaces[""].keys(), reverse=True)[self.keep_checkpoints - 1]
+        removed = 0
+        for checkpoint_ns in list(namespaces.keys()):
+            checkpoints = namespaces[checkpoint_ns]
+            for checkpoint_id in [cid for cid in checkpoints if cid < cutoff]:
+                del checkpoints[checkpoint_id]
+                saver.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                removed += 1
+            if not checkpoints:
+                del namespaces[checkpoint_ns]
+
+        # Channel values are stored as versioned blobs - keep only the versions still referenced
+        referenced = set()
+        for checkpoint_ns, checkpoints in namespaces.items():
+            for serialized, _, _ in checkpoints.values():
+                versions = saver.serde.loads_typed(serialized)["channel_versions"]
+                referenced.update((checkpoint_ns, channel, version) for channel, version in versions.items())
+        for key in [k for k in saver.blobs if k[0] == thread_id]:
+            if (key[1], key[2], key[3]) not in referenced:
+                del saver.blobs[key]
+        return removed
+
+    def _compact_sqlite(self, thread_id: str) -> int:
+        with self.saver.cursor() as cur:
+            cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, self.keep_checkpoints - 1),
+            )
+            row = cur.fetchone()
+            if row is None:
+                return 0
+            cutoff = row[0]
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, cutoff)
+            )
+            removed = cur.rowcount
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, cutoff)
+            )
+        return removed
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def footprint_report(self) -> List[Dict[str, Any]]:
+        """Per-thread memory footprint: stored checkpoints, messages, bytes and idle time"""
+        now = time.time()
+        activity = self._activity()
+        sizes = self._sqlite_sizes() if self._is_sqlite else self._in_memory_sizes()
+
+        report = []
+        for thread_id, (checkpoints, size_bytes) in sizes.items():
+            latest = self.saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+            messages = latest.checkpoint["channel_values"].get("messages", []) if latest else []
+            last_seen = activity.get(thread_id)
+            report.append({
+                "thread_id": thread_id,
+                "checkpoints": checkpoints,
+                "messages": len(messages),
+                "bytes": size_bytes,
+                "idle_seconds": round(now - last_seen, 1) if last_seen else None,
+            })
+        report.sort(key=lambda item: item["bytes"], reverse=True)
+        return report
+
+    def _in_memory_sizes(self) -> Dict[str, tuple]:
+        saver = self.saver
+        sizes = {}
+        for thread_id, namespaces in saver.storage.items():
+            checkpoints = 0
+            size_bytes = 0
+            for checkpoint_map in namespaces.values():
+                for serialized, metadata, _ in checkpoint_map.values():
+                    checkpoints += 1
+                    size_bytes += len(serialized[1]) + len(metadata[1])
+            sizes[thread_id] = [checkpoints, size_bytes]
+        for (thread_id, *_), (_, payload) in saver.blobs.items():
+            if thread_id in sizes:
+                sizes[thread_id][1] += len(payload)
+        for (thread_id, *_), writes in saver.writes.items():
+            if thread_id in sizes:
+                sizes[thread_id][1] += sum(len(value[2][1]) for value in writes.values())
+        return {thread_id: tuple(value) for thread_id, value in sizes.items()}
+
+    def _sqlite_sizes(self) -> Dict[str, tuple]:
+        with self.saver.cursor(transaction=False) as cur:
+            cur.execute(
+                "SELECT thread_id, COUNT(*), SUM(LENGTH(checkpoint) + LENGTH(metadata)) "
+                "FROM checkpoints GROUP BY thread_id"
+            )
+            sizes = {row[0]: [row[1], row[2] or 0] for row in cur.fetchall()}
+            cur.execute("SELECT thread_id, SUM(LENGTH(value)) FROM writes GROUP BY thread_id")
+            for thread_id, write_bytes in cur.fetchall():
+                if thread_id in sizes:
+                    sizes[thread_id][1] += write_bytes or 0
+        return {thread_id: tuple(value) for thread_id, value in sizes.items()}
+
+
+def _env_number(name: str, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else None
+
+
+def create_checkpointer() -> BoundedCheckpointer:
+    """Build the checkpointer configured through CHECKPOINT_* environment variables"""
+    backend = os.getenv("CHECKPOINT_BACKEND", "memory").lower()
+
+    if backend == "sqlite" and SqliteSaver is None:
+        print("[Memory] CHECKPOINT_BACKEND=sqlite but langgraph-checkpoint-sqlite is not installed - using in-memory checkpoints")
+        backend = "memory"
+
+    if backend == "sqlite":
+        db_path = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite")
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        saver = SqliteSaver(conn)
+    else:
+        saver = InMemorySaver()
+
+    return BoundedCheckpointer(
+        saver,
+        ttl_seconds=_env_number("CHECKPOINT_TTL_SECONDS", float),
+        max_messages=_env_number("CHECKPOINT_MAX_MESSAGES"),
+        keep_checkpoints=_env_number("CHECKPOINT_KEEP_LAST") or 2,
+    )
+
+
+memory = create_checkpointer()
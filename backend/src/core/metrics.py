@@ -0,0 +1,272 @@
+"""
+Operational metrics in the Prometheus text format.
+
+A small in-process registry of counters, gauges and histograms. Updates are
+one lock and a dict lookup, so instrumenting the hot path costs a few
+microseconds; rendering happens only when /metrics is scraped. Collectors
+registered with registry.register_collector() add samples computed at scrape
+time (e.g. per-model LLM usage).
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers local searches (ms) through LLM turns (tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests by status"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. chats in flight or dataset size"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations (seconds) in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        lines = self._header()
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# A collector yields (name, kind, documentation, [(labels dict, value), ...])
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[dict, float]]]]]
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors, rendered as Prometheus text"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                for name, kind, documentation, samples in collector():
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in samples:
+                        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} "
+                                     f"{_format_value(value)}")
+            except Exception as e:
+                print(f"[Metrics] Collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Zero every metric (tests)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+# Chat handler
+chat_requests = registry.counter("musicbot_chat_requests_total", "Chat requests by outcome", ["status"])
+chat_latency = registry.histogram("musicbot_chat_request_seconds", "End-to-end /chat latency")
+chats_in_flight = registry.gauge("musicbot_chats_in_flight", "Chat requests currently being handled")
+
+# Spotify Web API (every response, including the ones spotipy retried)
+spotify_requests = registry.counter("musicbot_spotify_requests_total", "Spotify Web API responses by status",
+                                    ["status"])
+spotify_rate_limited = registry.counter("musicbot_spotify_rate_limited_total",
+                                        "Spotify 429 responses, including retried ones")
+spotify_latency = registry.histogram("musicbot_spotify_request_seconds", "Spotify Web API response time")
+spotify_searches_avoided = registry.counter("musicbot_spotify_searches_avoided_total",
+                                            "Track lookups answered without a Spotify search, by source "
+                                            "(catalogue id map or search cache)", ["source"])
+
+# Tavily web search
+tavily_requests = registry.counter("musicbot_tavily_requests_total", "Tavily searches by outcome", ["status"])
+tavily_latency = registry.histogram("musicbot_tavily_request_seconds", "Tavily search latency")
+tavily_hedges = registry.counter("musicbot_tavily_hedged_total",
+                                 "Slow Tavily searches that fired a hedge request, by the response used", ["winner"])
+tavily_downgrades = registry.counter("musicbot_tavily_downgraded_total",
+                                     "Tavily searches run at basic depth or skipped to fit the request budget",
+                                     ["action"])
+knowledge_lookups = registry.counter("musicbot_knowledge_lookups_total",
+                                     "Web agent questions answered locally, by source (catalogue, web_answer) or miss",
+                                     ["source"])
+
+# Vibe search (MusicDatabaseSearcher)
+searcher_load_seconds = registry.gauge("musicbot_searcher_load_seconds",
+                                       "Time to load the dataset and build embeddings")
+searcher_tracks = registry.gauge("musicbot_searcher_tracks", "Tracks indexed by the vibe searcher")
+search_latency = registry.histogram("musicbot_search_seconds", "Vibe search latency by query path", ["path"])
+
+# Result caches (src/utils/cache.py)
+cache_requests = registry.counter("musicbot_cache_requests_total", "Cache lookups by cache and result",
+                                  ["cache", "result"])
+cache_entries = registry.gauge("musicbot_cache_entries", "Entries held per cache", ["cache"])
+cache_saved_seconds = registry.counter("musicbot_cache_saved_seconds_total",
+                                       "Upstream latency avoided by cache hits", ["cache"])
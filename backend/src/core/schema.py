@@ -8,3 +8,5 @@ from langchain_core.messages import BaseMessage
 
 class ChatState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    # Incremental routing summary (see agent/conversation_context.py)
+    conversation_context: dict
@@ -0,0 +1,356 @@
+"""
+Structured tracing for the music bot.
+
+A trace covers one /chat request. Every span records its trace id, parent,
+kind and duration:
+
+- "request": the /chat call itself (trace ids come from the X-Trace-Id header
+  or are generated)
+- "node":    each graph node run (router, spotify_router, every agent)
+- "llm":     each chat model call, with model name and tokens in/out
+- "tool":    each tool call, with the size of its output
+- "http":    each outbound request (OpenAI via httpx hooks, Spotify and
+  Tavily via requests hooks)
+
+Finished spans are aggregated per (kind, name) for tracer.summary() and, when
+TRACE_EXPORT_PATH is set, appended to that file as JSON lines.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Latency samples kept per span name for percentiles
+SPAN_SAMPLES = 500
+# Recent traces listed in the summary
+RECENT_TRACES = 50
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+_span_id: ContextVar[Optional[str]] = ContextVar("span_id", default=None)
+
+
+def tracing_enabled() -> bool:
+    return os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def current_span_id() -> Optional[str]:
+    return _span_id.get()
+
+
+class JSONLExporter:
+    """Appends finished spans to a local JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: dict):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class Tracer:
+    """Collects finished spans: per-name latency stats, recent traces and export"""
+
+    def __init__(self, exporter: Optional[JSONLExporter] = None,
+                 max_samples: int = SPAN_SAMPLES, max_traces: int = RECENT_TRACES):
+        self.exporter = exporter
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self._max_traces = max_traces
+        self._stats: Dict[tuple, dict] = {}
+        self._traces: "OrderedDict[str, dict]" = OrderedDict()
+
+    def start(self, name: str, kind: str, trace_id: Optional[str] = None,
+              parent_id: Optional[str] = None, **attributes) -> dict:
+        return {
+            "trace_id": trace_id or current_trace_id() or new_id(),
+            "span_id": new_id(),
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "start": time.time(),
+            "duration_ms": None,
+            "status": "ok",
+            "attributes": attributes,
+            "_perf": time.perf_counter(),
+        }
+
+    def finish(self, record: dict, error: Optional[BaseException] = None):
+        record["duration_ms"] = round((time.perf_counter() - record.pop("_perf")) * 1000, 3)
+        if error is not None:
+            record["status"] = "error"
+            record["error"] = f"{type(error).__name__}: {error}"
+        self.record(record)
+
+    def record(self, record: dict):
+        key = (record["kind"], record["name"])
+        seconds = record["duration_ms"] / 1000
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {"count": 0, "errors": 0, "total_seconds": 0.0,
+                                            "latencies": deque(maxlen=self._max_samples)}
+            stats["count"] += 1
+            stats["errors"] += int(record["status"] == "error")
+            stats["total_seconds"] += seconds
+            stats["latencies"].append(seconds)
+
+            trace = self._traces.get(record["trace_id"])
+            if trace is None:
+                trace = self._traces[record["trace_id"]] = {"trace_id": record["trace_id"], "spans": 0,
+                                                            "errors": 0, "started": record["start"]}
+                while len(self._traces) > self._max_traces:
+                    self._traces.popitem(last=False)
+            trace["spans"] += 1
+            trace["errors"] += int(record["status"] == "error")
+            trace["started"] = min(trace["started"], record["start"])
+            if record["kind"] == "request":
+                trace["name"] = record["name"]
+                trace["duration_ms"] = record["duration_ms"]
+
+        if self.exporter is not None:
+            try:
+                self.exporter.export(record)
+            except OSError as e:
+                print(f"[Tracing] Export failed: {e}")
+
+    def summary(self) -> dict:
+        """Latency stats per span kind and name, plus the most recent traces"""
+        with self._lock:
+            snapshot = {key: dict(stats, latencies=sorted(stats["latencies"]))
+                        for key, stats in self._stats.items()}
+            traces = [dict(trace) for trace in reversed(self._traces.values())]
+
+        spans: Dict[str, dict] = {}
+        for (kind, name), stats in sorted(snapshot.items()):
+            latencies = stats["latencies"]
+
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+            spans.setdefault(kind, {})[name] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "mean_ms": round(stats["total_seconds"] / stats["count"] * 1000, 3),
+                "p50_ms": percentile(0.5),
+                "p95_ms": percentile(0.95),
+            }
+        return {"spans": spans, "recent_traces": traces}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._traces.clear()
+
+
+def _default_exporter() -> Optional[JSONLExporter]:
+    path = os.getenv("TRACE_EXPORT_PATH")
+    return JSONLExporter(path) if path else None
+
+
+tracer = Tracer(exporter=_default_exporter())
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", trace_id: Optional[str] = None, **attributes):
+    """Time a block as a span; nested spans and outbound requests become its children"""
+    if not tracing_enabled():
+        yield None
+        return
+    record = tracer.start(name, kind, trace_id=trace_id, parent_id=current_span_id(), **attributes)
+    trace_token = _trace_id.set(record["trace_id"])
+    span_token = _span_id.set(record["span_id"])
+    try:
+        yield record
+    except BaseException as e:
+        tracer.finish(record, error=e)
+        raise
+    else:
+        tracer.finish(record)
+    finally:
+        _span_id.reset(span_token)
+        _trace_id.reset(trace_token)
+
+
+def record_http(method: str, url: str, status: Optional[int], seconds: float):
+    """Record a finished outbound HTTP request under the current span"""
+    if not tracing_enabled():
+        return
+    parts = urlsplit(str(url))
+    record = tracer.start(f"{method} {parts.netloc}", "http", parent_id=current_span_id(),
+                          method=method, host=parts.netloc, path=parts.path, status_code=status)
+    record.pop("_perf")
+    record["duration_ms"] = round(seconds * 1000, 3)
+    if status is None or status >= 400:
+        record["status"] = "error"
+    tracer.record(record)
+
+
+def _httpx_request(request):
+    request.extensions["trace_start"] = time.perf_counter()
+
+
+def _httpx_response(response):
+    start = response.request.extensions.get("trace_start")
+    if start is not None:
+        record_http(response.request.method, response.request.url, response.status_code,
+                    time.perf_counter() - start)
+
+
+async def _httpx_request_async(request):
+    _httpx_request(request)
+
+
+async def _httpx_response_async(response):
+    _httpx_response(response)
+
+
+def httpx_event_hooks(asynchronous: bool = False) -> dict:
+    """event_hooks for an httpx client that trace every request it sends"""
+    if asynchronous:
+        return {"request": [_httpx_request_async], "response": [_httpx_response_async]}
+    return {"request": [_httpx_request], "response": [_httpx_response]}
+
+
+def _requests_response(response, *args, **kwargs):
+    record_http(response.request.method, response.url, response.status_code, response.elapsed.total_seconds())
+
+
+def requests_hooks() -> dict:
+    """hooks= for a requests call (or Session.hooks) that trace the response"""
+    return {"response": [_requests_response]}
+
+
+def traced_session(session=None):
+    """requests.Session whose responses are traced"""
+    import requests
+
+    session = session or requests.Session()
+    session.hooks["response"].append(_requests_response)
+    return session
+
+
+class TracingCallback(BaseCallbackHandler):
+    """Spans for graph nodes, chat model calls and tool calls"""
+
+    def __init__(self, tracer: Tracer = tracer):
+        self.tracer = tracer
+        self._lock = threading.Lock()
+        self._spans: Dict[UUID, dict] = {}
+        # run id -> (trace id, id of the nearest enclosing span)
+        self._context: Dict[UUID, tuple] = {}
+        self._open_tasks = set()
+
+    def _parent(self, parent_run_id: Optional[UUID], metadata: Optional[dict]) -> tuple:
+        with self._lock:
+            context = self._context.get(parent_run_id)
+        if context is not None:
+            return context
+        return (metadata or {}).get("trace_id") or current_trace_id(), current_span_id()
+
+    def _start(self, run_id: UUID, parent_run_id, metadata, name: str, kind: str, **attributes):
+        trace_id, parent_id = self._parent(parent_run_id, metadata)
+        record = self.tracer.start(name, kind, trace_id=trace_id, parent_id=parent_id, **attributes)
+        with self._lock:
+            self._spans[run_id] = record
+            self._context[run_id] = (record["trace_id"], record["span_id"])
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes):
+        with self._lock:
+            record = self._spans.pop(run_id, None)
+            self._context.pop(run_id, None)
+            if record is not None:
+                self._open_tasks.discard(record["attributes"].get("task"))
+        if record is not None:
+            record["attributes"].update(attributes)
+            self.tracer.finish(record, error=error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                       metadata=None, name=None, **kwargs: Any):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        task = metadata.get("langgraph_checkpoint_ns")
+        with self._lock:
+            # Only the outermost run of a node task gets a span
+            is_node = node and node != "__start__" and name == node and task not in self._open_tasks
+            if is_node:
+                self._open_tasks.add(task)
+        if is_node:
+            self._start(run_id, parent_run_id, metadata, node, "node", task=task)
+        else:
+            context = self._parent(parent_run_id, metadata)
+            with self._lock:
+                self._context[run_id] = context
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                            metadata=None, **kwargs: Any):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "chat_model"
+        self._start(run_id, parent_run_id, metadata, model, "llm", messages=sum(len(m) for m in messages))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+        self._end(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                      metadata=None, name=None, **kwargs: Any):
+        tool_name = name or (serialized or {}).get("name") or "tool"
+        self._start(run_id, parent_run_id, metadata, tool_name, "tool")
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        content = getattr(output, "content", output)
+        self._end(run_id, output_chars=len(str(content)))
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=error)
+
+
+tracing_callback = TracingCallback()
+
+
+def traced_config(config: dict, trace_id: str) -> dict:
+    """Graph config that reports node, LLM and tool spans under trace_id"""
+    if not tracing_enabled():
+        return config
+    return dict(
+        config,
+        callbacks=list(config.get("callbacks") or []) + [tracing_callback],
+        metadata=dict(config.get("metadata") or {}, trace_id=trace_id),
+    )
@@ -4,11 +4,11 @@ Collection of tools for Spotify integration, vector search, and web search.
 """
 
 from .spotify import *
-from .database_search_tool import search_music_by_vibe
+from .database_search_tool import search_music_by_vibe, search_music_by_vibe_batch, find_similar_artists
 from .tavily_tool import search_music_info
 
 __all__ = [
     'get_top_tracks', 'get_top_artists', 'get_playlist_names', 
     'get_recently_played', 'search_tracks', 'get_saved_tracks',
-    'search_music_by_vibe', 'search_music_info'
+    'search_music_by_vibe', 'search_music_by_vibe_batch', 'find_similar_artists', 'search_music_info'
 ]
@@ -0,0 +1,173 @@
+"""
+Per-artist aggregates over the track catalogue, built with the vibe searcher.
+
+ArtistTable holds, for every credited artist: track count, mean popularity,
+mean audio-feature vector, genre distribution and tracks ordered by popularity.
+Artists are compared by a unit vector combining their standardized feature
+means and their genre shares, so "artists like X" is one matrix-vector product
+over the table instead of Spotify's related-artists and top-tracks calls.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .track_store import TrackStore
+
+# Multi-artist tracks list their artists separated by ";"
+ARTIST_SEPARATOR = ";"
+
+# Audio features averaged per artist and compared for similarity
+ARTIST_FEATURES = ("danceability", "energy", "valence", "acousticness", "instrumentalness",
+                   "speechiness", "liveness", "loudness", "tempo")
+
+# Weight of genre overlap relative to the audio-feature profile in artist similarity
+ARTIST_GENRE_WEIGHT = float(os.getenv("ARTIST_GENRE_WEIGHT", "1.0"))
+
+_LEADING_THE = re.compile(r"^the\s+")
+
+
+class ArtistTable:
+    """Artist aggregates and similarity vectors, addressed by artist id"""
+
+    def __init__(self, tracks: TrackStore, genre_weight: float = None):
+        self.tracks = tracks
+        codes, distinct = pd.factorize(pd.Series(tracks.artists, dtype=object))
+
+        # Split each distinct artists string once, then expand to (row, artist) pairs
+        self.names: List[str] = []
+        self._index: Dict[str, int] = {}
+        members, lengths = [], np.zeros(len(distinct), dtype=np.int64)
+        for i, value in enumerate(distinct):
+            names = [name.strip() for name in value.split(ARTIST_SEPARATOR) if name.strip()]
+            for name in names:
+                key = name.lower()
+                if key not in self._index:
+                    self._index[key] = len(self.names)
+                    self.names.append(name)
+                members.append(self._index[key])
+            lengths[i] = len(names)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        row_lengths = lengths[codes]
+        rows = np.repeat(np.arange(len(tracks)), row_lengths)
+        within = np.arange(len(rows)) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+        artists = np.asarray(members, dtype=np.int32)[np.repeat(offsets[codes], row_lengths) + within]
+
+        n = len(self.names)
+        popularity = tracks.columns["popularity"].astype(np.float32) if "popularity" in tracks.columns else \
+            np.zeros(len(tracks), dtype=np.float32)
+        self.track_counts = np.bincount(artists, minlength=n)
+        counts = np.maximum(self.track_counts, 1)
+        self.mean_popularity = (np.bincount(artists, weights=popularity[rows], minlength=n) / counts).astype(np.float32)
+
+        self.features = [feature for feature in ARTIST_FEATURES if feature in tracks.columns]
+        self.feature_means = np.empty((n, len(self.features)), dtype=np.float32)
+        for column, feature in enumerate(self.features):
+            values = tracks.columns[feature].astype(np.float64)[rows]
+            self.feature_means[:, column] = np.bincount(artists, weights=values, minlength=n) / counts
+
+        # Genre shares per artist (rows sum to 1)
+        genre_pairs = artists.astype(np.int64) * len(tracks.genres) + tracks.genre_codes[rows]
+        self.genre_shares = (np.bincount(genre_pairs, minlength=n * len(tracks.genres))
+                             .reshape(n, len(tracks.genres)) / counts[:, None]).astype(np.float32)
+
+        # Pairs sorted by artist, most popular track first
+        order = np.lexsort((-popularity[rows], artists))
+        self._pair_rows = rows[order].astype(np.int32)
+        self._pair_artists = artists[order]
+
+        self.vectors = self._similarity_vectors(ARTIST_GENRE_WEIGHT if genre_weight is None else genre_weight)
+
+    def _similarity_vectors(self, genre_weight: float) -> np.ndarray:
+        """Unit rows of [standardized feature means, genre_weight * unit genre shares]"""
+        means = self.feature_means
+        spread = means.std(axis=0)
+        profile = (means - means.mean(axis=0)) / np.where(spread == 0, 1, spread)
+        profile /= np.sqrt(max(len(self.features), 1))
+        genres = self.genre_shares / np.maximum(np.linalg.norm(self.genre_shares, axis=1, keepdims=True), 1e-12)
+        vectors = np.hstack([profile, genre_weight * genres]).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def artist_id(self, name: str) -> Optional[int]:
+        """Case- and whitespace-insensitive lookup; a leading "The" is optional"""
+        key = " ".join(name.lower().split())
+        found = self._index.get(key)
+        if found is None:
+            found = self._index.get(_LEADING_THE.sub("", key), self._index.get(f"the {key}"))
+        return found
+
+    def rows(self, artist: int) -> np.ndarray:
+        """Track positions credited to the artist, most popular first"""
+        start, end = np.searchsorted(self._pair_artists, [artist, artist + 1])
+        return self._pair_rows[start:end]
+
+    def profile(self, artist: int, top_tracks: int = 3) -> Dict:
+        """One artist's aggregates"""
+        rows = self.rows(artist)
+        shares = self.genre_shares[artist]
+        genres = [(self.tracks.genres[code], int(round(shares[code] * self.track_counts[artist])))
+                  for code in np.argsort(-shares, kind="stable") if shares[code] > 0 and self.tracks.genres[code]]
+        names = list(dict.fromkeys(self.tracks.names[row] for row in rows))
+        return {
+            "artist": self.names[artist],
+            "tracks": int(self.track_counts[artist]),
+            "genres": genres,
+            "popularity": round(float(self.mean_popularity[artist]), 1),
+            "top_tracks": names[:top_tracks],
+            "audio_features": {feature: round(float(value), 3)
+                               for feature, value in zip(self.features, self.feature_means[artist])},
+        }
+
+    def artist(self, name: str, top_tracks: int = 3) -> Optional[Dict]:
+        """Aggregates for an artist by name, or None when they have no tracks"""
+        artist = self.artist_id(name)
+        return None if artist is None else self.profile(artist, top_tracks)
+
+    def similar(self, name: str, top_k: int = 10, min_tracks: int = 1) -> Optional[List[Dict]]:
+        """The top_k artists closest to name (most similar first), or None for an unknown artist"""
+        artist = self.artist_id(name)
+        if artist is None:
+            return None
+        scores = self.vectors @ self.vectors[artist]
+        scores[artist] = -np.inf
+        if min_tracks > 1:
+            scores[self.track_counts < min_tracks] = -np.inf
+        top_k = min(top_k, int(np.isfinite(scores).sum()))
+        if top_k <= 0:
+            return []
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [dict(self.profile(int(other), top_tracks=3), similarity=round(float(scores[other]), 3))
+                for other in ranked]
+
+    def genre(self, name: str, top_artists: int = 5) -> Optional[Dict]:
+        """Catalogue facts about one genre, or None when it is unknown"""
+        mask = self.tracks.genre_mask(name)
+        count = int(mask.sum())
+        if not count:
+            return None
+        per_artist = np.bincount(self._pair_artists[mask[self._pair_rows]], minlength=len(self))
+        leaders = np.argsort(-per_artist, kind="stable")[:top_artists]
+        features = {feature: round(float(self.tracks.columns[feature][mask].mean()), 2)
+                    for feature in ("energy", "danceability", "valence", "acousticness", "tempo")
+                    if feature in self.tracks.columns}
+        return {
+            "genre": self.tracks.genres[self.tracks.genre_codes[np.argmax(mask)]],
+            "tracks": count,
+            "popularity": round(float(self.tracks.columns["popularity"][mask].mean()), 1)
+            if "popularity" in self.tracks.columns else None,
+            "top_artists": [self.names[a] for a in leaders if per_artist[a]],
+            "features": features,
+        }
+
+    def memory_bytes(self) -> int:
+        return (self.track_counts.nbytes + self.mean_popularity.nbytes + self.feature_means.nbytes
+                + self.genre_shares.nbytes + self.vectors.nbytes + self._pair_rows.nbytes
+                + self._pair_artists.nbytes)
@@ -1,29 +1,107 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from gensim.models import Word2Vec
 from langchain_core.tools import tool
 import os
 import re
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
 import json
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 
+from ..core.metrics import searcher_load_seconds, searcher_tracks, search_latency
+from ..utils.cache import LRUCache, normalize_query
+from .artist_table import ArtistTable
+from .lexical_index import LexicalIndex, tokenize
+from .track_store import TrackStore
+
 # Load environment variables for Spotify
 load_dotenv()
 
+# Batch search scores at most BATCH_QUERY_ROWS x BATCH_BLOCK_ROWS similarities at a time
+BATCH_QUERY_ROWS = 256
+BATCH_BLOCK_ROWS = 16384
+
+# Hybrid retrieval: fuse BM25 matches on titles/artists/albums/genres with the embedding ranking.
+# "linear" blends the scores (SEARCH_LEXICAL_WEIGHT), "rrf" uses reciprocal rank fusion
+# (SEARCH_RRF_K), "vector" ranks by embeddings alone
+SEARCH_FUSION = os.getenv('SEARCH_FUSION', 'linear').lower()
+LEXICAL_WEIGHT = float(os.getenv('SEARCH_LEXICAL_WEIGHT', '0.5'))
+RRF_K = int(os.getenv('SEARCH_RRF_K', '60'))
+# Rows each ranking contributes to fusion; queries matching at most this many rows lexically
+# only score those rows' vectors
+LEXICAL_CANDIDATES = int(os.getenv('SEARCH_LEXICAL_CANDIDATES', '1000'))
+
+# Diversified searches (diversify=True) re-rank the best top_k * SEARCH_MMR_POOL candidates with
+# maximal marginal relevance (SEARCH_MMR_LAMBDA: 1 = relevance only, 0 = novelty only), keeping at
+# most SEARCH_MAX_PER_ARTIST tracks per lead artist and one version of each title
+MMR_POOL = int(os.getenv('SEARCH_MMR_POOL', '5'))
+MMR_LAMBDA = float(os.getenv('SEARCH_MMR_LAMBDA', '0.7'))
+MAX_PER_ARTIST = int(os.getenv('SEARCH_MAX_PER_ARTIST', '2'))
+
+# Query-text -> embedding cache per searcher (0 = off)
+QUERY_VECTOR_CACHE_SIZE = int(os.getenv('QUERY_VECTOR_CACHE_SIZE', '1024'))
+
+# Query parsing patterns, compiled once
+_PUNCTUATION = re.compile(r'[^\w\s]')
+# "similar to [song]" phrasings whose reference is looked up in the catalogue for the query vector
+SIMILAR_PATTERNS = [re.compile(p) for p in (
+    r'similar to (.+)',
+    r'like (.+)',
+    r'songs like (.+)',
+    r'music like (.+)',
+    r'tracks like (.+)',
+)]
+# Phrasings that name a specific song, for the "not in the catalogue" check
+SONG_REFERENCE_PATTERNS = SIMILAR_PATTERNS + [re.compile(r'sounds like (.+)'), re.compile(r'reminds me of (.+)')]
+SONG_BY_ARTIST = re.compile(r'(.+?)\s+by\s+(.+)')
+
+# Single searches score the full matrix when more than this share of rows pass the filters
+DENSE_CANDIDATE_FRACTION = 0.25
+
 class MusicDatabaseSearcher:
-    def __init__(self, csv_path: str = None):
+    def __init__(self, csv_path: str = None, spotify_fallback: bool = None, fusion: str = None):
         self.csv_path = csv_path or os.path.join(os.path.dirname(__file__), '../../data/dataset.csv')
+        # Search Spotify for reference songs missing from the dataset (disable for offline use)
+        if spotify_fallback is None:
+            spotify_fallback = os.getenv('DATABASE_SPOTIFY_FALLBACK', 'true').lower() in ('1', 'true', 'yes')
+        self.spotify_fallback = spotify_fallback
+        self.fusion = (fusion or SEARCH_FUSION).lower()
         self.song_data = None
         self.word2vec_model = None
-        self.embedded_song_df = None
         self.embedding_dim = 15 
+        self.numeric_cols = []
+        # Built while loading; song_data is released once the TrackStore exists
+        self.tracks: Optional[TrackStore] = None
+        self.embeddings: Optional[np.ndarray] = None
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.artist_table: Optional[ArtistTable] = None
+        self._neutral_numeric: Optional[np.ndarray] = None
+        self._query_vectors = LRUCache(QUERY_VECTOR_CACHE_SIZE, name='query_vector')
+        self._genre_masks = {}
+        self.dataset_version = self.artifact_version()
+        start = time.perf_counter()
         self.load_and_preprocess_data()
+        self._build_store()
+        searcher_load_seconds.set(time.perf_counter() - start)
+        searcher_tracks.set(len(self.tracks) if self.tracks is not None else 0)
     
     
+    def artifact_version(self):
+        """Identity of the catalogue file on disk (path, size, mtime); None if missing"""
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return None
+        return (os.path.abspath(self.csv_path), stat.st_size, stat.st_mtime_ns)
+
+    def is_stale(self) -> bool:
+        """True when the catalogue file was replaced or modified since it was loaded"""
+        current = self.artifact_version()
+        return current is not None and current != self.dataset_version
+
     def load_and_preprocess_data(self):
         """Load and preprocess the music dataset following the database.py approach"""
         try:
@@ -79,13 +157,35 @@ class MusicDatabaseSearcher:
             print(f"Error loading and preprocessing dataset: {e}")
             self.song_data = None
     
+    def _build_store(self):
+        """Keep metadata in a TrackStore (plus the BM25 index and artist table) and release the pandas frame"""
+        if self.song_data is not None and self.embeddings is not None:
+            self.tracks = TrackStore.from_frame(self.song_data)
+            self.artist_table = ArtistTable(self.tracks)
+            if self.fusion in ('linear', 'rrf'):
+                self.lexical_index = LexicalIndex.from_store(self.tracks)
+        self.song_data = None
+
+    def memory_report(self) -> Dict[str, int]:
+        """Approximate bytes held by the track store and the embedding matrix"""
+        if self.tracks is None:
+            return {}
+        report = {f"tracks_{field}": size for field, size in self.tracks.memory_bytes().items() if field != "total"}
+        report["embeddings"] = self.embeddings.nbytes
+        if self.lexical_index is not None:
+            report["lexical_index"] = self.lexical_index.memory_bytes()
+        if self.artist_table is not None:
+            report["artist_table"] = self.artist_table.memory_bytes()
+        report["total"] = sum(report.values())
+        return report
+
     def tokenize_text(self, text):
         """Simple tokenization function"""
         # Handle NaN values
         if pd.isna(text):
             return []
         # Convert to lowercase and split by spaces, removing punctuation
-        cleaned_text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+        cleaned_text = _PUNCTUATION.sub(' ', str(text).lower())
         return [word for word in cleaned_text.split() if word.strip()]
     
     def create_embeddings(self):
@@ -109,95 +209,92 @@ class MusicDatabaseSearcher:
         
         print(f"Trained Word2Vec model with vocabulary size: {len(self.word2vec_model.wv.key_to_index)}")
         
-        # Create categorical embeddings using the get_embedding function
-        def get_embedding(song_desc_tokens, model, embedding_dim):
-            vectors = [model.wv[token] for token in song_desc_tokens if token in model.wv]
-            return sum(vectors) / len(vectors) if vectors else np.zeros(embedding_dim)
-        
-        categorical_embeddings = [
-            get_embedding(song_desc_tokens, self.word2vec_model, self.embedding_dim) 
-            for song_desc_tokens in tokenized_song_descs
-        ]
+        # Mean word vector per description: one gather over every token, summed per row with reduceat
+        key_to_index = self.word2vec_model.wv.key_to_index
+        token_rows = [[key_to_index[token] for token in tokens if token in key_to_index]
+                      for tokens in tokenized_song_descs]
+        counts = np.fromiter(map(len, token_rows), dtype=np.int64, count=len(token_rows))
+        categorical_embeddings = np.zeros((len(token_rows), self.embedding_dim), dtype=np.float32)
+        has_tokens = counts > 0
+        if has_tokens.any():
+            flat = np.fromiter((i for row in token_rows for i in row), dtype=np.int64, count=int(counts.sum()))
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.add.reduceat(self.word2vec_model.wv.vectors[flat], starts[has_tokens])
+            categorical_embeddings[has_tokens] = sums / counts[has_tokens, None]
         
         # Get numeric columns (excluding name, artists, description, and metadata columns)
         exclude_cols = ["song_name", "song_artists", "song_description", "song_album_name", "song_genre", "song_explicit", "song_id"]
         numeric_cols = [col for col in self.song_data.columns if col not in exclude_cols and self.song_data[col].dtype in ['int64', 'float64']]
         
         print(f"Using numeric columns: {numeric_cols}")
+        self.numeric_cols = numeric_cols
+        # Query vectors carry neutral numeric features (already scaled, so 0 is neutral)
+        self._neutral_numeric = np.zeros(len(numeric_cols))
         
         # Fill NaN values in numeric columns with column means before scaling
         for col in numeric_cols:
             self.song_data[col] = pd.to_numeric(self.song_data[col], errors='coerce')  # Convert to numeric, set invalid to NaN
             self.song_data[col] = self.song_data[col].fillna(self.song_data[col].mean())
         
-        # Scale numeric columns
-        scaled_numeric_cols = [
-            (self.song_data[col] - self.song_data[col].mean()) / np.std(self.song_data[col])
-            for col in numeric_cols
-        ]
-        numeric_embeddings = list(map(list, zip(*scaled_numeric_cols)))
-        
-        # Merge the embeddings
-        row_embeddings = [
-            np.concatenate([cat_row, num_row])
-            for cat_row, num_row in zip(categorical_embeddings, numeric_embeddings)
-        ]
+        # Scale numeric columns (population std, as before) in one array operation
+        numeric = self.song_data[numeric_cols].to_numpy(dtype=np.float64)
+        std = numeric.std(axis=0)
+        numeric_embeddings = (numeric - numeric.mean(axis=0)) / np.where(std == 0, 1, std)
         
-        # Create dataframe with embeddings
-        self.embedded_song_df = self.song_data[["song_name", "song_artists"]].copy()
-        self.embedded_song_df["song_embedding"] = row_embeddings
+        # Merge the embeddings into one float32 matrix, normalized so cosine similarity is a dot product
+        matrix = np.hstack([categorical_embeddings, numeric_embeddings.astype(np.float32)])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.embeddings = matrix / np.where(norms == 0, 1, norms)
         
-        print(f"Created embeddings with shape: {np.array(row_embeddings).shape}")
+        print(f"Created embeddings with shape: {self.embeddings.shape}")
     
     def find_similar_to_song(self, song_name: str, artist_name: str = None) -> np.ndarray:
         """Find a specific song in the dataset and return its embedding"""
-        if self.embedded_song_df is None:
+        if self.tracks is None:
             return None
         
         # Create search patterns
         song_lower = song_name.lower().strip()
         artist_lower = artist_name.lower().strip() if artist_name else None
         
-        # Try to find exact matches
-        song_titles = self.embedded_song_df['song_name'].str.lower()
-        song_artists = self.embedded_song_df['song_artists'].str.lower()
-        
-        matches = []
-        
         # Find exact song title matches
-        song_mask = song_titles.str.contains(song_lower, na=False, regex=False)
+        song_mask = self.tracks.contains('name', song_lower)
         if artist_lower:
-            artist_mask = song_artists.str.contains(artist_lower, na=False, regex=False)
-            exact_matches = song_mask & artist_mask
+            exact_matches = song_mask & self.tracks.contains('artists', artist_lower)
             if exact_matches.any():
-                idx = exact_matches.idxmax()  # Get first match
-                return self.embedded_song_df.iloc[idx]['song_embedding'].reshape(1, -1)
+                idx = int(exact_matches.argmax())  # Get first match
+                return self.embeddings[idx].reshape(1, -1)
         
         # If no exact match with artist, try song title only
         if song_mask.any():
-            idx = song_mask.idxmax()
-            return self.embedded_song_df.iloc[idx]['song_embedding'].reshape(1, -1)
+            idx = int(song_mask.argmax())
+            return self.embeddings[idx].reshape(1, -1)
         
         return None
 
     def text_to_database_vector(self, query: str) -> np.ndarray:
-        """Convert query text to database vector representation using the trained Word2Vec model"""
+        """Convert query text to database vector representation using the trained Word2Vec model.
+
+        Vectors are cached per lowercased query text and returned read-only.
+        """
+        key = query.lower()
+        vector = self._query_vectors.get(key)
+        if vector is None:
+            vector = self._text_to_database_vector(key)
+            vector.flags.writeable = False
+            self._query_vectors.put(key, vector)
+        return vector
+
+    def _text_to_database_vector(self, query: str) -> np.ndarray:
+        """Uncached text_to_database_vector for an already lowercased query"""
         # First, check if this is a "similar to [song]" type query
-        similar_patterns = [
-            r'similar to (.+)',
-            r'like (.+)',
-            r'songs like (.+)',
-            r'music like (.+)',
-            r'tracks like (.+)'
-        ]
-        
-        for pattern in similar_patterns:
-            match = re.search(pattern, query.lower())
+        for pattern in SIMILAR_PATTERNS:
+            match = pattern.search(query)
             if match:
                 song_reference = match.group(1).strip()
                 
                 # Try to parse "song by artist" format
-                by_match = re.search(r'(.+?)\s+by\s+(.+)', song_reference)
+                by_match = SONG_BY_ARTIST.search(song_reference)
                 if by_match:
                     song_name = by_match.group(1).strip()
                     artist_name = by_match.group(2).strip()
@@ -215,73 +312,53 @@ class MusicDatabaseSearcher:
                         return song_vector
         
         # If no specific song found, create vector from query text
-        tokenized_query = self.tokenize_text(query.lower())
-        
-        # Get embeddings for words in vocabulary
-        def get_embedding(tokens, model, embedding_dim):
-            vectors = [model.wv[token] for token in tokens if token in model.wv]
-            return sum(vectors) / len(vectors) if vectors else np.zeros(embedding_dim)
-        
-        # Create text embedding
-        query_text_embedding = get_embedding(tokenized_query, self.word2vec_model, self.embedding_dim)
-        
-        # Create dummy numeric features (neutral values)
-        # Get the number of numeric features from the dataset
-        if self.song_data is not None:
-            numeric_cols = [col for col in self.song_data.columns 
-                          if col not in ["song_name", "song_artists", "song_description", "song_album_name", "song_genre", "song_explicit", "song_id"] 
-                          and self.song_data[col].dtype in ['int64', 'float64']]
-            # Use neutral values (0.5 for most features, scaled to mean=0)
-            neutral_numeric = np.zeros(len(numeric_cols))  # Already scaled, so 0 is neutral
-            
-            # Combine text and numeric embeddings
-            combined_query_vector = np.concatenate([query_text_embedding, neutral_numeric])
-            return combined_query_vector.reshape(1, -1)
+        query_text_embedding = self._mean_word_vector(self.tokenize_text(query))
         
-        # Fallback if no dataset loaded
-        return query_text_embedding.reshape(1, -1)
+        # Combine text and neutral numeric embeddings
+        combined_query_vector = np.concatenate([query_text_embedding, self._neutral_numeric])
+        return combined_query_vector.reshape(1, -1)
+
+    def _mean_word_vector(self, tokens: List[str]) -> np.ndarray:
+        """Average Word2Vec vector of the in-vocabulary tokens (zeros if none), via one gather"""
+        key_to_index = self.word2vec_model.wv.key_to_index
+        rows = [key_to_index[token] for token in tokens if token in key_to_index]
+        if not rows:
+            return np.zeros(self.embedding_dim)
+        return self.word2vec_model.wv.vectors[rows].mean(axis=0)
 
     def _search_spotify_for_similar(self, song_reference: str, num_results: int = 10) -> List[Dict[str, Any]]:
         """Search Spotify for songs similar to the given reference"""
         try:
-            # Get Spotify client
-            scope = "user-top-read playlist-read-private user-read-recently-played user-library-read"
-            sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-                client_id=os.getenv('SPOTIFY_CLIENT_ID'),
-                client_secret=os.getenv('SPOTIFY_CLIENT_SECRET'),
-                redirect_uri=os.getenv('SPOTIFY_REDIRECT_URI'),
-                scope=scope,
-                cache_path=".spotify_cache"
-            ))
+            # Get Spotify client (shared with the Spotify tools)
+            from .spotify.base import get_spotify_client
+            from .spotify.track_resolver import get_track_resolver
+            sp = get_spotify_client()
             
-            # Search for tracks on Spotify
-            results = sp.search(q=song_reference, type='track', limit=num_results)
+            # Search for tracks on Spotify (cached per normalized reference)
+            tracks = get_track_resolver().search_tracks(sp, song_reference, limit=num_results)
             
-            if not results['tracks']['items']:
+            if not tracks:
                 return []
             
+            # Audio features for every result in one request
+            try:
+                features = sp.audio_features([track['id'] for track in tracks]) or []
+            except Exception:
+                features = []
+            features += [None] * (len(tracks) - len(features))
+            
             spotify_results = []
-            for track in results['tracks']['items']:
-                artist_names = ', '.join([artist['name'] for artist in track['artists']])
-                
-                # Get audio features if available
-                try:
-                    audio_features = sp.audio_features([track['id']])[0]
-                    if audio_features:
-                        audio_data = {
-                            'danceability': float(audio_features.get('danceability', 0)),
-                            'energy': float(audio_features.get('energy', 0)),
-                            'valence': float(audio_features.get('valence', 0)),
-                            'acousticness': float(audio_features.get('acousticness', 0)),
-                            'instrumentalness': float(audio_features.get('instrumentalness', 0)),
-                            'tempo': float(audio_features.get('tempo', 0))
-                        }
-                    else:
-                        audio_data = {
-                            'danceability': 0.5, 'energy': 0.5, 'valence': 0.5,
-                            'acousticness': 0.5, 'instrumentalness': 0.5, 'tempo': 120
-                        }
-                except:
+            for track, audio_features in zip(tracks, features):
+                if audio_features:
+                    audio_data = {
+                        'danceability': float(audio_features.get('danceability', 0)),
+                        'energy': float(audio_features.get('energy', 0)),
+                        'valence': float(audio_features.get('valence', 0)),
+                        'acousticness': float(audio_features.get('acousticness', 0)),
+                        'instrumentalness': float(audio_features.get('instrumentalness', 0)),
+                        'tempo': float(audio_features.get('tempo', 0))
+                    }
+                else:
                     audio_data = {
                         'danceability': 0.5, 'energy': 0.5, 'valence': 0.5,
                         'acousticness': 0.5, 'instrumentalness': 0.5, 'tempo': 120
@@ -289,10 +366,11 @@ class MusicDatabaseSearcher:
                 
                 result = {
                     'track_name': track['name'],
-                    'artists': artist_names,
+                    'artists': track['artists'],
+                    'track_id': track['id'],
                     'similarity': 1.0,  # High similarity since it's from search
                     'audio_features': audio_data,
-                    'popularity': track.get('popularity', 0),
+                    'popularity': track['popularity'],
                     'source': 'spotify_search'
                 }
                 
@@ -309,23 +387,13 @@ class MusicDatabaseSearcher:
         query_lower = query.lower()
         
         # Patterns that indicate specific song requests
-        similarity_patterns = [
-            r'similar to (.+)',
-            r'like (.+)',
-            r'songs like (.+)',
-            r'music like (.+)',
-            r'tracks like (.+)',
-            r'sounds like (.+)',
-            r'reminds me of (.+)'
-        ]
-        
-        for pattern in similarity_patterns:
-            match = re.search(pattern, query_lower)
+        for pattern in SONG_REFERENCE_PATTERNS:
+            match = pattern.search(query_lower)
             if match:
                 song_reference = match.group(1).strip()
                 
                 # Try to parse "song by artist" format
-                by_match = re.search(r'(.+?)\s+by\s+(.+)', song_reference)
+                by_match = SONG_BY_ARTIST.search(song_reference)
                 if by_match:
                     song_name = by_match.group(1).strip()
                     artist_name = by_match.group(2).strip()
@@ -346,23 +414,75 @@ class MusicDatabaseSearcher:
     
     def _song_exists_in_db(self, song_name: str, artist_name: str = None) -> bool:
         """Check if a song exists in the database"""
-        if self.song_data is None:
+        if self.tracks is None:
             return False
         
-        song_lower = song_name.lower().strip()
-        song_titles = self.song_data['song_name'].str.lower()
-        
         # Check for song title matches
-        song_mask = song_titles.str.contains(song_lower, na=False, regex=False)
+        song_mask = self.tracks.contains('name', song_name.lower().strip())
         
         if artist_name:
-            artist_lower = artist_name.lower().strip()
-            song_artists = self.song_data['song_artists'].str.lower()
-            artist_mask = song_artists.str.contains(artist_lower, na=False, regex=False)
-            exact_matches = song_mask & artist_mask
-            return exact_matches.any()
+            artist_mask = self.tracks.contains('artists', artist_name.lower().strip())
+            return bool((song_mask & artist_mask).any())
         else:
-            return song_mask.any()
+            return bool(song_mask.any())
+
+    def locate_track(self, song_name: str, artist_name: str = None) -> Optional[int]:
+        """Row position of a catalogue track: exact titles before partial ones, the most popular on ties.
+
+        With artist_name, only that artist's tracks qualify.
+        """
+        if self.tracks is None or not song_name.strip():
+            return None
+        song_lower = song_name.lower().strip()
+        mask = self.tracks.contains('name', song_lower)
+        if artist_name:
+            mask &= self.tracks.contains('artists', artist_name.lower().strip())
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return None
+        exact = candidates[[self.tracks.names[p].lower() == song_lower for p in candidates]]
+        if len(exact):
+            candidates = exact
+        if 'popularity' in self.tracks.columns:
+            return int(candidates[np.argmax(self.tracks.columns['popularity'][candidates])])
+        return int(candidates[0])
+
+    def recommend_for_track(self, song_name: str, artist_name: str = None,
+                            top_k: int = 10) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """(seed track, its top_k nearest catalogue tracks), or None when the seed is not in the catalogue.
+
+        Other versions of the seed (same title) are left out.
+        """
+        start = time.perf_counter()
+        seed = self.locate_track(song_name, artist_name)
+        if seed is None:
+            return None
+        similarities = self.embeddings @ self.embeddings[seed]
+        similarities[self.tracks.same_name_mask(seed)] = -np.inf
+        top_k = min(top_k, int(np.isfinite(similarities).sum()))
+        positions = _top_k(similarities, top_k) if top_k > 0 else []
+        results = [self._track_result(int(p), similarities[p]) for p in positions]
+        search_latency.observe(time.perf_counter() - start, path="track")
+        return self._track_result(seed, 1.0), results
+
+    def match_audio_features(self, targets: Dict[str, float], top_k: int = 10,
+                             genre: str = None) -> List[Dict[str, Any]]:
+        """Catalogue tracks nearest to the target audio features, e.g. {"energy": 0.8, "tempo": 125}.
+
+        Only the given features count (see TrackStore.nearest_by_features); genre restricts the candidates.
+        """
+        if self.tracks is None:
+            return []
+        start = time.perf_counter()
+        mask = self.tracks.genre_mask(genre) if genre else None
+        positions, distances = self.tracks.nearest_by_features(targets, top_k, mask)
+        results = []
+        for position, distance in zip(positions, distances):
+            result = self._track_result(int(position), 1.0 / (1.0 + float(distance)))
+            result['distance'] = round(float(distance), 4)
+            results.append(result)
+        search_latency.observe(time.perf_counter() - start, path="features")
+        return results
 
     def _extract_genre_filter(self, query: str) -> str:
         """Extract genre from query if specified"""
@@ -397,49 +517,68 @@ class MusicDatabaseSearcher:
         popularity_keywords = ['popular', 'top', 'hit', 'chart', 'trending', 'famous', 'best']
         return any(keyword in query.lower() for keyword in popularity_keywords)
     
-    def _get_popular_songs_by_genre(self, genre: str, top_k: int) -> List[Dict[str, Any]]:
-        """Get popular songs from a specific genre"""
-        genre_mask = self.song_data['song_genre'].str.lower() == genre.lower()
-        genre_songs = self.song_data[genre_mask].copy()
+    def _get_popular_songs_by_genre(self, genre: str, top_k: int, feature_mask: np.ndarray = None) -> List[Dict[str, Any]]:
+        """Get popular songs from a specific genre (optionally restricted to feature_mask rows)"""
+        genre_mask = self._genre_mask(genre)
+        positions = np.flatnonzero(genre_mask if feature_mask is None else genre_mask & feature_mask)
         
-        if genre_songs.empty:
+        if positions.size == 0:
             return []
         
-        # Sort by popularity and get top songs
-        popular_songs = genre_songs.nlargest(top_k, 'song_popularity')
+        # Sort by popularity (ties keep dataset order) and get top songs
+        popularity = self.tracks.columns['popularity'][positions]
+        popular_positions = positions[np.argsort(-popularity.astype(np.int16), kind='stable')[:top_k]]
         
         results = []
-        for idx, song in popular_songs.iterrows():
+        for position in popular_positions:
+            track = self.tracks.record(position)
             results.append({
-                'track_name': song['song_name'],
-                'artists': song['song_artists'], 
+                'track_name': track.name,
+                'artists': track.artists, 
                 'similarity': 1.0,  # Max similarity for exact genre match
-                'audio_features': {
-                    'danceability': float(song.get('song_danceability', 0)),
-                    'energy': float(song.get('song_energy', 0)),
-                    'valence': float(song.get('song_valence', 0)),
-                    'acousticness': float(song.get('song_acousticness', 0)),
-                    'instrumentalness': float(song.get('song_instrumentalness', 0)),
-                    'tempo': float(song.get('song_tempo', 0))
-                },
-                'popularity': int(song.get('song_popularity', 0))
+                'audio_features': track.features,
+                'popularity': track.popularity or 0,
+                'genre': track.genre
             })
         
         return results
 
-    def search_similar_music(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
-        """Search for music similar to the text description using combined embeddings"""
-        if self.embedded_song_df is None:
-            return []
+    def search_similar_music(self, query: str, top_k: int = 10,
+                             filters: Dict[str, Any] = None, diversify: bool = False) -> List[Dict[str, Any]]:
+        """Search for music similar to the text description using combined embeddings.
+
+        filters restricts the candidates before scoring, e.g.
+        {"danceability": (0.7, None), "tempo": (120, 130), "explicit": False} (see TrackStore.filter_mask).
+        diversify re-ranks a larger candidate pool so near-duplicates and one artist don't fill the results.
+        """
+        start = time.perf_counter()
+        path, results = self._search_similar_music(query, top_k, filters, diversify)
+        search_latency.observe(time.perf_counter() - start, path=path)
+        return results
+
+    def _search_similar_music(self, query: str, top_k: int, filters: Dict[str, Any] = None,
+                              diversify: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+        """Search results plus the path that produced them (spotify, popularity, genre, filtered, vibe, none)"""
+        if self.embeddings is None:
+            return "none", []
+
+        # Audio-feature filters apply to catalogue rows, so filtered searches stay local
+        feature_mask = self.tracks.filter_mask(filters) if filters else None
+        if feature_mask is not None and not feature_mask.any():
+            print(f"No songs match the filters {filters}")
+            return "filtered", []
 
         # Check if this is a "similar to [specific song]" query that's not in our DB
         song_reference = self._extract_song_reference_for_search(query)
-        if song_reference:
+        if song_reference and (not self.spotify_fallback or feature_mask is not None):
+            print(f"Song not found in database, searching locally: '{song_reference}'")
+            search_query = song_reference
+        elif song_reference:
             print(f"Song not found in database, searching Spotify: '{song_reference}'")
             # Use Spotify search to find similar songs
             spotify_results = self._search_spotify_for_similar(song_reference, top_k)
             if spotify_results:
-                return spotify_results
+                return "spotify", spotify_results
             else:
                 print("No Spotify results found, falling back to text search")
                 # Fall back to text search if Spotify doesn't return results
@@ -450,26 +589,29 @@ class MusicDatabaseSearcher:
         # Check for genre-specific queries
         genre_filter = self._extract_genre_filter(search_query)
         
-        # Create working dataset (filtered by genre if specified)
+        # Candidate rows (filtered by genre and audio features if specified; None = whole catalogue)
+        candidate_mask = feature_mask
         if genre_filter:
-            genre_mask = self.song_data['song_genre'].str.lower() == genre_filter.lower()
+            genre_mask = self._genre_mask(genre_filter)
             if genre_mask.any():
                 print(f"Filtering for {genre_filter} songs: {genre_mask.sum()} found")
-                filtered_indices = genre_mask[genre_mask].index
-                working_df = self.embedded_song_df.loc[filtered_indices].copy()
-                working_song_data = self.song_data.loc[filtered_indices].copy()
+                candidate_mask = genre_mask if feature_mask is None else genre_mask & feature_mask
             else:
                 print(f"No {genre_filter} songs found, searching all genres")
-                working_df = self.embedded_song_df.copy()
-                working_song_data = self.song_data.copy()
-        else:
-            working_df = self.embedded_song_df.copy()
-            working_song_data = self.song_data.copy()
+        positions = None if candidate_mask is None else np.flatnonzero(candidate_mask)
+        path = "genre" if genre_filter else "filtered" if feature_mask is not None else "vibe"
 
         # Check for popularity-based queries
         if self._is_popularity_query(search_query) and genre_filter:
             # For popularity queries with genre filter, sort by popularity instead of similarity
-            return self._get_popular_songs_by_genre(genre_filter, top_k)
+            return "popularity", self._get_popular_songs_by_genre(genre_filter, top_k, feature_mask)
+
+        if positions is not None and positions.size == 0:
+            return path, []
+
+        # Lexical (BM25) matches on titles, artists, albums and genres among the candidate rows
+        lexical = self.lexical_index.scores(search_query) if self.lexical_index is not None else None
+        lexical, positions = _lexical_candidates(lexical, candidate_mask, positions, top_k)
 
         # Convert query to database vector representation
         query_vector = self.text_to_database_vector(search_query)
@@ -477,62 +619,349 @@ class MusicDatabaseSearcher:
         # Check if query vector is valid
         if query_vector is None or query_vector.size == 0:
             print("Warning: Could not create valid query vector")
-            return []
+            return "none", []
 
-        # Get song embeddings as a matrix from working dataset
-        song_embeddings = np.vstack(working_df['song_embedding'].values)
+        # Song embeddings of the candidate rows (already row-normalized); when most rows are
+        # candidates, scoring the whole matrix beats copying the candidate rows out first
+        dense = positions is None or positions.size > len(self.embeddings) * DENSE_CANDIDATE_FRACTION
+        song_embeddings = self.embeddings if dense else self.embeddings[positions]
         
         # Calculate similarities using cosine similarity
         try:
-            similarities = cosine_similarity(query_vector, song_embeddings)[0]
+            query_vector = query_vector.ravel().astype(np.float32)
+            norm = np.linalg.norm(query_vector)
+            similarities = song_embeddings @ (query_vector / norm if norm else query_vector)
+            if dense and positions is not None:
+                similarities = similarities[positions]
         except Exception as e:
             print(f"Error calculating similarities: {e}")
-            return []
+            return "none", []
 
-        # Get top matches
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        pool_size = top_k * MMR_POOL if diversify else top_k
+        top_indices, relevance = self._ranked(similarities, lexical, positions, pool_size)
+        rows = top_indices if positions is None else positions[top_indices]
+        if diversify:
+            keep = self._diversify(rows, relevance, top_k, search_query)
+            top_indices, rows = top_indices[keep], rows[keep]
         
-        results = []
-        for idx in top_indices:
-            track = working_df.iloc[idx]
-            # Get original song data for additional features  
-            original_idx = working_df.index[idx]
-            original_track = working_song_data.loc[original_idx]
-            
-            result = {
-                'track_name': track['song_name'],
-                'artists': track['song_artists'], 
-                'similarity': float(similarities[idx]),
-                'audio_features': {
-                    'danceability': float(original_track.get('song_danceability', 0)),
-                    'energy': float(original_track.get('song_energy', 0)),
-                    'valence': float(original_track.get('song_valence', 0)),
-                    'acousticness': float(original_track.get('song_acousticness', 0)),
-                    'instrumentalness': float(original_track.get('song_instrumentalness', 0)),
-                    'tempo': float(original_track.get('song_tempo', 0))
-                },
-                'source': 'local_database'
-            }
-            
-            # Add popularity if available
-            if 'song_popularity' in original_track:
-                result['popularity'] = int(original_track['song_popularity'])
-                
-            results.append(result)
+        results = [self._track_result(row, similarities[idx]) for row, idx in zip(rows, top_indices)]
+
+        return path, results
+
+    def _ranked(self, similarities: np.ndarray, lexical: Optional[np.ndarray], positions: Optional[np.ndarray],
+                top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices into similarities of the top_k (fused with lexical when given) and their ranking scores"""
+        if lexical is not None:
+            return self._fused_top_k(similarities, lexical if positions is None else lexical[positions], top_k)
+        top_indices = _top_k(similarities, top_k)
+        return top_indices, similarities[top_indices]
+
+    def _fused_top_k(self, similarities: np.ndarray, lexical: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices of the top_k after fusing the vector and BM25 scores, and their fused scores.
+
+        Each ranking contributes its best LEXICAL_CANDIDATES rows; "rrf" sums 1 / (RRF_K + rank)
+        over the rankings a row appears in, "linear" blends the BM25 score (scaled to 0-1) with the
+        cosine similarity using LEXICAL_WEIGHT.
+        """
+        depth = max(LEXICAL_CANDIDATES, top_k)
+        hits = np.flatnonzero(lexical > 0)
+        vector_pool = _top_k(similarities, depth)
+        lexical_pool = hits[_top_k(lexical[hits], depth)]
+        pool = np.union1d(vector_pool, lexical_pool)
+        order, fused = self._fuse(pool, similarities[pool], lexical[pool], vector_pool, lexical_pool, top_k)
+        return pool[order], fused
+
+    def _fuse(self, pool: np.ndarray, similarities: np.ndarray, lexical: np.ndarray, vector_pool: np.ndarray,
+              lexical_pool: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices into pool of the top_k fused scores, and those scores.
+
+        similarities and lexical are the pool rows' scores; vector_pool and lexical_pool are the
+        rows each ranking contributed (both subsets of the sorted, unique pool).
+        """
+        if self.fusion == 'linear':
+            fused = LEXICAL_WEIGHT * lexical / lexical.max() + (1 - LEXICAL_WEIGHT) * similarities
+        else:
+            in_vector = np.isin(pool, vector_pool, assume_unique=True)
+            in_lexical = np.isin(pool, lexical_pool, assume_unique=True)
+            fused = (np.where(in_vector, _reciprocal_ranks(np.sort(similarities[in_vector]), similarities), 0)
+                     + np.where(in_lexical, _reciprocal_ranks(np.sort(lexical[in_lexical]), lexical), 0))
+        order = np.argsort(-fused, kind='stable')[:top_k]
+        return order, fused[order]
+
+    def _diversify(self, rows: np.ndarray, relevance: np.ndarray, top_k: int, query: str) -> np.ndarray:
+        """Indices into rows of a top_k chosen by maximal marginal relevance.
+
+        Each step picks the candidate maximizing MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * (highest cosine
+        similarity to an already chosen track), over the candidates' embedding block. Other versions of a
+        chosen title are dropped, and a lead artist stops after MAX_PER_ARTIST tracks unless the query names
+        them. Caps relax only if too few candidates remain.
+        """
+        n = len(rows)
+        if n <= 1:
+            return np.arange(n)
+        block = self.embeddings[rows]
+        similarity = block @ block.T
+        low, high = float(relevance.min()), float(relevance.max())
+        relevance = (relevance - low) / (high - low) if high > low else np.ones(n, dtype=np.float32)
 
+        artist_codes = self.tracks.lead_artist_codes()[rows]
+        title_codes = self.tracks.base_title_codes()[rows]
+        query_tokens = None
+
+        available = np.ones(n, dtype=bool)
+        artist_counts: Dict[int, int] = {}
+        redundancy = np.zeros(n, dtype=np.float32)
+        chosen = []
+        while len(chosen) < top_k and available.any():
+            scores = np.where(available, MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * redundancy, -np.inf)
+            pick = int(np.argmax(scores))
+            chosen.append(pick)
+            available &= title_codes != title_codes[pick]
+            artist = int(artist_codes[pick])
+            artist_counts[artist] = artist_counts.get(artist, 0) + 1
+            if artist_counts[artist] == MAX_PER_ARTIST:
+                # Artists the query names ("songs by Radiohead") are exempt from the cap
+                query_tokens = set(tokenize(query)) if query_tokens is None else query_tokens
+                lead = self.tracks.artists[rows[pick]].split(';')[0]
+                if not query_tokens.intersection(tokenize(lead)):
+                    available &= artist_codes != artist
+            np.maximum(redundancy, similarity[pick], out=redundancy)
+
+        if len(chosen) < top_k:
+            taken = set(chosen)
+            chosen += [i for i in np.argsort(-relevance, kind='stable') if i not in taken][:top_k - len(chosen)]
+        return np.array(chosen, dtype=np.int64)
+
+    def _track_result(self, position: int, similarity: float) -> Dict[str, Any]:
+        """Search result for the track at position"""
+        track = self.tracks.record(position)
+        result = {
+            'track_name': track.name,
+            'artists': track.artists, 
+            'track_id': track.track_id,
+            'similarity': float(similarity),
+            'audio_features': track.features,
+            'source': 'local_database',
+            'genre': track.genre
+        }
+        
+        # Add popularity if available
+        if track.popularity is not None:
+            result['popularity'] = track.popularity
+        return result
+
+    def _genre_mask(self, genre: str) -> np.ndarray:
+        mask = self._genre_masks.get(genre)
+        if mask is None:
+            mask = self._genre_masks[genre] = self.tracks.genre_mask(genre)
+        return mask
+
+    def _blocked_top_k(self, queries: np.ndarray, masks: Dict[int, np.ndarray], top_k: int) -> List[List[tuple]]:
+        """Top-k (position, similarity) per query row, scoring the catalogue block by block"""
+        best_positions, best_scores = self._blocked_scan(queries, masks, top_k)
+        return [
+            [(int(position), float(score)) for position, score in zip(positions, scores) if np.isfinite(score)]
+            for positions, scores in zip(best_positions, best_scores)
+        ]
+
+    def _blocked_scan(self, queries: np.ndarray, masks: Dict[int, np.ndarray],
+                      top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, similarities) arrays of each query row's top-k, best first (-inf past the candidates)"""
+        matrix = self.embeddings
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_positions = np.empty((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, len(matrix), BATCH_BLOCK_ROWS):
+            block = matrix[start:start + BATCH_BLOCK_ROWS]
+            scores = queries @ block.T
+            for row, mask in masks.items():
+                scores[row, ~mask[start:start + len(block)]] = -np.inf
+
+            k = min(top_k, scores.shape[1])
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.concatenate([best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1)
+            positions = np.concatenate([best_positions, candidates + start], axis=1)
+
+            k = min(top_k, scores.shape[1])
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_positions = np.take_along_axis(positions, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_positions = np.take_along_axis(best_positions, order, axis=1)
+        return best_positions, best_scores
+
+    def search_similar_music_batch(self, queries: List[str], top_k: int = 10) -> List[List[Dict[str, Any]]]:
+        """search_similar_music for many queries: one matrix-matrix product over the catalogue.
+
+        Queries with selective lexical matches score only the matching rows; other lexical matches
+        take their vector pool from the same block-by-block scan and are fused over that pool.
+        Queries that need Spotify or a popularity ranking go through the single-query path.
+        """
+        if self.embeddings is None:
+            return [[] for _ in queries]
+
+        start = time.perf_counter()
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        # Plain vector queries keep a running top_k; lexical matches keep a fusion-depth pool
+        plain, fused = ({'vectors': [], 'rows': [], 'masks': {}} for _ in range(2))
+        for i, query in enumerate(queries):
+            song_reference = self._extract_song_reference_for_search(query)
+            if song_reference and self.spotify_fallback:
+                results[i] = self.search_similar_music(query, top_k)
+                continue
+            search_query = song_reference or query
+
+            genre_filter = self._extract_genre_filter(search_query)
+            if genre_filter and self._is_popularity_query(search_query):
+                results[i] = self._get_popular_songs_by_genre(genre_filter, top_k)
+                continue
+
+            query_vector = self.text_to_database_vector(search_query)
+            if query_vector is None or query_vector.size == 0:
+                continue
+            mask = self._genre_mask(genre_filter) if genre_filter else None
+            if mask is not None and not mask.any():
+                mask = None
+            query_vector = query_vector.ravel().astype(np.float32)
+            norm = np.linalg.norm(query_vector)
+            query_vector = query_vector / norm if norm else query_vector
+
+            lexical = self.lexical_index.scores(search_query) if self.lexical_index is not None else None
+            lexical, positions = _lexical_candidates(lexical, mask, None, top_k)
+            if positions is not None:
+                similarities = self.embeddings[positions] @ query_vector
+                top_indices, _ = self._ranked(similarities, lexical, positions, top_k)
+                results[i] = [self._track_result(int(positions[idx]), similarities[idx]) for idx in top_indices]
+                continue
+            # Fused queries are re-scored lexically after the scan rather than each holding a
+            # catalogue-length BM25 vector until then
+            group = fused if lexical is not None else plain
+            if mask is not None:
+                group['masks'][len(group['rows'])] = mask
+            group['vectors'].append(query_vector)
+            group['rows'].append((i, search_query))
+
+        for group, depth in ((plain, top_k), (fused, max(LEXICAL_CANDIDATES, top_k))):
+            for chunk in range(0, len(group['rows']), BATCH_QUERY_ROWS):
+                chunk_rows = group['rows'][chunk:chunk + BATCH_QUERY_ROWS]
+                matrix = np.vstack(group['vectors'][chunk:chunk + BATCH_QUERY_ROWS])
+                chunk_masks = {row - chunk: mask for row, mask in group['masks'].items()
+                               if chunk <= row < chunk + len(chunk_rows)}
+                if group is plain:
+                    for (i, _), found in zip(chunk_rows, self._blocked_top_k(matrix, chunk_masks, depth)):
+                        results[i] = [self._track_result(position, similarity) for position, similarity in found]
+                    continue
+                positions, scores = self._blocked_scan(matrix, chunk_masks, depth)
+                for offset, (i, search_query) in enumerate(chunk_rows):
+                    vector_pool = positions[offset][np.isfinite(scores[offset])]
+                    results[i] = self._fused_batch_result(search_query, matrix[offset], chunk_masks.get(offset),
+                                                          vector_pool, top_k)
+
+        search_latency.observe(time.perf_counter() - start, path="batch")
         return results
 
+    def _fused_batch_result(self, search_query: str, query_vector: np.ndarray, mask: Optional[np.ndarray],
+                            vector_pool: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Fused top_k for one batch query from its blocked vector pool and its BM25 hits.
+
+        Only the pool rows (at most twice the fusion depth) are scored against the query vector,
+        so the result matches _fused_top_k over the whole catalogue.
+        """
+        lexical = self.lexical_index.scores(search_query)
+        hits = np.flatnonzero(lexical > 0 if mask is None else (lexical > 0) & mask)
+        lexical_pool = hits[_top_k(lexical[hits], max(LEXICAL_CANDIDATES, top_k))]
+        pool = np.union1d(vector_pool, lexical_pool)
+        similarities = self.embeddings[pool] @ query_vector
+        order, _ = self._fuse(pool, similarities, lexical[pool], vector_pool, lexical_pool, top_k)
+        return [self._track_result(int(pool[idx]), similarities[idx]) for idx in order]
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k scores, best first: partition out the top_k, then sort only those"""
+    if top_k < len(scores):
+        indices = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.argsort(-scores[indices], kind='stable')]
+
+def _lexical_candidates(lexical: Optional[np.ndarray], candidate_mask: Optional[np.ndarray],
+                        positions: Optional[np.ndarray], top_k: int) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """(BM25 scores to fuse or None, candidate positions) for one query.
+
+    Without hits among the candidates there is nothing to fuse; selective hits (top_k to
+    LEXICAL_CANDIDATES rows) become the only candidates whose vectors are scored.
+    """
+    if lexical is None:
+        return None, positions
+    hits = lexical > 0 if candidate_mask is None else (lexical > 0) & candidate_mask
+    hit_count = int(hits.sum())
+    if hit_count == 0:
+        return None, positions
+    if top_k <= hit_count <= LEXICAL_CANDIDATES:
+        return lexical, np.flatnonzero(hits)
+    return lexical, positions
+
+def _reciprocal_ranks(sorted_scores: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """1 / (SEARCH_RRF_K + rank) of each score within sorted_scores (rank 1 = best; ties share a rank)"""
+    ranks = len(sorted_scores) - np.searchsorted(sorted_scores, scores, side='right') + 1
+    return 1.0 / (RRF_K + ranks)
+
 # Initialize the searcher globally
 _searcher = None
 
+# format_recommendations output keyed on (normalized query, num_results, filters, dataset version)
+_result_cache = LRUCache(int(os.getenv('SEARCH_CACHE_SIZE', '512')), name='vibe_search')
+
 def get_searcher():
     global _searcher
     if _searcher is None:
         _searcher = MusicDatabaseSearcher()
+    elif _searcher.is_stale():
+        print("Catalogue changed on disk, reloading the vibe searcher")
+        _searcher = MusicDatabaseSearcher(_searcher.csv_path, _searcher.spotify_fallback, _searcher.fusion)
+        _result_cache.clear()
     return _searcher
 
+def format_recommendations(query: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Searcher results in the shape the vibe search tools return"""
+    formatted_results = {
+        "query": query,
+        "recommendations": []
+    }
+    
+    for i, track in enumerate(results, 1):
+        track_info = {
+            "rank": i,
+            "track": f"{track['track_name']} by {track['artists']}",
+            "similarity_score": round(track['similarity'], 3),
+            "source": track.get('source', 'local_database'),
+            "vibe_profile": {
+                "danceability": round(track['audio_features']['danceability'], 2),
+                "energy": round(track['audio_features']['energy'], 2),
+                "mood": "positive" if track['audio_features']['valence'] > 0.5 else "mellow",
+                "style": "acoustic" if track['audio_features']['acousticness'] > 0.5 else "electronic",
+                "vocals": "minimal" if track['audio_features']['instrumentalness'] > 0.5 else "prominent"
+            }
+        }
+        
+        # Add popularity if available
+        if 'popularity' in track:
+            track_info["popularity"] = track['popularity']
+            
+        formatted_results["recommendations"].append(track_info)
+    return formatted_results
+
 @tool
-def search_music_by_vibe(query: str, num_results: int = 10) -> str:
+def search_music_by_vibe(query: str, num_results: int = 10,
+                         min_danceability: float = None, max_danceability: float = None,
+                         min_energy: float = None, max_energy: float = None,
+                         min_valence: float = None, max_valence: float = None,
+                         min_tempo: float = None, max_tempo: float = None,
+                         min_acousticness: float = None, max_acousticness: float = None,
+                         min_instrumentalness: float = None, max_instrumentalness: float = None,
+                         min_popularity: int = None, max_popularity: int = None,
+                         explicit: bool = None, diversify: bool = False) -> str:
     """
     Search for music based on descriptive characteristics, mood, vibe, or similarity to specific songs.
     
@@ -546,52 +975,129 @@ def search_music_by_vibe(query: str, num_results: int = 10) -> str:
     - "Music like Bohemian Rhapsody by Queen"
     - "Tracks like Hotel California"
     
+    When the user states concrete audio-feature limits ("danceability above 0.7", "tempo 120-130 BPM",
+    "no explicit songs"), pass them as the min_/max_ arguments rather than in the query text.
+    
     Args:
         query: Descriptive text about the desired music characteristics or reference to a specific song
         num_results: Number of recommendations to return (default: 10)
+        min_danceability, max_danceability: Danceability range (0.0-1.0)
+        min_energy, max_energy: Energy range (0.0-1.0)
+        min_valence, max_valence: Valence/positivity range (0.0-1.0)
+        min_tempo, max_tempo: Tempo range in BPM
+        min_acousticness, max_acousticness: Acousticness range (0.0-1.0)
+        min_instrumentalness, max_instrumentalness: Instrumentalness range (0.0-1.0)
+        min_popularity, max_popularity: Popularity range (0-100)
+        explicit: True for only explicit tracks, False to exclude them
+        diversify: Spread results across artists and skip other versions of the same song (default: False);
+            pass True for playlists or "variety" requests where one artist shouldn't fill the results
     
     Returns:
         JSON string with music recommendations
     """
+    filters = {
+        'danceability': (min_danceability, max_danceability),
+        'energy': (min_energy, max_energy),
+        'valence': (min_valence, max_valence),
+        'tempo': (min_tempo, max_tempo),
+        'acousticness': (min_acousticness, max_acousticness),
+        'instrumentalness': (min_instrumentalness, max_instrumentalness),
+        'popularity': (min_popularity, max_popularity),
+    }
+    filters = {field: bounds for field, bounds in filters.items() if bounds != (None, None)}
+    if explicit is not None:
+        filters['explicit'] = explicit
+
     try:
         searcher = get_searcher()
-        results = searcher.search_similar_music(query, top_k=num_results)
+        cache_key = (normalize_query(query), num_results, tuple(sorted(filters.items())), diversify,
+                     searcher.dataset_version)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            # Same search, this caller's wording
+            return json.dumps(dict(cached, query=query), indent=2)
+
+        results = searcher.search_similar_music(query, top_k=num_results, filters=filters, diversify=diversify)
         
+        if not results and filters:
+            return json.dumps({
+                "error": f"No songs in the catalogue match the filters {filters}. Try widening the ranges."
+            })
         if not results:
             return json.dumps({
                 "error": "No music recommendations found. The dataset might not be loaded properly."
             })
         
-        # Format results for better readability
-        formatted_results = {
-            "query": query,
-            "recommendations": []
-        }
-        
-        for i, track in enumerate(results, 1):
-            track_info = {
-                "rank": i,
-                "track": f"{track['track_name']} by {track['artists']}",
-                "similarity_score": round(track['similarity'], 3),
-                "source": track.get('source', 'local_database'),
-                "vibe_profile": {
-                    "danceability": round(track['audio_features']['danceability'], 2),
-                    "energy": round(track['audio_features']['energy'], 2),
-                    "mood": "positive" if track['audio_features']['valence'] > 0.5 else "mellow",
-                    "style": "acoustic" if track['audio_features']['acousticness'] > 0.5 else "electronic",
-                    "vocals": "minimal" if track['audio_features']['instrumentalness'] > 0.5 else "prominent"
-                }
-            }
-            
-            # Add popularity if available
-            if 'popularity' in track:
-                track_info["popularity"] = track['popularity']
-                
-            formatted_results["recommendations"].append(track_info)
+        formatted_results = format_recommendations(query, results)
         
+        _result_cache.put(cache_key, formatted_results)
         return json.dumps(formatted_results, indent=2)
         
     except Exception as e:
         return json.dumps({
             "error": f"Error searching for music: {str(e)}"
         })
+
+@tool
+def search_music_by_vibe_batch(queries: List[str], num_results: int = 5) -> str:
+    """
+    Search for music matching several vibes or moods at once, e.g. the different moods of a
+    playlist ("warm up: upbeat pop", "peak: high energy dance", "cool down: chill acoustic").
+    
+    Args:
+        queries: One descriptive query per vibe
+        num_results: Number of recommendations per query (default: 5)
+    
+    Returns:
+        JSON string with the recommendations for each query, in order
+    """
+    try:
+        searcher = get_searcher()
+        batch = searcher.search_similar_music_batch(queries, top_k=num_results)
+        return json.dumps({
+            "results": [format_recommendations(query, results) for query, results in zip(queries, batch)]
+        }, indent=2)
+    except Exception as e:
+        return json.dumps({
+            "error": f"Error searching for music: {str(e)}"
+        })
+
+def _artist_summary(profile: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "artist": profile["artist"],
+        "genres": [genre for genre, _ in profile["genres"][:3]],
+        "tracks_in_catalogue": profile["tracks"],
+        "average_popularity": profile["popularity"],
+        "top_tracks": profile["top_tracks"],
+    }
+
+@tool
+def find_similar_artists(artist: str, num_results: int = 8) -> str:
+    """
+    Find artists similar to a given artist ("artists like Radiohead", "who sounds like Adele?") from the
+    local music catalogue, compared by their average audio features and genres. Also returns the artist's
+    own genres, audio profile and most popular tracks. Answers in milliseconds without Spotify calls.
+    
+    Args:
+        artist: Artist name
+        num_results: Number of similar artists to return (default: 8)
+    
+    Returns:
+        JSON string with the artist's profile and the similar artists
+    """
+    try:
+        table = get_searcher().artist_table
+        if table is None:
+            return json.dumps({"error": "The music catalogue is not loaded."})
+        similar = table.similar(artist, top_k=num_results)
+        if similar is None:
+            return json.dumps({"error": f"'{artist}' is not in the local catalogue. Try the Spotify artist search instead."})
+        profile = table.artist(artist)
+        return json.dumps({
+            "artist": dict(_artist_summary(profile), audio_features=profile["audio_features"]),
+            "similar_artists": [dict(_artist_summary(other), similarity=other["similarity"]) for other in similar],
+        }, indent=2)
+    except Exception as e:
+        return json.dumps({
+            "error": f"Error finding similar artists: {str(e)}"
+        })
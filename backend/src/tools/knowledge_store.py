@@ -0,0 +1,157 @@
+"""
+Local answers to common artist and genre questions.
+
+The web agent normally answers "who is X" / "what genre is Y" with a Tavily
+search between two LLM calls. KnowledgeStore answers what it can first:
+
+- catalogue facts: an artist's genres, track count and best-known tracks, and
+  per-genre summaries, from the vibe searcher's ArtistTable
+- web answers: the reply the web agent gave to an earlier question about the
+  same entity, kept with the Tavily cache TTLs (optionally in SQLite)
+"""
+
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from ..core.metrics import knowledge_lookups
+from ..utils.cache import LRUCache, SQLiteStore, normalize_query
+from .artist_table import ArtistTable
+
+GENRE_QUESTION = re.compile(
+    r"^\s*(?:what|which)\s+(?:kind\s+of\s+music|(?:music\s+)?genres?|(?:music(?:al)?\s+)?style)\s+"
+    r"(?:is|are|does|do|did)\s+(?P<entity>.+?)(?:\s+(?:play|make|perform|known\s+for))?\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+WHO_QUESTION = re.compile(
+    r"^\s*(?:who\s+(?:is|are|was|were)|tell\s+me\s+(?:more\s+)?about|what\s+is)\s+(?P<entity>.+?)\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+_TRAILING_WORDS = re.compile(r"\s+(?:music|genre|the\s+band|the\s+artist)$", re.IGNORECASE)
+
+# Entities that refer back into the conversation ("who is she", "tell me about my top artist")
+# mean something different per user, so they are never answered or cached here
+_REFERENCE_WORDS = {"i", "me", "my", "mine", "you", "your", "yours", "he", "him", "his", "she", "her", "hers",
+                    "it", "its", "we", "us", "our", "ours", "they", "them", "their", "theirs", "this", "that",
+                    "these", "those", "there", "here", "which", "what", "who"}
+_GENERIC_WORDS = {"the", "a", "an", "one", "ones", "song", "songs", "track", "tracks", "album", "albums",
+                  "band", "artist", "artists", "singer", "group", "guy", "girl", "last", "same", "other"}
+
+
+def _is_reference(entity: str) -> bool:
+    words = re.findall(r"[a-z']+", entity.lower())
+    return not words or words[0] in _REFERENCE_WORDS or all(
+        word in _REFERENCE_WORDS or word in _GENERIC_WORDS for word in words)
+
+
+def parse_question(text: str) -> Optional[Tuple[str, str]]:
+    """("genre" | "about", entity) for questions the store may answer, else None"""
+    for kind, pattern in (("genre", GENRE_QUESTION), ("about", WHO_QUESTION)):
+        match = pattern.match(text)
+        if match:
+            entity = _TRAILING_WORDS.sub("", match.group("entity").strip(" \"'"))
+            return (kind, entity) if entity and not _is_reference(entity) else None
+    return None
+
+
+def describe_artist_genres(facts: Dict) -> str:
+    genres = facts["genres"]
+    if not genres:
+        return ""
+    (main, main_count), others = genres[0], [genre for genre, _ in genres[1:3]]
+    text = (f"{facts['artist']} is mostly {main} ({main_count} of their {facts['tracks']} tracks in our catalogue)")
+    text += f", with some {' and '.join(others)}." if others else "."
+    if facts["top_tracks"]:
+        text += " Best-known there: " + ", ".join(f'"{name}"' for name in facts["top_tracks"]) + "."
+    return text
+
+
+def describe_genre(facts: Dict) -> str:
+    features = facts["features"]
+    text = f"{facts['genre'].title()} has {facts['tracks']} tracks in our catalogue"
+    if features:
+        text += (" — on average energy {energy}, danceability {danceability}, valence {valence}"
+                 .format(**{k: features.get(k, "n/a") for k in ("energy", "danceability", "valence")}))
+        if "tempo" in features:
+            text += f", around {features['tempo']:.0f} BPM"
+    text += "."
+    if facts["top_artists"]:
+        text += " Artists with the most tracks: " + ", ".join(facts["top_artists"]) + "."
+    return text
+
+
+class KnowledgeStore:
+    """Catalogue facts plus remembered web answers, keyed by normalized entity"""
+
+    def __init__(self, answers: LRUCache, facts: Optional[ArtistTable] = None):
+        self.answers = answers
+        self.facts = facts
+
+    def lookup(self, question: str) -> Optional[str]:
+        """A local answer to the question, or None when it needs the web"""
+        parsed = parse_question(question)
+        if parsed is None:
+            return None
+        kind, entity = parsed
+
+        remembered = self.answers.get(f"{kind}:{normalize_query(entity)}")
+        if remembered is not None:
+            knowledge_lookups.inc(source="web_answer")
+            return remembered
+
+        answer = None
+        if self.facts is not None and kind == "genre":
+            artist = self.facts.artist(entity)
+            answer = describe_artist_genres(artist) if artist else None
+        elif self.facts is not None and kind == "about" and self.facts.artist(entity) is None:
+            # Artists need a biography from the web; genres can be described from the catalogue
+            genre = self.facts.genre(entity)
+            answer = describe_genre(genre) if genre else None
+        knowledge_lookups.inc(source="catalogue" if answer else "miss")
+        return answer or None
+
+    def known(self, entity: str) -> bool:
+        """Whether entity is an artist or genre in the catalogue"""
+        return self.facts is not None and (self.facts.artist_id(entity) is not None
+                                           or bool(self.facts.tracks.genre_mask(entity).any()))
+
+    def remember(self, question: str, answer: str, ttl: Optional[float] = None):
+        """Keep the web agent's answer to a question about a catalogue artist or genre for the next one.
+
+        Answers are shared by every user, so entities the catalogue cannot vouch for are not kept.
+        """
+        parsed = parse_question(question)
+        if parsed is None or not answer or not self.known(parsed[1]):
+            return
+        kind, entity = parsed
+        self.answers.put(f"{kind}:{normalize_query(entity)}", answer, ttl=ttl)
+
+
+def _build_answers() -> LRUCache:
+    """Answer cache sharing the Tavily cache's SQLite file when TAVILY_CACHE_DB_PATH is set"""
+    from .tavily_tool import TAVILY_CACHE_TTL_SECONDS
+
+    store = None
+    path = os.getenv("TAVILY_CACHE_DB_PATH")
+    if path:
+        try:
+            store = SQLiteStore(path, table="knowledge_answers")
+        except Exception as e:
+            print(f"[Knowledge] Could not open {path}, keeping answers in memory: {e}")
+    return LRUCache(int(os.getenv("KNOWLEDGE_CACHE_SIZE", "1024")), name="knowledge",
+                    ttl=TAVILY_CACHE_TTL_SECONDS, store=store)
+
+
+_answers = _build_answers()
+
+
+def get_knowledge_store() -> KnowledgeStore:
+    """Store over the current vibe searcher's artist table"""
+    from .database_search_tool import get_searcher
+
+    facts = None
+    try:
+        facts = get_searcher().artist_table
+    except Exception as e:
+        print(f"[Knowledge] Catalogue unavailable, using remembered answers only: {e}")
+    return KnowledgeStore(_answers, facts)
@@ -0,0 +1,113 @@
+"""
+BM25 inverted index over track titles, artists, albums and genres.
+
+The vibe searcher averages query words into a small Word2Vec vector, which
+blurs exact-name intent ("songs by Radiohead", an album title). This index
+scores those literal matches; the searcher fuses them with the embedding
+scores (SEARCH_FUSION: a linear blend by default, or reciprocal rank fusion)
+and, when the matches are selective, scores only the matching rows' vectors.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .track_store import TrackStore
+
+# Per-field weight of a token occurrence (BM25F-style: titles and artists count most)
+FIELD_WEIGHTS = {"names": 1.0, "artists": 1.0, "albums": 0.5, "genres": 0.3}
+
+# Request phrasing that says nothing about which tracks are meant
+STOPWORDS = frozenset({
+    "a", "an", "and", "the", "of", "to", "for", "in", "on", "with", "by", "me", "my", "some", "any",
+    "song", "songs", "music", "track", "tracks", "like", "similar", "play", "find", "give", "recommend",
+    "something", "stuff", "about",
+})
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, without stopwords and single characters"""
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """Token -> (row positions, weighted term frequencies), scored with BM25"""
+
+    def __init__(self, postings: Dict[str, np.ndarray], frequencies: Dict[str, np.ndarray],
+                 doc_lengths: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        n = len(doc_lengths)
+        average = float(doc_lengths.mean()) if n else 0.0
+        # Per-row BM25 length normalization, k1 * (1 - b + b * dl / avgdl)
+        self._norms = (k1 * (1 - b + b * doc_lengths / average)).astype(np.float32) if average else \
+            np.full(n, k1, dtype=np.float32)
+        self._idf = {token: float(np.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5)))
+                     for token, rows in postings.items()}
+
+    @classmethod
+    def from_store(cls, tracks: TrackStore) -> "LexicalIndex":
+        """Index every track's name, artists, album and genre"""
+        token_cache: Dict[str, List[str]] = {}
+
+        def tokens_of(value: str) -> List[str]:
+            # Artists, albums and genres repeat across rows; tokenize each distinct string once
+            tokens = token_cache.get(value)
+            if tokens is None:
+                tokens = token_cache[value] = tokenize(value)
+            return tokens
+
+        fields = [(getattr(tracks, field), weight) for field, weight in FIELD_WEIGHTS.items() if field != "genres"]
+        genres = [tokenize(genre) for genre in tracks.genres]
+
+        rows: Dict[str, List[int]] = {}
+        weights: Dict[str, List[float]] = {}
+        doc_lengths = np.zeros(len(tracks), dtype=np.float32)
+        for position in range(len(tracks)):
+            counts: Counter = Counter()
+            for values, weight in fields:
+                for token in tokens_of(values[position]):
+                    counts[token] += weight
+            for token in genres[tracks.genre_codes[position]]:
+                counts[token] += FIELD_WEIGHTS["genres"]
+            for token, weight in counts.items():
+                rows.setdefault(token, []).append(position)
+                weights.setdefault(token, []).append(weight)
+            doc_lengths[position] = sum(counts.values())
+
+        return cls(
+            postings={token: np.array(positions, dtype=np.int32) for token, positions in rows.items()},
+            frequencies={token: np.array(weights[token], dtype=np.float32) for token in rows},
+            doc_lengths=doc_lengths,
+        )
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def matches(self, query: str) -> bool:
+        """Whether any query token is indexed"""
+        return any(token in self.postings for token in tokenize(query))
+
+    def scores(self, query: str) -> Optional[np.ndarray]:
+        """BM25 score of every row for the query's tokens, or None when no token is indexed"""
+        tokens = [token for token in dict.fromkeys(tokenize(query)) if token in self.postings]
+        if not tokens:
+            return None
+        scores = np.zeros(len(self), dtype=np.float32)
+        for token in tokens:
+            rows, tf = self.postings[token], self.frequencies[token]
+            # Postings hold each row once, so fancy-index += accumulates correctly
+            scores[rows] += self._idf[token] * tf * (self.k1 + 1) / (tf + self._norms[rows])
+        return scores
+
+    def memory_bytes(self) -> int:
+        return (sum(rows.nbytes for rows in self.postings.values())
+                + sum(tf.nbytes for tf in self.frequencies.values())
+                + self.doc_lengths.nbytes + self._norms.nbytes)
@@ -34,7 +34,10 @@ from .playlists import (
     create_playlist,
     add_track_to_playlist,
     remove_track_from_playlist,
-    search_and_add_to_playlist
+    search_and_add_to_playlist,
+    add_tracks_to_playlist,
+    remove_tracks_from_playlist,
+    build_playlist_from_vibe
 )
 
 # User profile tools
@@ -83,6 +86,9 @@ __all__ = [
     'add_track_to_playlist',
     'remove_track_from_playlist',
     'search_and_add_to_playlist',
+    'add_tracks_to_playlist',
+    'remove_tracks_from_playlist',
+    'build_playlist_from_vibe',
     
     # User tools
     'get_current_user_profile',
@@ -5,13 +5,52 @@ Base Spotify client configuration and authentication
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 import os
+import requests
 from dotenv import load_dotenv
 
+from ...core.metrics import spotify_requests, spotify_rate_limited, spotify_latency
+from ...core.tracing import traced_session
+
 # Load environment variables
 load_dotenv()
 
+# Optional stand-in (e.g. the offline replay client in evaluation/replay)
+_client_factory = None
+
+
+def set_spotify_client_factory(factory):
+    """Route get_spotify_client() through factory(); pass None to restore the real client"""
+    global _client_factory
+    _client_factory = factory
+
+
+def _record_response(response, *args, **kwargs):
+    """Count every Web API response, including the 429/5xx ones spotipy's retries absorbed"""
+    retries = getattr(response.raw, "retries", None)
+    statuses = [h.status for h in (retries.history if retries else ()) if h.status]
+    statuses.append(response.status_code)
+    for status in statuses:
+        spotify_requests.inc(status=str(status))
+    rate_limited = statuses.count(429)
+    if rate_limited:
+        spotify_rate_limited.inc(rate_limited)
+    spotify_latency.observe(response.elapsed.total_seconds())
+
+
+def instrument_spotify_client(sp):
+    """Trace and count a client's Web API calls, keeping spotipy's retrying session"""
+    session = getattr(sp, "_session", None)
+    if isinstance(session, requests.Session):
+        traced_session(session)
+        session.hooks["response"].append(_record_response)
+    return sp
+
+
 def get_spotify_client():
     """Get authenticated Spotify client"""
+    if _client_factory is not None:
+        return _client_factory()
+
     scope = "user-top-read playlist-read-private user-read-recently-played user-library-read user-follow-read user-follow-modify playlist-modify-public playlist-modify-private user-read-private"
     
     sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
@@ -21,4 +60,4 @@ def get_spotify_client():
         scope=scope,
         cache_path=".spotify_cache"
     ))
-    return sp
+    return instrument_spotify_client(sp)
@@ -2,8 +2,110 @@
 Spotify tools for playlist-related operations
 """
 
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
 from langchain_core.tools import tool
 from .base import get_spotify_client
+from ..database_search_tool import get_searcher
+from .track_resolver import get_track_resolver
+from ...utils.cache import normalize_query
+
+# Spotify accepts at most 100 items per playlist add or remove request
+PLAYLIST_ADD_BATCH = 100
+MAX_VIBE_PLAYLIST_TRACKS = 200
+
+# Concurrent track lookups for the bulk playlist tools
+SPOTIFY_RESOLVE_WORKERS = int(os.getenv("SPOTIFY_RESOLVE_WORKERS", "8"))
+_pool_lock = threading.Lock()
+_resolve_pool = None
+
+
+def _track_uris(sp, tracks):
+    """Spotify URIs for search results, in order and without repeats, plus how many needed a Spotify search"""
+    resolver = get_track_resolver()
+    uris, searched = [], 0
+    for track in tracks:
+        lead_artist = track["artists"].split(";")[0].split(",")[0]
+        found = resolver.resolve(sp, track["track_name"], lead_artist, track_id=track.get("track_id") or "")
+        searched += bool(found) and found["source"] == "search"
+        if found and found["uri"] not in uris:
+            uris.append(found["uri"])
+    return uris, searched
+
+
+def _split_request(text: str) -> Tuple[str, str]:
+    """("Song", "Artist") from "Song by Artist"; the artist is "" when not given"""
+    name, sep, artist = text.strip().rpartition(" by ")
+    return (name.strip(), artist.strip()) if sep and name.strip() else (text.strip(), "")
+
+
+def _resolve_tracks(sp, wanted: List[str]) -> List[Optional[Dict]]:
+    """Spotify matches for "Song by Artist" requests, searched concurrently (None where nothing matched)"""
+    global _resolve_pool
+    with _pool_lock:
+        if _resolve_pool is None:
+            _resolve_pool = ThreadPoolExecutor(max_workers=SPOTIFY_RESOLVE_WORKERS, thread_name_prefix="spotify")
+
+    resolver = get_track_resolver()
+
+    def resolve(text):
+        return resolver.resolve(sp, *_split_request(text))
+
+    def in_caller_context(text):
+        # Worker threads start with empty contextvars; run each lookup in a copy of the caller's
+        # so its Spotify calls stay inside the request's trace and deadline
+        return context.copy().run(resolve, text)
+
+    context = contextvars.copy_context()
+
+    # Search each distinct request once
+    unique = {}
+    for text in wanted:
+        unique.setdefault(normalize_query(text), text)
+    found = dict(zip(unique, _resolve_pool.map(in_caller_context, unique.values())))
+    return [found[normalize_query(text)] for text in wanted]
+
+
+def _find_playlist_id(sp, playlist_name: str, playlist_id: str) -> Tuple[str, str]:
+    """(playlist id, "") or ("", message explaining why the playlist could not be found)"""
+    if playlist_id:
+        return playlist_id, ""
+    if not playlist_name:
+        return "", "Please provide either playlist_name or playlist_id."
+    for playlist in sp.current_user_playlists(limit=50)['items']:
+        if playlist_name.lower() in playlist['name'].lower():
+            return playlist['id'], ""
+    return "", f"No playlist found matching '{playlist_name}'. Use get_playlist_names to see your playlists."
+
+
+def _playlist_contents(sp, playlist_id: str) -> Tuple[str, str, List[Dict]]:
+    """(name, snapshot_id, tracks) of a playlist, fetching 100 tracks per request"""
+    playlist = sp.playlist(playlist_id, fields="name,snapshot_id,tracks(next,items(track(uri,name,artists(name))))")
+    page, tracks = playlist['tracks'], []
+    while page:
+        tracks.extend(item['track'] for item in page['items'] if item.get('track') and item['track'].get('uri'))
+        page = sp.next(page) if page.get('next') else None
+    return playlist['name'], playlist['snapshot_id'], tracks
+
+
+def _bulk_summary(verb: str, preposition: str, playlist_name: str, done: List[str], missing: List[str],
+                  already: List[str] = ()) -> str:
+    """One confirmation message for a bulk playlist edit"""
+    if done:
+        lines = [f"✅ {verb} {len(done)} track{'s' if len(done) != 1 else ''} {preposition} playlist **{playlist_name}**:"]
+        lines += [f"• {track}" for track in done]
+    else:
+        lines = [f"No tracks were {verb.lower()} {preposition} playlist **{playlist_name}**."]
+    if already:
+        lines.append("\nAlready in the playlist: " + ", ".join(already))
+    if missing:
+        lines.append("\nCould not find: " + ", ".join(missing))
+    return "\n".join(lines)
+
 
 @tool
 def get_playlist_names() -> str:
@@ -519,34 +621,18 @@ def add_track_to_playlist(playlist_name: str = "", playlist_id: str = "", track_
         if not track_name:
             return "Please provide track_name to add to the playlist."
         
-        search_query = f"track:{track_name}"
-        if artist_name:
-            search_query += f" artist:{artist_name}"
-        
-        search_results = sp.search(q=search_query, type='track', limit=5)
-        
-        if not search_results['tracks']['items']:
-            # Try broader search
-            search_query = f"{track_name}"
-            if artist_name:
-                search_query += f" {artist_name}"
-            search_results = sp.search(q=search_query, type='track', limit=5)
-            
-            if not search_results['tracks']['items']:
-                return f"Could not find track '{track_name}'{' by ' + artist_name if artist_name else ''} on Spotify."
-        
-        # Get the best match (first result)
-        track = search_results['tracks']['items'][0]
-        track_uri = track['uri']
-        track_artists = ', '.join([artist['name'] for artist in track['artists']])
+        # Catalogue tracks already carry their Spotify id; others are searched (and cached)
+        track = get_track_resolver().resolve(sp, track_name, artist_name)
+        if track is None:
+            return f"Could not find track '{track_name}'{' by ' + artist_name if artist_name else ''} on Spotify."
         
         # Add track to playlist
-        sp.playlist_add_items(target_playlist_id, [track_uri])
+        sp.playlist_add_items(target_playlist_id, [track['uri']])
         
         # Get playlist info for confirmation
         playlist_info = sp.playlist(target_playlist_id)
         
-        return f"✅ Successfully added **{track['name']}** by **{track_artists}** to playlist **{playlist_info['name']}**!"
+        return f"✅ Successfully added **{track['name']}** by **{track['artists']}** to playlist **{playlist_info['name']}**!"
         
     except Exception as e:
         return f"Error adding track to playlist: {str(e)}"
@@ -661,3 +747,145 @@ def search_and_add_to_playlist(query: str, playlist_name: str = "", playlist_id:
         
     except Exception as e:
         return f"Error searching and adding track to playlist: {str(e)}"
+
+@tool
+def build_playlist_from_vibe(vibe: str, num_tracks: int = 25, playlist_name: str = "",
+                             description: str = "", public: bool = False) -> str:
+    """Create a new playlist filled with tracks matching a vibe or mood, in one step.
+    
+    Use this instead of searching and adding tracks one by one when the user asks for a themed
+    playlist ("make me a rainy day playlist", "build a 40-song workout playlist").
+    
+    Args:
+        vibe: Description of the music (e.g. "chill acoustic evening", "high energy workout")
+        num_tracks: Number of tracks to include (1-200, default 25)
+        playlist_name: Name of the new playlist (default: the vibe, title-cased)
+        description: Playlist description (optional)
+        public: Whether the playlist should be public (default: False)
+    """
+    try:
+        num_tracks = max(1, min(num_tracks, MAX_VIBE_PLAYLIST_TRACKS))
+        tracks = get_searcher().search_similar_music(vibe, top_k=num_tracks, diversify=True)
+        if not tracks:
+            return f"Couldn't find any tracks matching '{vibe}' for a playlist."
+        
+        sp = get_spotify_client()
+        uris, searched = _track_uris(sp, tracks)
+        if not uris:
+            return f"Found tracks matching '{vibe}', but none of them could be matched on Spotify."
+        
+        name = playlist_name or vibe.strip().title()[:100]
+        user = sp.current_user()
+        playlist = sp.user_playlist_create(
+            user=user['id'],
+            name=name,
+            public=public,
+            description=description or f"Built from the vibe: {vibe}"
+        )
+        for start in range(0, len(uris), PLAYLIST_ADD_BATCH):
+            sp.playlist_add_items(playlist['id'], uris[start:start + PLAYLIST_ADD_BATCH])
+        print(f"[Playlists] Built '{name}' with {len(uris)} tracks "
+              f"({searched} Spotify searches, {(len(uris) - 1) // PLAYLIST_ADD_BATCH + 1} add requests)")
+        
+        listed = [f"{idx}. {track['track_name']} by {track['artists']}" for idx, track in enumerate(tracks[:10], 1)]
+        if len(tracks) > 10:
+            listed.append(f"...and {len(tracks) - 10} more")
+        response = f"✅ Created playlist **{name}** with {len(uris)} tracks!\n- ID: {playlist['id']}\n\n" + "\n".join(listed)
+        url = playlist.get('external_urls', {}).get('spotify')
+        if url:
+            response += f"\n\n🎧 [Open in Spotify]({url})"
+        return response
+        
+    except Exception as e:
+        return f"Error building playlist: {str(e)}"
+
+
+@tool
+def add_tracks_to_playlist(tracks: List[str], playlist_name: str = "", playlist_id: str = "") -> str:
+    """Add several tracks to a playlist in one step, skipping tracks already in it.
+    
+    Prefer this over calling add_track_to_playlist repeatedly whenever more than one song is added.
+    
+    Args:
+        tracks: Songs to add, each as "Song by Artist" (or just the song name)
+        playlist_name: Name of the playlist to add to
+        playlist_id: Spotify ID of the playlist (more precise than name)
+    """
+    try:
+        if not tracks:
+            return "Please provide at least one track to add."
+        sp = get_spotify_client()
+        target_playlist_id, problem = _find_playlist_id(sp, playlist_name, playlist_id)
+        if problem:
+            return problem
+        
+        # The current contents drive the dedupe; adds only append, so they need no snapshot_id
+        name, _, existing = _playlist_contents(sp, target_playlist_id)
+        present = {track['uri'] for track in existing}
+        
+        added, uris, already, missing = [], [], [], []
+        for request, found in zip(tracks, _resolve_tracks(sp, tracks)):
+            if found is None:
+                missing.append(request)
+            elif found['uri'] in present:
+                already.append(f"{found['name']} by {found['artists']}")
+            else:
+                present.add(found['uri'])
+                uris.append(found['uri'])
+                added.append(f"**{found['name']}** by {found['artists']}")
+        
+        for start in range(0, len(uris), PLAYLIST_ADD_BATCH):
+            sp.playlist_add_items(target_playlist_id, uris[start:start + PLAYLIST_ADD_BATCH])
+        print(f"[Playlists] Added {len(uris)} of {len(tracks)} tracks to '{name}' "
+              f"({len(already)} already present, {len(missing)} not found)")
+        
+        return _bulk_summary("Added", "to", name, added, missing, already)
+        
+    except Exception as e:
+        return f"Error adding tracks to playlist: {str(e)}"
+
+
+@tool
+def remove_tracks_from_playlist(tracks: List[str], playlist_name: str = "", playlist_id: str = "") -> str:
+    """Remove several tracks from a playlist in one step.
+    
+    Prefer this over calling remove_track_from_playlist repeatedly whenever more than one song is removed.
+    
+    Args:
+        tracks: Songs to remove, each as "Song by Artist" (or just the song name)
+        playlist_name: Name of the playlist to remove from
+        playlist_id: Spotify ID of the playlist (more precise than name)
+    """
+    try:
+        if not tracks:
+            return "Please provide at least one track to remove."
+        sp = get_spotify_client()
+        target_playlist_id, problem = _find_playlist_id(sp, playlist_name, playlist_id)
+        if problem:
+            return problem
+        
+        name, snapshot_id, existing = _playlist_contents(sp, target_playlist_id)
+        
+        removed, uris, missing = [], [], []
+        for request in tracks:
+            track_name, artist_name = _split_request(request)
+            match = next((track for track in existing
+                          if track_name.lower() in track['name'].lower()
+                          and (not artist_name or any(artist_name.lower() in artist['name'].lower()
+                                                      for artist in track['artists']))), None)
+            if match is None:
+                missing.append(request)
+            elif match['uri'] not in uris:
+                uris.append(match['uri'])
+                removed.append(f"**{match['name']}** by {', '.join(artist['name'] for artist in match['artists'])}")
+        
+        for start in range(0, len(uris), PLAYLIST_ADD_BATCH):
+            result = sp.playlist_remove_all_occurrences_of_items(
+                target_playlist_id, uris[start:start + PLAYLIST_ADD_BATCH], snapshot_id=snapshot_id)
+            snapshot_id = (result or {}).get('snapshot_id', snapshot_id)
+        print(f"[Playlists] Removed {len(uris)} of {len(tracks)} tracks from '{name}' ({len(missing)} not found)")
+        
+        return _bulk_summary("Removed", "from", name, removed, missing)
+        
+    except Exception as e:
+        return f"Error removing tracks from playlist: {str(e)}"
@@ -4,41 +4,70 @@ Spotify tools for music recommendations
 
 from langchain_core.tools import tool
 from .base import get_spotify_client
+from .track_resolver import get_track_resolver
+from ..database_search_tool import get_searcher
+
+
+def _catalogue_recommendations(track_name: str, artist_name: str, limit: int):
+    """Nearest neighbours of the seed in the local catalogue, formatted like the Spotify results (None if absent)"""
+    try:
+        found = get_searcher().recommend_for_track(track_name, artist_name, top_k=limit)
+    except Exception as e:
+        print(f"[Recommendations] Local catalogue unavailable: {e}")
+        return None
+    if not found or not found[1]:
+        return None
+
+    seed, tracks = found
+    result = f"🎵 **Recommendations based on '{track_name}' by '{artist_name}':**\n\n"
+    result += f"**Found:** {seed['track_name']} by {seed['artists']}\n\n"
+    result += "📚 **Closest Matches in the Music Catalogue:**\n"
+    for idx, track in enumerate(tracks, 1):
+        features = track['audio_features']
+        valence = features['valence']
+        result += f"{idx}. **{track['track_name']}** by {track['artists']}\n"
+        result += f"   🎭 Vibe: {'Upbeat' if valence > 0.6 else 'Chill' if valence > 0.4 else 'Mellow'} | "
+        result += (f"⚡ Energy: {round(features['energy'], 2)} | 💃 Danceability: {round(features['danceability'], 2)} | "
+                   f"🥁 Tempo: {round(features['tempo'])} BPM\n\n")
+    result += f"\n🎯 Found {len(tracks)} similar tracks in the local music catalogue."
+    return result
+
 
 @tool
 def get_recommendations_by_track(track_name: str, artist_name: str, limit: int = 10) -> str:
-    """Get Spotify recommendations based on a specific track and artist.
+    """Get recommendations based on a specific track and artist.
     
-    Use this tool when a user asks for songs similar to a specific track that's not found 
-    in the local database. This searches Spotify for the track and uses alternative methods
-    to find similar music.
+    Use this tool when a user asks for songs similar to a specific track. Tracks in the local
+    music catalogue are answered instantly from their nearest neighbours; otherwise this searches
+    Spotify for the track and uses alternative methods to find similar music.
     
     Args:
         track_name: Name of the seed track
         artist_name: Name of the seed artist  
         limit: Number of recommendations to return (1-50)
     """
+    local = _catalogue_recommendations(track_name, artist_name, limit)
+    if local:
+        return local
+
     try:
         sp = get_spotify_client()
         
-        # First, search for the seed track on Spotify
-        search_query = f"track:{track_name} artist:{artist_name}"
-        search_results = sp.search(q=search_query, type='track', limit=1)
-        
-        if not search_results['tracks']['items']:
-            # Try a broader search without field restrictions
-            search_query = f"{track_name} {artist_name}"
-            search_results = sp.search(q=search_query, type='track', limit=1)
-            
-            if not search_results['tracks']['items']:
-                return f"Could not find '{track_name}' by '{artist_name}' on Spotify."
-        
-        seed_track = search_results['tracks']['items'][0]
+        # Find the seed track (catalogue id map first, then a cached Spotify search)
+        seed_track = get_track_resolver().resolve(sp, track_name, artist_name)
+        if seed_track is None:
+            return f"Could not find '{track_name}' by '{artist_name}' on Spotify."
         seed_track_id = seed_track['id']
-        seed_artist_id = seed_track['artists'][0]['id']
+        seed_artist_ids = []
+
+        def seed_artist_id():
+            """Looked up only for the strategies that need it"""
+            if not seed_artist_ids:
+                seed_artist_ids.append(sp.track(seed_track_id)['artists'][0]['id'])
+            return seed_artist_ids[0]
         
         result = f"🎵 **Recommendations based on '{track_name}' by '{artist_name}':**\n\n"
-        result += f"**Found:** {seed_track['name']} by {seed_track['artists'][0]['name']}\n\n"
+        result += f"**Found:** {seed_track['name']} by {seed_track['artists']}\n\n"
         
         recommendations = []
         
@@ -51,7 +80,7 @@ def get_recommendations_by_track(track_name: str, artist_name: str, limit: int =
         except:
             # Strategy 2: Get related artists and their top tracks
             try:
-                related_artists = sp.artist_related_artists(seed_artist_id)
+                related_artists = sp.artist_related_artists(seed_artist_id())
                 if related_artists['artists']:
                     result += "🎯 **Similar Artists' Popular Tracks:**\n"
                     for artist in related_artists['artists'][:3]:  # Top 3 related artists
@@ -83,7 +112,7 @@ def get_recommendations_by_track(track_name: str, artist_name: str, limit: int =
                         result += f"🎭 **Tracks with similar vibe ({mood}, {energy_level}):**\n"
                 except:
                     # Strategy 4: Fallback to artist's other tracks
-                    artist_albums = sp.artist_albums(seed_artist_id, album_type='album,single', limit=5)
+                    artist_albums = sp.artist_albums(seed_artist_id(), album_type='album,single', limit=5)
                     for album in artist_albums['items']:
                         album_tracks = sp.album_tracks(album['id'])
                         for track in album_tracks['items']:
@@ -130,15 +159,52 @@ def get_recommendations_by_track(track_name: str, artist_name: str, limit: int =
         print(f"Spotify recommendation error: {error_msg}")
         return error_msg
 
+def _preview_urls(track_ids):
+    """Spotify preview URLs for catalogue track ids, in one batched call (empty when Spotify is unavailable)"""
+    try:
+        sp = get_spotify_client()
+        tracks = sp.tracks(list(track_ids)[:50])['tracks']
+        return {track['id']: track.get('preview_url') for track in tracks if track}
+    except Exception as e:
+        print(f"[Recommendations] Skipping preview URLs: {e}")
+        return {}
+
+
+def _catalogue_feature_matches(targets: dict, genre: str, limit: int):
+    """Catalogue tracks closest to the targets, formatted like the Spotify results (None if none)"""
+    try:
+        tracks = get_searcher().match_audio_features(targets, top_k=limit, genre=genre)
+    except Exception as e:
+        print(f"[Recommendations] Local catalogue unavailable: {e}")
+        return None
+    if not tracks:
+        return None
+
+    previews = _preview_urls(track['track_id'] for track in tracks if track.get('track_id'))
+    feature_desc = [f"{name.title()}: {value}" for name, value in targets.items()]
+    if genre:
+        feature_desc.append(f"Genre: {genre}")
+    result = f"🎵 **Catalogue Recommendations for audio features:** {', '.join(feature_desc)}\n\n"
+    for idx, track in enumerate(tracks, 1):
+        features = track['audio_features']
+        result += f"{idx}. **{track['track_name']}** by {track['artists']}\n"
+        result += "   " + " | ".join(f"{name.title()}: {round(features[name], 2)}" for name in targets) + "\n"
+        if previews.get(track.get('track_id')):
+            result += f"   🎧 [Preview]({previews[track['track_id']]})\n"
+        result += "\n"
+    return result
+
+
 @tool  
 def get_recommendations_by_audio_features(danceability: float = None, energy: float = None, 
                                         valence: float = None, tempo: float = None,
                                         acousticness: float = None, instrumentalness: float = None,
-                                        limit: int = 10) -> str:
-    """Get Spotify recommendations based on specific audio characteristics.
+                                        limit: int = 10, genre: str = None) -> str:
+    """Get recommendations based on specific audio characteristics.
     
     Use this for getting recommendations based on desired musical attributes when 
-    no specific seed track is available.
+    no specific seed track is available. Answered from the local music catalogue
+    (closest tracks on the given attributes only); Spotify is used for preview links.
     
     Args:
         danceability: Target danceability (0.0-1.0)
@@ -148,30 +214,27 @@ def get_recommendations_by_audio_features(danceability: float = None, energy: fl
         acousticness: Target acousticness (0.0-1.0)
         instrumentalness: Target instrumentalness (0.0-1.0)
         limit: Number of recommendations (1-100)
+        genre: Optional genre to stay within (e.g. "jazz", "edm")
     """
+    targets = {}
+    for name, value, low, high in (("danceability", danceability, 0.0, 1.0), ("energy", energy, 0.0, 1.0),
+                                   ("valence", valence, 0.0, 1.0), ("tempo", tempo, 50, 200),
+                                   ("acousticness", acousticness, 0.0, 1.0),
+                                   ("instrumentalness", instrumentalness, 0.0, 1.0)):
+        if value is not None:
+            targets[name] = max(low, min(high, value))
+    local = _catalogue_feature_matches(targets, genre, limit) if targets else None
+    if local:
+        return local
+
     try:
         sp = get_spotify_client()
         
-        # Build target audio features dict
-        target_features = {}
-        if danceability is not None:
-            target_features['target_danceability'] = max(0.0, min(1.0, danceability))
-        if energy is not None:
-            target_features['target_energy'] = max(0.0, min(1.0, energy))
-        if valence is not None:
-            target_features['target_valence'] = max(0.0, min(1.0, valence))
-        if tempo is not None:
-            target_features['target_tempo'] = max(50, min(200, tempo))
-        if acousticness is not None:
-            target_features['target_acousticness'] = max(0.0, min(1.0, acousticness))
-        if instrumentalness is not None:
-            target_features['target_instrumentalness'] = max(0.0, min(1.0, instrumentalness))
-        
-        # Need at least one seed - use popular genres as backup
+        # Fallback when the catalogue has no match: Spotify needs a seed, so use the genre or popular genres
         recommendations = sp.recommendations(
-            seed_genres=['pop', 'indie'],
+            seed_genres=[genre] if genre else ['pop', 'indie'],
             limit=limit,
-            **target_features
+            **{f"target_{name}": value for name, value in targets.items()}
         )
         
         if not recommendations['tracks']:
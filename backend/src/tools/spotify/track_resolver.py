@@ -0,0 +1,136 @@
+"""
+Spotify tracks for (title, artist) pairs without a search call where possible.
+
+The catalogue's song_id column is the Spotify track id, so TrackResolver first
+looks the pair up in a title/artist -> id map built from the vibe searcher's
+TrackStore. Only misses go to Spotify search (`track:X artist:Y`, then a plain
+query), and those results are cached per normalized query. Every skipped
+search is counted in musicbot_spotify_searches_avoided_total.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...core.metrics import spotify_searches_avoided
+from ...utils.cache import LRUCache, normalize_query
+from ..track_store import TrackStore
+
+# Catalogue song_id values are Spotify track ids
+SPOTIFY_TRACK_ID = re.compile(r"^[0-9A-Za-z]{22}$")
+
+
+def _key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _track(track_id: str, name: str, artists: str, source: str) -> Dict[str, str]:
+    return {"id": track_id, "uri": f"spotify:track:{track_id}", "name": name, "artists": artists, "source": source}
+
+
+class TrackResolver:
+    """Catalogue id map in front of cached Spotify track searches"""
+
+    def __init__(self, tracks: Optional[TrackStore], cache: LRUCache):
+        self.tracks = tracks
+        self.cache = cache
+        self._by_title_artist: Dict[Tuple[str, str], int] = {}
+        self._by_title: Dict[str, int] = {}
+        if tracks is not None:
+            self._build_index(tracks)
+
+    def _build_index(self, tracks: TrackStore):
+        """(title, each credited artist) and title alone -> position, most popular version first"""
+        order = np.arange(len(tracks))
+        if "popularity" in tracks.columns:
+            order = np.argsort(-tracks.columns["popularity"], kind="stable")
+        for position in order:
+            position = int(position)
+            if not SPOTIFY_TRACK_ID.match(str(tracks.ids[position])):
+                continue
+            title = _key(tracks.names[position])
+            self._by_title.setdefault(title, position)
+            for artist in tracks.artists[position].split(";"):
+                self._by_title_artist.setdefault((title, _key(artist)), position)
+
+    def from_catalogue(self, track_name: str, artist_name: str = "") -> Optional[Dict[str, str]]:
+        """The catalogue track with this exact title (by this artist, when given), or None"""
+        title = _key(track_name)
+        if artist_name:
+            position = self._by_title_artist.get((title, _key(artist_name)))
+        else:
+            position = self._by_title.get(title)
+        if position is None:
+            return None
+        return _track(str(self.tracks.ids[position]), self.tracks.names[position],
+                      ", ".join(self.tracks.artists[position].split(";")), "catalogue")
+
+    def resolve(self, sp, track_name: str, artist_name: str = "", track_id: str = "") -> Optional[Dict[str, str]]:
+        """{"id", "uri", "name", "artists", "source"} for a track, or None when Spotify has no match.
+
+        A known Spotify track_id (e.g. a catalogue search result) is used as is.
+        """
+        if track_id and SPOTIFY_TRACK_ID.match(track_id):
+            spotify_searches_avoided.inc(source="catalogue")
+            return _track(track_id, track_name, artist_name, "catalogue")
+        found = self.from_catalogue(track_name, artist_name)
+        if found is not None:
+            spotify_searches_avoided.inc(source="catalogue")
+            return found
+        if artist_name:
+            return self.search(sp, f"track:{track_name} artist:{artist_name}", fallback=f"{track_name} {artist_name}")
+        return self.search(sp, track_name)
+
+    def search(self, sp, query: str, fallback: str = "") -> Optional[Dict[str, str]]:
+        """Best Spotify match for query (then fallback), cached per normalized query"""
+        key = normalize_query(query)
+        found = self.cache.get(key)
+        if found is not None:
+            spotify_searches_avoided.inc(source="cache")
+            return dict(found, source="cache") if found else None
+        found = ""
+        for q in filter(None, (query, fallback)):
+            items = sp.search(q=q, type="track", limit=1)["tracks"]["items"]
+            if items:
+                track = items[0]
+                found = _track(track["id"], track["name"], ", ".join(a["name"] for a in track["artists"]), "search")
+                break
+        self.cache.put(key, found)
+        return found or None
+
+    def search_tracks(self, sp, query: str, limit: int = 10) -> List[Dict]:
+        """Up to limit Spotify search results for query ({"id", "name", "artists", "popularity"}), cached"""
+        key = f"{limit}|{normalize_query(query)}"
+        found = self.cache.get(key)
+        if found is not None:
+            spotify_searches_avoided.inc(source="cache")
+            return found
+        found = [{"id": track["id"], "name": track["name"],
+                  "artists": ", ".join(a["name"] for a in track["artists"]), "popularity": track.get("popularity", 0)}
+                 for track in sp.search(q=query, type="track", limit=limit)["tracks"]["items"]]
+        self.cache.put(key, found)
+        return found
+
+
+_search_cache = LRUCache(int(os.getenv("SPOTIFY_URI_CACHE_SIZE", "2048")), name="spotify_track_search")
+_resolver_lock = threading.Lock()
+_resolver: Optional[TrackResolver] = None
+
+
+def get_track_resolver() -> TrackResolver:
+    """Resolver over the current vibe searcher's catalogue (search only when it is unavailable)"""
+    from ..database_search_tool import get_searcher
+
+    global _resolver
+    tracks = None
+    try:
+        tracks = get_searcher().tracks
+    except Exception as e:
+        print(f"[TrackResolver] Catalogue unavailable, resolving with Spotify search only: {e}")
+    with _resolver_lock:
+        if _resolver is None or _resolver.tracks is not tracks:
+            _resolver = TrackResolver(tracks, _search_cache)
+        return _resolver
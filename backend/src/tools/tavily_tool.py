@@ -1,6 +1,122 @@
 from langchain_core.tools import tool
 import requests
+from requests.adapters import HTTPAdapter
+import contextvars
 import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
+from typing import Tuple
+
+from ..core.deadline import remaining
+from ..core.metrics import cache_saved_seconds, tavily_requests, tavily_latency, tavily_hedges, tavily_downgrades
+from ..core.tracing import traced_session
+from ..utils.cache import LRUCache, SQLiteStore, normalize_query
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+# Per-call timeout cap; the request budget (core.deadline) can only shorten it
+TAVILY_TIMEOUT_SECONDS = float(os.getenv("TAVILY_TIMEOUT_SECONDS", "10"))
+# Below this much remaining budget, search at "basic" depth (about 1s) instead of "advanced"
+TAVILY_ADVANCED_MIN_SECONDS = float(os.getenv("TAVILY_ADVANCED_MIN_SECONDS", "6"))
+# Below this much remaining budget, don't call Tavily at all
+TAVILY_MIN_SECONDS = float(os.getenv("TAVILY_MIN_SECONDS", "1"))
+# Fire a basic-depth hedge request when the first response takes longer than this (blank/0 = off)
+TAVILY_HEDGE_AFTER_SECONDS = float(os.getenv("TAVILY_HEDGE_AFTER_SECONDS", "4") or 0)
+TAVILY_MAX_CONNECTIONS = int(os.getenv("TAVILY_MAX_CONNECTIONS", "10"))
+
+# Answers are cached per normalized query: a week for biographies and history,
+# an hour for questions about news, tours and releases
+TAVILY_CACHE_TTL_SECONDS = float(os.getenv("TAVILY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+TAVILY_NEWS_CACHE_TTL_SECONDS = float(os.getenv("TAVILY_NEWS_CACHE_TTL_SECONDS", "3600"))
+TIME_SENSITIVE = re.compile(
+    r"\b(news|latest|new|recent(ly)?|upcoming|tours?|touring|concerts?|tickets?|dates?|festivals?|"
+    r"today|tonight|this (week|month|year)|announced?|releas(e|es|ed|ing)|20\d\d)\b"
+)
+
+
+def cache_ttl(query: str) -> float:
+    """Seconds a web answer for this query stays fresh"""
+    return TAVILY_NEWS_CACHE_TTL_SECONDS if TIME_SENSITIVE.search(query.lower()) else TAVILY_CACHE_TTL_SECONDS
+
+
+def _build_cache() -> LRUCache:
+    """In-memory LRU, written through to SQLite when TAVILY_CACHE_DB_PATH is set"""
+    store = None
+    path = os.getenv("TAVILY_CACHE_DB_PATH")
+    if path:
+        try:
+            store = SQLiteStore(path, table="tavily_cache")
+        except Exception as e:
+            print(f"[Tavily] Could not open cache database {path}, caching in memory only: {e}")
+    return LRUCache(int(os.getenv("TAVILY_CACHE_SIZE", "256")), name="tavily", store=store)
+
+
+_search_cache = _build_cache()
+
+_session_lock = threading.Lock()
+_session = None
+_hedge_pool = None
+
+
+def _shared_session() -> requests.Session:
+    """Keep-alive session (and hedge thread pool) shared by every Tavily call"""
+    global _session, _hedge_pool
+    with _session_lock:
+        if _session is None:
+            session = traced_session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=TAVILY_MAX_CONNECTIONS))
+            _hedge_pool = ThreadPoolExecutor(max_workers=2 * TAVILY_MAX_CONNECTIONS, thread_name_prefix="tavily")
+            _session = session
+    return _session
+
+
+def _post(api_key: str, payload: dict, timeout: float) -> requests.Response:
+    return _shared_session().post(
+        TAVILY_SEARCH_URL,
+        headers={"Authorization": f"Bearer {api_key}"},
+        json=payload,
+        timeout=timeout,
+    )
+
+
+def _hedged_post(api_key: str, payload: dict, timeout: float) -> Tuple[requests.Response, str]:
+    """POST, plus a basic-depth duplicate if no response arrives within TAVILY_HEDGE_AFTER_SECONDS.
+
+    Returns the response used and its search depth. The first successful response wins;
+    the slower request finishes in the background.
+    """
+    hedge_after = TAVILY_HEDGE_AFTER_SECONDS
+    if not hedge_after or hedge_after >= timeout - TAVILY_MIN_SECONDS:
+        return _post(api_key, payload, timeout), payload["search_depth"]
+
+    _shared_session()
+    # Copy the context so the requests are traced under the caller's span
+    primary = _hedge_pool.submit(contextvars.copy_context().run, _post, api_key, payload, timeout)
+    try:
+        return primary.result(timeout=hedge_after), payload["search_depth"]
+    except FuturesTimeout:
+        pass
+
+    hedge_payload = dict(payload, search_depth="basic")
+    hedge = _hedge_pool.submit(contextvars.copy_context().run, _post, api_key, hedge_payload, timeout - hedge_after)
+    pending = {primary: ("primary", payload), hedge: ("hedge", hedge_payload)}
+    response, depth, error = None, None, None
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            winner, sent = pending.pop(future)
+            try:
+                response, depth = future.result(), sent["search_depth"]
+            except requests.exceptions.RequestException as e:
+                error = error or e
+                continue
+            if response.status_code == 200:
+                tavily_hedges.inc(winner=winner)
+                return response, depth
+    if response is not None:
+        return response, depth
+    raise error
 
 @tool
 def search_music_info(query: str) -> str:
@@ -10,6 +126,12 @@ def search_music_info(query: str) -> str:
     if not api_key:
         return "Tavily API key not configured. Please set TAVILY_API_KEY environment variable to enable music information search. For now, I can help you with your Spotify data instead!"
     
+    cache_key = normalize_query(query)
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        cache_saved_seconds.inc(cached["seconds"], cache="tavily")
+        return cached["answer"]
+    
     # Enhance music-related queries with context
     music_enhanced_query = query
     if any(word in query.lower() for word in ["who is", "whos", "tell me about"]):
@@ -17,38 +139,46 @@ def search_music_info(query: str) -> str:
         if not any(music_word in query.lower() for music_word in ["artist", "musician", "singer", "rapper", "band", "music"]):
             music_enhanced_query = f"{query} artist musician music"
     
+    # Fit the call into what is left of the chat request's budget
+    budget = remaining()
+    timeout = TAVILY_TIMEOUT_SECONDS if budget is None else min(TAVILY_TIMEOUT_SECONDS, budget)
+    if timeout < TAVILY_MIN_SECONDS:
+        tavily_downgrades.inc(action="skipped")
+        return "I ran out of time to search the web for that one. Ask me again and I'll look it up!"
+    search_depth = "advanced"
+    if budget is not None and budget < TAVILY_ADVANCED_MIN_SECONDS:
+        search_depth = "basic"
+        tavily_downgrades.inc(action="basic")
+    
+    start = time.perf_counter()
     try:
-        response = requests.post(
-            "https://api.tavily.com/search",
-            headers={"Authorization": f"Bearer {api_key}"},
-            json={
+        response, search_depth = _hedged_post(
+            api_key,
+            {
                 "query": music_enhanced_query,
-                "search_depth": "advanced",
+                "search_depth": search_depth,
                 "include_answer": True,
                 "max_results": 8,  # Increased for better music results
                 "include_domains": ["spotify.com", "genius.com", "allmusic.com", "musicbrainz.org", "last.fm", "bandcamp.com", "soundcloud.com"]  # Music-focused domains
             },
-            timeout=10
+            timeout,
         )
+        elapsed = time.perf_counter() - start
+        tavily_latency.observe(elapsed)
+        tavily_requests.inc(status=str(response.status_code))
         
         if response.status_code == 200:
             data = response.json()
-            answer = data.get("answer", "")
-            results = data.get("results", [])
-            
-            if answer:
-                return f"🎵 {answer}"
-            elif results:
-                # If no direct answer, compile info from search results
-                info_pieces = []
-                for result in results[:3]:  # Use top 3 results
-                    if result.get("content"):
-                        info_pieces.append(result["content"][:200] + "...")
-                
-                if info_pieces:
-                    return f"Based on my search: " + " ".join(info_pieces)
-            
-            return f"I searched for '{query}' but couldn't find detailed information. The search completed but returned limited results."
+            answer = _format_answer(query, data)
+            if not _has_content(data):
+                # An empty result may just be a bad moment; search again next time
+                return answer
+            ttl = cache_ttl(query)
+            if search_depth == "basic":
+                # Let a full-depth answer replace a downgraded or hedged one soon
+                ttl = min(ttl, TAVILY_NEWS_CACHE_TTL_SECONDS)
+            _search_cache.put(cache_key, {"answer": answer, "seconds": round(elapsed, 3)}, ttl=ttl)
+            return answer
         
         elif response.status_code == 401:
             return "Tavily API authentication failed. Please check the API key configuration."
@@ -56,8 +186,35 @@ def search_music_info(query: str) -> str:
             return f"Search service returned error {response.status_code}. Unable to fetch music information at the moment."
             
     except requests.exceptions.Timeout:
+        tavily_requests.inc(status="timeout")
         return "Search request timed out. Please try again with a simpler query."
     except requests.exceptions.RequestException as e:
+        tavily_requests.inc(status="network_error")
         return f"Network error while searching: {str(e)}"
     except Exception as e:
         return f"Unexpected error during search: {str(e)}"
+
+
+def _has_content(data: dict) -> bool:
+    """Whether a Tavily response has an answer or result text for _format_answer to use"""
+    return bool(data.get("answer")) or any(result.get("content") for result in data.get("results", [])[:3])
+
+
+def _format_answer(query: str, data: dict) -> str:
+    """Tool output for a successful Tavily response"""
+    answer = data.get("answer", "")
+    results = data.get("results", [])
+    
+    if answer:
+        return f"🎵 {answer}"
+    elif results:
+        # If no direct answer, compile info from search results
+        info_pieces = []
+        for result in results[:3]:  # Use top 3 results
+            if result.get("content"):
+                info_pieces.append(result["content"][:200] + "...")
+        
+        if info_pieces:
+            return f"Based on my search: " + " ".join(info_pieces)
+    
+    return f"I searched for '{query}' but couldn't find detailed information. The search completed but returned limited results."
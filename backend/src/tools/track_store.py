@@ -0,0 +1,278 @@
+"""
+Compact, column-oriented track metadata for the vibe searcher.
+
+TrackStore keeps one numpy array per field instead of a pandas frame: interned
+strings for ids/names/artists/albums, uint8 genre codes, uint8/uint32/float32 numeric
+columns. Search results are materialized from a row position through
+TrackRecord (__slots__) without touching pandas.
+"""
+
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Numeric columns that fit a smaller integer type (everything else is float32)
+INTEGER_COLUMNS = {
+    "song_popularity": np.uint8,
+    "song_key": np.int8,
+    "song_mode": np.uint8,
+    "song_time_signature": np.uint8,
+    "song_duration_ms": np.uint32,
+}
+
+# Audio features included in every search result
+RESULT_FEATURES = ("danceability", "energy", "valence", "acousticness", "instrumentalness", "tempo")
+
+# Columns search can be restricted on: (low, high) ranges, or True/False for explicit
+FILTERABLE_FEATURES = ("danceability", "energy", "valence", "tempo", "acousticness", "instrumentalness",
+                       "popularity", "explicit")
+
+# " - Acoustic", " (Live)", " [Remastered]" suffixes that mark another version of the same title
+_VERSION_SUFFIX = re.compile(r"\s*(?:[-–]\s.*|[(\[].*)$")
+
+# Audio features a recommendation request can target (nearest_by_features)
+TARGET_FEATURES = ("danceability", "energy", "valence", "tempo", "acousticness", "instrumentalness")
+
+
+def _interned(values) -> np.ndarray:
+    return np.array([sys.intern(str(v)) for v in values], dtype=object)
+
+
+def _joined_lower(values) -> Tuple[str, np.ndarray, np.ndarray]:
+    """Distinct lowercased values joined by newlines, each one's start offset in that text,
+    and the distinct-value code of every row"""
+    codes, distinct = pd.factorize(pd.Series([value.lower() for value in values], dtype=object))
+    lengths = np.fromiter((len(value) + 1 for value in distinct), dtype=np.int64, count=len(distinct))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    return "\n".join(distinct), starts, codes.astype(np.int32)
+
+
+def _haystack_bytes(haystack) -> int:
+    text, starts, codes = haystack
+    return sys.getsizeof(text) + starts.nbytes + codes.nbytes
+
+
+class TrackRecord:
+    """One track's result fields"""
+
+    __slots__ = ("position", "track_id", "name", "artists", "genre", "popularity", "features")
+
+    def __init__(self, position: int, track_id: str, name: str, artists: str, genre: Optional[str],
+                 popularity: Optional[int], features: Dict[str, float]):
+        self.position = position
+        self.track_id = track_id
+        self.name = name
+        self.artists = artists
+        self.genre = genre
+        self.popularity = popularity
+        self.features = features
+
+
+class TrackStore:
+    """Array-backed track metadata, addressed by row position"""
+
+    def __init__(self, ids: np.ndarray, names: np.ndarray, artists: np.ndarray, albums: np.ndarray,
+                 genre_codes: np.ndarray, genres: List[str], columns: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.names = names
+        self.artists = artists
+        self.albums = albums
+        self.genre_codes = genre_codes
+        self.genres = genres
+        self.columns = columns
+        # Lowercased, newline-joined distinct values for the substring lookups behind "songs like X by Y":
+        # one C-level scan of the text instead of a Python `in` per row
+        self._haystacks = {"name": _joined_lower(names), "artists": _joined_lower(artists)}
+        self._genre_index = {genre.lower(): code for code, genre in enumerate(genres)}
+        # field -> (row order, sorted values), built on first use by range_mask()
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # Per-row codes of the lead artist and of the title without version suffixes, built on first use
+        self._lead_artist_codes: Optional[np.ndarray] = None
+        self._base_title_codes: Optional[np.ndarray] = None
+        # field -> (z-scored float32 values, mean, std), built on first use by nearest_by_features()
+        self._standardized: Dict[str, Tuple[np.ndarray, float, float]] = {}
+
+    @classmethod
+    def from_frame(cls, song_data: pd.DataFrame) -> "TrackStore":
+        """Build from the searcher's preprocessed song_data frame"""
+        n = len(song_data)
+        ids = _interned(song_data["song_id"]) if "song_id" in song_data else np.array([""] * n, dtype=object)
+        albums = _interned(song_data["song_album_name"].fillna("")) if "song_album_name" in song_data else \
+            np.array([""] * n, dtype=object)
+        genre_values = song_data["song_genre"].fillna("") if "song_genre" in song_data else pd.Series([""] * n)
+        genre_codes, genres = pd.factorize(genre_values.astype(str))
+        code_type = np.uint8 if len(genres) <= np.iinfo(np.uint8).max else np.uint16
+
+        columns = {}
+        for column in song_data.columns:
+            if not column.startswith("song_") or song_data[column].dtype.kind not in "ifb":
+                continue
+            values = song_data[column].to_numpy()
+            if song_data[column].dtype.kind == "b":
+                columns[column[5:]] = values.astype(np.bool_)
+            elif column in INTEGER_COLUMNS:
+                columns[column[5:]] = np.nan_to_num(values).round().astype(INTEGER_COLUMNS[column])
+            else:
+                columns[column[5:]] = values.astype(np.float32)
+
+        return cls(
+            ids=ids,
+            names=_interned(song_data["song_name"]),
+            artists=_interned(song_data["song_artists"]),
+            albums=albums,
+            genre_codes=genre_codes.astype(code_type),
+            genres=[sys.intern(str(g)) for g in genres],
+            columns=columns,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def genre_of(self, position: int) -> Optional[str]:
+        return self.genres[self.genre_codes[position]] or None
+
+    def genre_mask(self, genre: str) -> np.ndarray:
+        code = self._genre_index.get(genre.lower())
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.genre_codes == code
+
+    def contains(self, field: str, needle: str) -> np.ndarray:
+        """Rows whose lowercased name/artists contain needle (a lowercase substring)"""
+        text, starts, codes = self._haystacks["name" if field == "name" else "artists"]
+        if not needle or "\n" in needle:
+            return np.full(len(self), not needle, dtype=bool)
+        offsets = [match.start() for match in re.finditer(re.escape(needle), text)]
+        found = np.zeros(len(starts), dtype=bool)
+        # A match never spans the newline between values, so its offset names exactly one value
+        found[np.searchsorted(starts, offsets, side="right") - 1] = True
+        return found[codes]
+
+    def lead_artist_codes(self) -> np.ndarray:
+        """Per-row code of the first credited artist (lowercased); equal codes mean the same lead artist"""
+        if self._lead_artist_codes is None:
+            text, _, codes = self._haystacks["artists"]
+            leads = pd.Series(text.split("\n")).str.split(";").str[0].str.strip()
+            self._lead_artist_codes = pd.factorize(leads)[0].astype(np.int32)[codes]
+        return self._lead_artist_codes
+
+    def base_title_codes(self) -> np.ndarray:
+        """Per-row code of the lowercased title without a version suffix ("creep - acoustic" -> "creep")"""
+        if self._base_title_codes is None:
+            text, _, codes = self._haystacks["name"]
+            bases = pd.Series(text.split("\n")).str.replace(_VERSION_SUFFIX, "", regex=True)
+            self._base_title_codes = pd.factorize(bases)[0].astype(np.int32)[codes]
+        return self._base_title_codes
+
+    def same_name_mask(self, position: int) -> np.ndarray:
+        """Rows whose lowercased title equals the title at position"""
+        codes = self._haystacks["name"][2]
+        return codes == codes[position]
+
+    def range_mask(self, field: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Rows with low <= field <= high (either bound optional), via a sorted index and two binary searches"""
+        if field not in self._sorted:
+            values = self.columns[field]
+            order = np.argsort(values, kind="stable")
+            self._sorted[field] = (order, values[order])
+        order, sorted_values = self._sorted[field]
+
+        if sorted_values.dtype.kind == "f":
+            # Compare at column precision so 0.7 matches a stored float32(0.7)
+            low = None if low is None else sorted_values.dtype.type(low)
+            high = None if high is None else sorted_values.dtype.type(high)
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        end = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side="right")
+
+        mask = np.zeros(len(self), dtype=bool)
+        mask[order[start:end]] = True
+        return mask
+
+    def filter_mask(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """AND of the filters, e.g. {"danceability": (0.7, None), "tempo": (120, 130), "explicit": False}.
+
+        Returns None when there is nothing to filter on.
+        """
+        mask = None
+        for field, condition in filters.items():
+            if field not in FILTERABLE_FEATURES:
+                raise ValueError(f"Cannot filter on {field!r}; expected one of {', '.join(FILTERABLE_FEATURES)}")
+            if field not in self.columns:
+                raise ValueError(f"The catalogue has no {field} column")
+            if field == "explicit":
+                field_mask = self.columns[field] == bool(condition)
+            else:
+                low, high = condition
+                if low is None and high is None:
+                    continue
+                if low is not None and high is not None and low > high:
+                    raise ValueError(f"Empty {field} range: {low} > {high}")
+                field_mask = self.range_mask(field, low, high)
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
+
+    def _standardized_column(self, field: str) -> Tuple[np.ndarray, float, float]:
+        if field not in self._standardized:
+            values = self.columns[field].astype(np.float64)
+            mean, std = float(values.mean()), float(values.std()) or 1.0
+            self._standardized[field] = (((values - mean) / std).astype(np.float32), mean, std)
+        return self._standardized[field]
+
+    def nearest_by_features(self, targets: Dict[str, float], top_k: int,
+                            mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of the top_k rows closest to the target feature values, nearest first, with their distances.
+
+        Distance is the RMS difference in standard deviations over the targeted features only,
+        so an untargeted feature never pulls results toward its average.
+        """
+        unknown = [field for field in targets if field not in TARGET_FEATURES or field not in self.columns]
+        if unknown or not targets:
+            raise ValueError(f"Cannot target {unknown or 'nothing'}; expected some of {', '.join(TARGET_FEATURES)}")
+        distances = np.zeros(len(self), dtype=np.float32)
+        for field, target in targets.items():
+            values, mean, std = self._standardized_column(field)
+            distances += np.square(values - np.float32((target - mean) / std))
+        distances = np.sqrt(distances / len(targets))
+        if mask is not None:
+            distances[~mask] = np.inf
+        top_k = min(top_k, int(np.isfinite(distances).sum()))
+        if top_k <= 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        positions = np.argpartition(distances, top_k - 1)[:top_k] if top_k < len(self) else np.arange(len(self))
+        positions = positions[np.argsort(distances[positions], kind="stable")]
+        return positions, distances[positions]
+
+    def record(self, position: int) -> TrackRecord:
+        popularity = self.columns.get("popularity")
+        return TrackRecord(
+            position=position,
+            track_id=self.ids[position],
+            name=self.names[position],
+            artists=self.artists[position],
+            genre=self.genre_of(position),
+            popularity=int(popularity[position]) if popularity is not None else None,
+            # float32 -> float rounded so results read 0.721, not 0.7210000157
+            features={feature: round(float(self.columns[feature][position]), 6) if feature in self.columns else 0.0
+                      for feature in RESULT_FEATURES},
+        )
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Approximate bytes held per field (string payloads counted once per interned value)"""
+        def strings(array):
+            return array.nbytes + sum(sys.getsizeof(v) for v in set(array.tolist()))
+
+        report = {
+            "ids": strings(self.ids),
+            "names": strings(self.names) + _haystack_bytes(self._haystacks["name"]),
+            "artists": strings(self.artists) + _haystack_bytes(self._haystacks["artists"]),
+            "albums": strings(self.albums),
+            "genres": self.genre_codes.nbytes + sum(sys.getsizeof(g) for g in self.genres),
+            "numeric": sum(values.nbytes for values in self.columns.values()),
+            "sorted_indexes": sum(order.nbytes + values.nbytes for order, values in self._sorted.values()),
+            "standardized": sum(values.nbytes for values, _, _ in self._standardized.values()),
+        }
+        report["total"] = sum(report.values())
+        return report
@@ -3,4 +3,6 @@
 Common utility functions and helpers.
 """
 
-__all__ = []
+from .cache import LRUCache, SQLiteStore, normalize_query
+
+__all__ = ['LRUCache', 'SQLiteStore', 'normalize_query']
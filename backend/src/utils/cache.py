@@ -0,0 +1,190 @@
+"""
+Bounded in-process caches.
+
+LRUCache optionally expires entries after a TTL and can write through to a
+SQLiteStore, so cached values survive restarts and are shared by workers.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+# Apostrophes and hyphens inside words ("don't", "lo-fi"), dropped by normalize_query
+_WORD_JOINERS = re.compile(r"(?<=\w)['’-](?=\w)")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key text: case, punctuation, hyphenation ("lo-fi") and -ing forms ("studying") folded"""
+    text = _WORD_JOINERS.sub("", query.lower())
+    words = _PUNCTUATION.sub(" ", text).split()
+    # Only fold -ing when a 5+ letter stem remains (studying, chilling, relaxing; not evening, swing)
+    return " ".join(word[:-3] if word.endswith("ing") and len(word) >= 8 else word for word in words)
+
+
+class SQLiteStore:
+    """JSON values with an optional expiry time in a SQLite table"""
+
+    def __init__(self, path: str, table: str = "cache"):
+        if not re.fullmatch(r"\w+", table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> tuple:
+        """(value, expires_at); value is _MISSING when absent or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return _MISSING, None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, value: Any, expires_at: Optional[float] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+
+    def purge(self) -> int:
+        """Delete expired rows; returns how many"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counts.
+
+    With a name, lookups are also reported to the Prometheus registry as
+    musicbot_cache_requests_total{cache=name, result=hit|miss}.
+
+    ttl (seconds, overridable per put) expires entries. With a store, entries are
+    written through to it and memory misses are looked up there (keys are str(key),
+    values must be JSON-serializable).
+    """
+
+    def __init__(self, maxsize: int = 256, name: Optional[str] = None, ttl: Optional[float] = None,
+                 store: Optional[SQLiteStore] = None):
+        self.maxsize = maxsize
+        self.name = name
+        self.ttl = ttl
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        # key -> (value, expires_at or None)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def _report(self, result: str):
+        if self.name:
+            from ..core.metrics import cache_entries, cache_requests
+
+            cache_requests.inc(cache=self.name, result=result)
+            cache_entries.set(len(self._data), cache=self.name)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value, expires_at = self._data.get(key, (_MISSING, None))
+            if value is not _MISSING and expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.expirations += 1
+                value = _MISSING
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+
+        if value is _MISSING and self.store is not None:
+            try:
+                value, expires_at = self.store.get(str(key))
+            except Exception as e:
+                print(f"[Cache] {self.name or 'cache'} store lookup failed: {e}")
+            if value is not _MISSING:
+                self._insert(key, value, expires_at)
+
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self._report("miss" if value is _MISSING else "hit")
+        return default if value is _MISSING else value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._insert(key, value, expires_at)
+        if self.store is not None:
+            try:
+                self.store.put(str(key), value, expires_at)
+            except Exception as e:
+                print(f"[Cache] {self.name or 'cache'} store write failed: {e}")
+
+    def _insert(self, key: Hashable, value: Any, expires_at: Optional[float]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.store is not None:
+            self.store.clear()
+        if self.name:
+            from ..core.metrics import cache_entries
+
+            cache_entries.set(0, cache=self.name)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "persistent": self.store is not None,
+        }
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the vibe search engine on a synthetic catalogue
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from evaluation.synthetic_catalogue import write_synthetic_catalogue
+from src.tools import database_search_tool
+from src.tools.database_search_tool import MusicDatabaseSearcher, normalize_query
+from src.utils.cache import LRUCache
+
+
+@pytest.fixture(scope="module")
+def dataset_path(tmp_path_factory):
+    return write_synthetic_catalogue(str(tmp_path_factory.mktemp("data") / "dataset.csv"), rows=2000)
+
+
+@pytest.fixture(scope="module")
+def searcher(dataset_path):
+    return MusicDatabaseSearcher(dataset_path, spotify_fallback=False)
+
+
+def test_vibe_search_returns_ranked_local_results(searcher):
+    results = searcher.search_similar_music("chill but danceable music", top_k=5)
+
+    assert len(results) == 5
+    assert all(r['source'] == 'local_database' for r in results)
+    similarities = [r['similarity'] for r in results]
+    assert similarities == sorted(similarities, reverse=True)
+
+
+def test_genre_query_only_returns_that_genre(searcher):
+    results = searcher.search_similar_music("jazz music for dinner", top_k=5)
+    assert results and all(r['genre'] == 'jazz' for r in results)
+
+
+def test_unknown_reference_song_stays_offline(searcher, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("Spotify must not be queried")
+
+    monkeypatch.setattr(searcher, "_search_spotify_for_similar", no_network)
+    results = searcher.search_similar_music("songs like bohemian rhapsody by queen", top_k=3)
+    assert len(results) == 3
+
+
+def test_search_benchmark_report(dataset_path):
+    from evaluation.benchmark_search import run_benchmark
+
+    queries = [{"query": "happy upbeat songs", "category": "vibe"},
+               {"query": "popular rock songs", "category": "popularity"}]
+    report = run_benchmark(dataset_path, repeat=1, threads=(1, 2), top_k=5, queries=queries, spotify_rtt_ms=0)
+
+    assert report['latency']['warm']['unfiltered']['n'] == 1
+    assert report['latency']['warm']['filtered']['n'] == 1
+    assert [run['threads'] for run in report['throughput']] == [1, 2]
+    assert report['track_recommendations']['local']['n'] == 20
+    assert report['diversify']['on']['n'] == report['diversify']['off']['n'] == 2
+    assert report['track_recommendations']['spotify']['calls'] == 2 + 5
+    assert report['quality']['overall']['response_completeness'] == 1.0
+    assert report['memory_mb']['peak'] > 0
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1,
+                             "expirations": 0, "hit_rate": 0.75, "persistent": False}
+
+
+def test_vibe_tool_keeps_relevance_order_unless_asked_to_diversify(searcher, monkeypatch):
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    monkeypatch.setattr(database_search_tool, "_result_cache", LRUCache(8))
+    calls = []
+    search = searcher.search_similar_music
+    monkeypatch.setattr(searcher, "search_similar_music",
+                        lambda *args, **kwargs: calls.append(kwargs["diversify"]) or search(*args, **kwargs))
+
+    database_search_tool.search_music_by_vibe.invoke({"query": "midnight love", "num_results": 4})
+    database_search_tool.search_music_by_vibe.invoke({"query": "midnight love", "num_results": 4, "diversify": True})
+    assert calls == [False, True]
+
+
+def test_near_identical_vibe_queries_share_cached_results(dataset_path, monkeypatch):
+    monkeypatch.setattr(database_search_tool, "_searcher", MusicDatabaseSearcher(dataset_path, spotify_fallback=False))
+    monkeypatch.setattr(database_search_tool, "_result_cache", LRUCache(8))
+    assert normalize_query("Chill lo-fi for study!") == normalize_query("chill lofi for studying")
+
+    first = json.loads(database_search_tool.search_music_by_vibe.invoke({"query": "chill lofi for studying",
+                                                                          "num_results": 4}))
+
+    def no_search(*args, **kwargs):
+        raise AssertionError("cached query must not be searched again")
+
+    monkeypatch.setattr(database_search_tool._searcher, "search_similar_music", no_search)
+    second = json.loads(database_search_tool.search_music_by_vibe.invoke({"query": "Chill lo-fi for study",
+                                                                           "num_results": 4}))
+
+    third = json.loads(database_search_tool.search_music_by_vibe.invoke({"query": "chill lofi for studying",
+                                                                          "num_results": 4}))
+
+    assert second["query"] == "Chill lo-fi for study"
+    assert second["recommendations"] == first["recommendations"]
+    assert third == first
+    assert database_search_tool._result_cache.stats()["hits"] == 2
+
+
+def test_catalogue_change_invalidates_cache(tmp_path, monkeypatch):
+    path = write_synthetic_catalogue(str(tmp_path / "dataset.csv"), rows=300)
+    monkeypatch.setattr(database_search_tool, "_searcher", MusicDatabaseSearcher(path, spotify_fallback=False))
+    monkeypatch.setattr(database_search_tool, "_result_cache", LRUCache(8))
+    database_search_tool.search_music_by_vibe.invoke({"query": "happy upbeat songs", "num_results": 3})
+    loaded = database_search_tool.get_searcher()
+
+    write_synthetic_catalogue(path, rows=400, seed=7)
+    os.utime(path, ns=(0, loaded.dataset_version[2] + 1))
+
+    assert database_search_tool.get_searcher() is not loaded
+    assert len(database_search_tool._result_cache) == 0
+    assert len(database_search_tool.get_searcher().tracks) > len(loaded.tracks)
+
+
+def test_batch_search_matches_single_queries(searcher, monkeypatch):
+    # Small blocks so the running top-k is merged across several catalogue blocks
+    monkeypatch.setattr(database_search_tool, "BATCH_BLOCK_ROWS", 300)
+    queries = ["midnight love", "golden river songs", "jazz songs about home", "popular rock songs", ""]
+    batch = searcher.search_similar_music_batch(queries, top_k=5)
+
+    assert len(batch) == len(queries)
+    for query, results in zip(queries[:4], batch):
+        single = searcher.search_similar_music(query, top_k=5)
+        assert [r['track_name'] for r in results] == [r['track_name'] for r in single]
+        assert [r['similarity'] for r in results] == pytest.approx([r['similarity'] for r in single], abs=1e-5)
+    assert all(r['genre'] == 'jazz' for r in batch[2])
+
+
+def test_batch_search_fuses_lexical_matches_without_the_single_path(searcher, monkeypatch):
+    queries = ["neon shadow", "golden river songs", "jazz songs about home"]
+    single = [searcher.search_similar_music(query, top_k=5) for query in queries]
+
+    def no_single_path(*args, **kwargs):
+        raise AssertionError("batch fell back to the single-query path")
+
+    monkeypatch.setattr(searcher, "search_similar_music", no_single_path)
+    batch = searcher.search_similar_music_batch(queries, top_k=5)
+    for results, expected in zip(batch, single):
+        assert [r['track_name'] for r in results] == [r['track_name'] for r in expected]
+
+
+class MatmulSpy(np.ndarray):
+    """Embedding matrix recording the shape of every product taken against it"""
+    shapes = []
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        result = super().__array_ufunc__(ufunc, method, *(np.asarray(x) for x in inputs), **kwargs)
+        if ufunc is np.matmul:
+            MatmulSpy.shapes.append(np.shape(result))
+        return result
+
+
+@pytest.mark.parametrize("fusion", ["linear", "rrf"])
+def test_fused_batch_search_scores_the_catalogue_in_blocks(searcher, monkeypatch, fusion):
+    monkeypatch.setattr(database_search_tool, "BATCH_BLOCK_ROWS", 300)
+    monkeypatch.setattr(database_search_tool, "LEXICAL_CANDIDATES", 40)
+    monkeypatch.setattr(searcher, "fusion", fusion)
+    queries = ["neon shadow", "golden river songs", "midnight love", "jazz songs about home", "love songs"] * 4
+    single = [searcher.search_similar_music(query, top_k=5) for query in queries]
+
+    MatmulSpy.shapes = []
+    monkeypatch.setattr(searcher, "embeddings", searcher.embeddings.view(MatmulSpy))
+    batch = searcher.search_similar_music_batch(queries, top_k=5)
+
+    # Query x catalogue products stay within one block; pool scoring is one vector per query
+    assert MatmulSpy.shapes and all(shape[-1] <= 300 for shape in MatmulSpy.shapes if len(shape) == 2)
+    assert all(shape[0] <= 80 for shape in MatmulSpy.shapes if len(shape) == 1)
+    for results, expected in zip(batch, single):
+        assert [r['track_name'] for r in results] == [r['track_name'] for r in expected]
+        assert [r['similarity'] for r in results] == pytest.approx([r['similarity'] for r in expected], abs=1e-5)
+
+
+def test_batch_tool_and_endpoint(searcher, monkeypatch):
+    import asyncio
+
+    from src.api import server
+
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    output = json.loads(database_search_tool.search_music_by_vibe_batch.invoke(
+        {"queries": ["midnight love", "golden river songs"], "num_results": 3}))
+    assert [r["query"] for r in output["results"]] == ["midnight love", "golden river songs"]
+    assert all(len(r["recommendations"]) == 3 for r in output["results"])
+
+    response = asyncio.run(server.search_batch(server.BatchSearchRequest(queries=["neon shadow"], top_k=2)))
+    assert response["results"][0]["recommendations"][0]["source"] == "local_database"
+    with pytest.raises(server.HTTPException):
+        asyncio.run(server.search_batch(server.BatchSearchRequest(queries=[])))
+
+
+def test_track_store_replaces_pandas_frames(searcher):
+    assert searcher.song_data is None
+    assert searcher.embeddings.dtype == np.float32
+    assert np.allclose(np.linalg.norm(searcher.embeddings, axis=1), 1, atol=1e-5)
+
+    record = searcher.tracks.record(0)
+    assert record.name == searcher.tracks.names[0]
+    assert isinstance(record.popularity, int)
+    assert searcher.tracks.genre_mask(record.genre)[0]
+    assert searcher.tracks.contains("name", record.name.lower())[0]
+
+    report = searcher.memory_report()
+    assert report["embeddings"] == searcher.embeddings.nbytes
+    assert report["total"] == sum(v for k, v in report.items() if k != "total")
+
+
+def test_range_filters_match_a_full_scan(searcher):
+    tracks = searcher.tracks
+    mask = tracks.filter_mask({"danceability": (0.6, None), "tempo": (110, 130), "explicit": False})
+    expected = ((tracks.columns["danceability"] >= np.float32(0.6))
+                & (tracks.columns["tempo"] >= 110) & (tracks.columns["tempo"] <= 130)
+                & ~tracks.columns["explicit"])
+    assert mask.any() and np.array_equal(mask, expected)
+    assert tracks.filter_mask({"energy": (None, None)}) is None
+    with pytest.raises(ValueError):
+        tracks.filter_mask({"loudness": (-5, 0)})
+    with pytest.raises(ValueError):
+        tracks.filter_mask({"tempo": (130, 110)})
+
+
+def test_filtered_vibe_search(searcher, monkeypatch):
+    filters = {"danceability": (0.6, None), "popularity": (None, 50)}
+    for query in ("midnight love", "jazz songs about home", "popular jazz songs"):
+        results = searcher.search_similar_music(query, top_k=5, filters=filters)
+        assert results
+        assert all(r["audio_features"]["danceability"] >= 0.6 and r["popularity"] <= 50 for r in results)
+    assert searcher.search_similar_music("midnight love", top_k=5, filters={"tempo": (500, None)}) == []
+
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    output = json.loads(database_search_tool.search_music_by_vibe.invoke(
+        {"query": "neon shadow", "num_results": 3, "min_energy": 0.7, "explicit": True}))
+    assert len(output["recommendations"]) == 3
+    unfiltered = json.loads(database_search_tool.search_music_by_vibe.invoke({"query": "neon shadow", "num_results": 3}))
+    assert unfiltered != output
+    error = json.loads(database_search_tool.search_music_by_vibe.invoke({"query": "neon shadow", "min_tempo": 500}))
+    assert "widening" in error["error"]
+
+
+def test_lexical_index_scores_exact_names(searcher):
+    from src.tools.lexical_index import tokenize
+
+    assert tokenize("Songs by The Black Keys!") == ["black", "keys"]
+    artist = searcher.tracks.artists[7]
+    scores = searcher.lexical_index.scores(artist)
+    assert artist in searcher.tracks.artists[int(scores.argmax())]
+    assert scores[7] > np.median(scores[scores > 0])
+    assert searcher.lexical_index.scores("songs by") is None
+
+
+def test_hybrid_search_ranks_exact_artist_matches_first(dataset_path):
+    hybrid = MusicDatabaseSearcher(dataset_path, spotify_fallback=False, fusion="linear")
+    artist = hybrid.tracks.artists[7]
+    own_tracks = int((hybrid.tracks.artists == artist).sum())
+
+    results = hybrid.search_similar_music(f"songs by {artist}", top_k=own_tracks)
+    assert all(artist in r["artists"] for r in results)
+
+    rrf = MusicDatabaseSearcher(dataset_path, spotify_fallback=False, fusion="rrf")
+    assert any(artist in r["artists"] for r in rrf.search_similar_music(f"songs by {artist}", top_k=5))
+
+    vector_only = MusicDatabaseSearcher(dataset_path, spotify_fallback=False, fusion="vector")
+    assert vector_only.lexical_index is None
+    assert "lexical_index" not in vector_only.memory_report()
+
+
+def test_query_vectors_are_cached_and_read_only(searcher):
+    query = f"Songs like {searcher.tracks.names[3]} by {searcher.tracks.artists[3]}"
+    vector = searcher.text_to_database_vector(query)
+    assert np.allclose(vector.ravel(), searcher.embeddings[3])
+    assert searcher.text_to_database_vector(query.lower()) is vector
+    assert not vector.flags.writeable
+
+    hits = searcher._query_vectors.hits
+    searcher.text_to_database_vector("golden river at midnight")
+    searcher.text_to_database_vector("Golden River at Midnight")
+    assert searcher._query_vectors.hits == hits + 1
+
+
+def test_substring_lookup_matches_a_row_scan(searcher):
+    tracks = searcher.tracks
+    for field, values in (("name", tracks.names), ("artists", tracks.artists)):
+        for needle in ("love", values[11].lower(), "ni", "zzz", ""):
+            expected = np.array([needle in value.lower() for value in values])
+            assert np.array_equal(tracks.contains(field, needle), expected)
+
+
+def test_similar_artists_share_genre_and_sound(searcher, monkeypatch):
+    table = searcher.artist_table
+    artist = max(range(len(table)), key=lambda a: table.track_counts[a])
+    name = table.names[artist]
+    main_genre = table.profile(artist)["genres"][0][0]
+
+    similar = table.similar(name.lower(), top_k=5)
+    assert len(similar) == 5 and name not in [other["artist"] for other in similar]
+    assert [other["similarity"] for other in similar] == sorted((o["similarity"] for o in similar), reverse=True)
+    assert sum(other["genres"][0][0] == main_genre for other in similar) >= 4
+    assert table.similar("nobody at all") is None
+
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    output = json.loads(database_search_tool.find_similar_artists.invoke({"artist": name, "num_results": 3}))
+    assert output["artist"]["artist"] == name and len(output["similar_artists"]) == 3
+    assert "error" in json.loads(database_search_tool.find_similar_artists.invoke({"artist": "nobody at all"}))
+
+
+def test_track_recommendations_come_from_the_catalogue(searcher, monkeypatch):
+    from src.tools.spotify import recommendations
+
+    seed = searcher.locate_track(searcher.tracks.names[7], searcher.tracks.artists[7].split(";")[0])
+    name = searcher.tracks.names[seed]
+    found, similar = searcher.recommend_for_track(name.upper(), top_k=5)
+    assert found['track_name'] == name and len(similar) == 5
+    assert all(r['track_name'].lower() != name.lower() for r in similar)
+    assert searcher.recommend_for_track(name, artist_name="nobody at all") is None
+
+    def no_spotify():
+        raise AssertionError("Spotify must not be called for catalogue tracks")
+
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    monkeypatch.setattr(recommendations, "get_spotify_client", no_spotify)
+    output = recommendations.get_recommendations_by_track.invoke(
+        {"track_name": name, "artist_name": found['artists'].split(";")[0], "limit": 3})
+    assert "local music catalogue" in output and output.count("🥁 Tempo") == 3
+
+
+def test_audio_feature_targets_match_a_brute_force_scan(searcher):
+    targets = {"energy": 0.8, "tempo": 128.0}
+    positions, distances = searcher.tracks.nearest_by_features(targets, top_k=5)
+
+    columns = searcher.tracks.columns
+    z = [(columns[f].astype(np.float64) - columns[f].mean()) / columns[f].std() for f in targets]
+    t = [(v - columns[f].mean()) / columns[f].std() for f, v in targets.items()]
+    expected = np.sqrt(sum((zi - ti) ** 2 for zi, ti in zip(z, t)) / len(targets))
+    np.testing.assert_allclose(distances, np.sort(expected)[:5], rtol=1e-4, atol=1e-5)
+
+    jazz = searcher.match_audio_features({"acousticness": 0.9}, top_k=4, genre="jazz")
+    assert len(jazz) == 4 and all(r['genre'] == 'jazz' for r in jazz)
+    with pytest.raises(ValueError):
+        searcher.tracks.nearest_by_features({"loudness": -5.0}, top_k=3)
+
+
+def test_audio_feature_recommendations_fetch_previews_in_one_call(searcher, monkeypatch):
+    from src.tools.spotify import base as spotify_base
+    from src.tools.spotify.recommendations import get_recommendations_by_audio_features
+
+    class PreviewOnly:
+        calls = 0
+
+        def tracks(self, ids):
+            PreviewOnly.calls += 1
+            return {"tracks": [{"id": i, "preview_url": f"https://p.scdn.co/{i}"} for i in ids]}
+
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    spotify_base.set_spotify_client_factory(PreviewOnly)
+    try:
+        output = get_recommendations_by_audio_features.invoke({"energy": 0.9, "danceability": 0.8, "limit": 4})
+    finally:
+        spotify_base.set_spotify_client_factory(None)
+
+    assert output.startswith("🎵 **Catalogue Recommendations") and output.count("🎧 [Preview]") == 4
+    assert PreviewOnly.calls == 1
+
+
+def test_versions_and_lead_artists_share_codes():
+    import pandas as pd
+    from src.tools.track_store import TrackStore
+
+    store = TrackStore.from_frame(pd.DataFrame({
+        "song_name": ["Creep", "Creep - Acoustic", "Creep (Live)", "Creeping Death"],
+        "song_artists": ["Radiohead", "radiohead;Guest", "Radiohead", "Metallica"],
+    }))
+    titles, artists = store.base_title_codes(), store.lead_artist_codes()
+    assert titles[0] == titles[1] == titles[2] != titles[3]
+    assert artists[0] == artists[1] == artists[2] != artists[3]
+
+
+def test_diversified_search_spreads_artists_and_versions(searcher):
+    from collections import Counter
+    from src.tools.database_search_tool import MAX_PER_ARTIST
+
+    for query in ("neon shadow", "golden river songs", "midnight love"):
+        results = searcher.search_similar_music(query, top_k=10, diversify=True)
+        assert len(results) == 10
+        leads = Counter(r['artists'].split(';')[0] for r in results)
+        assert max(leads.values()) <= MAX_PER_ARTIST
+        assert len({r['track_name'].lower() for r in results}) == 10
+
+    artist = Counter(a.split(';')[0] for a in searcher.tracks.artists).most_common(1)[0][0]
+    named = searcher.search_similar_music(f"songs by {artist}", top_k=5, diversify=True)
+    assert sum(r['artists'].startswith(artist) for r in named) > MAX_PER_ARTIST
+
+
+def test_vibe_playlists_add_catalogue_ids_in_batches(searcher, monkeypatch):
+    from src.tools.spotify import base as spotify_base
+    from src.tools.spotify.playlists import PLAYLIST_ADD_BATCH, build_playlist_from_vibe
+
+    class RecordingSpotify:
+        calls = []
+
+        def current_user(self):
+            self.calls.append("current_user")
+            return {"id": "listener"}
+
+        def user_playlist_create(self, user, name, public, description):
+            self.calls.append("create")
+            return {"id": "pl1", "external_urls": {"spotify": "https://open.spotify.com/playlist/pl1"}}
+
+        def playlist_add_items(self, playlist_id, items):
+            self.calls.append(("add", list(items)))
+
+        def search(self, **kwargs):
+            self.calls.append("search")
+            return {"tracks": {"items": []}}
+
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    spotify_base.set_spotify_client_factory(RecordingSpotify)
+    try:
+        output = build_playlist_from_vibe.invoke({"vibe": "midnight love", "num_tracks": 120})
+    finally:
+        spotify_base.set_spotify_client_factory(None)
+
+    adds = [call[1] for call in RecordingSpotify.calls if call[0] == "add"]
+    assert RecordingSpotify.calls[:2] == ["current_user", "create"] and "search" not in RecordingSpotify.calls
+    assert [len(batch) for batch in adds] == [PLAYLIST_ADD_BATCH, 120 - PLAYLIST_ADD_BATCH]
+    assert all(uri.startswith("spotify:track:") for batch in adds for uri in batch)
+    assert output.startswith("✅ Created playlist **Midnight Love** with 120 tracks") and "...and 110 more" in output
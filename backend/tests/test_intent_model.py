@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the optional local intent model and its fallback to the rule router
+"""
+
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.agent import intent_model
+from src.agent.conversation_context import update_conversation_context
+from src.agent.intent_model import IntentModel
+
+
+@pytest.fixture(scope="module")
+def model():
+    return IntentModel.load()
+
+
+def test_scores_match_sklearn():
+    texts = ["show my wrapped", "recommend chill songs", "who is drake", "my top tracks", "songs for the gym"]
+    labels = ["spotify", "database", "web", "spotify", "database"]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+    classifier = LogisticRegression(C=10.0, max_iter=1000).fit(vectorizer.fit_transform(texts), labels)
+    model = IntentModel(vectorizer, classifier)
+
+    for query in ["show my top songs songs", "who recommended drake", "unknown words only"]:
+        expected = classifier.predict_proba(vectorizer.transform([query]))[0]
+        scores = model.scores(query)
+        assert np.allclose([scores[route] for route in classifier.classes_], expected)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("show me my top artists from this year", "spotify"),
+    ("suggest some calm songs for reading", "database"),
+    ("who is the drummer of metallica", "web"),
+])
+def test_model_routes_queries(model, query, expected):
+    assert model.predict(query)[0] == expected
+
+
+def test_model_uses_previous_message_tags(model):
+    messages = [HumanMessage(content="who is newjeans"),
+                AIMessage(content="NewJeans is a girl group. Would you like to follow them on Spotify?"),
+                HumanMessage(content="yes")]
+    assert model.predict("yes", update_conversation_context(None, messages))[0] == "spotify"
+
+
+def test_low_confidence_falls_back_to_rules(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from src.agent import main_graph
+
+    class UnsureModel:
+        def predict(self, query, context=None):
+            return "database", 0.2
+
+    monkeypatch.setattr(main_graph, "get_intent_model", lambda: UnsureModel())
+    assert main_graph.classify_with_context([HumanMessage(content="show me my spotify wrapped")]) == "spotify"
+
+    monkeypatch.setattr(main_graph, "get_intent_model", lambda: IntentModel.load())
+    assert main_graph.classify_with_context([HumanMessage(content="music for studying")]) == "database"
+
+
+def test_model_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("INTENT_MODEL_ENABLED", raising=False)
+    assert intent_model.get_intent_model() is None
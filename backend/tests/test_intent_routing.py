@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the table-driven intent rules used by the main classifier and Spotify router
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.intent_rules import IntentRules, intent_rules
+from src.agent.spotify_router import spotify_router
+
+
+def conversation(*texts):
+    return [HumanMessage(content=t) if i % 2 == 0 else AIMessage(content=t) for i, t in enumerate(texts)]
+
+
+@pytest.mark.parametrize("texts, expected", [
+    (["show me my spotify wrapped"], "spotify"),
+    (["recommend me some chill songs"], "database"),
+    (["songs like creep by radiohead"], "database"),
+    (["who is tyler the creator"], "web"),
+    (["artists like radiohead"], "database"),
+    (["who is blackpink", "BLACKPINK is a South Korean girl group", "follow them"], "spotify"),
+    (["what is jazz", "Jazz is a genre. Would you like to add some to a playlist?", "yes"], "spotify"),
+    (["my wrapped", "Here is your wrap", "what about last month"], "spotify"),
+    (["give me my spotify summary"], "web"),
+])
+def test_main_classifier_routes(texts, expected):
+    route, _ = intent_rules.classify("main", conversation(*texts))
+    assert route == expected
+
+
+@pytest.mark.parametrize("texts, expected", [
+    (["give me my year in review"], "wrapped"),
+    (["my wrapped", "Here is your wrap", "how about 6 months"], "wrapped"),
+    (["give me my spotify summary"], "wrapped"),
+    (["add bad guy to my gym playlist"], "playlist"),
+    (["unfollow drake"], "artist"),
+    (["what are my saved tracks"], "song"),
+])
+def test_spotify_router_routes(texts, expected):
+    assert spotify_router({"messages": conversation(*texts)}) == expected
+
+
+def test_query_tags_reports_every_set_in_one_pass():
+    tags = intent_rules.query_tags("how about my wrapped for last month")
+    assert {"wrapped", "time_period", "continuation"} <= tags
+
+
+def test_scanner_reports_sets_sharing_a_start_position():
+    scanner = intent_rules._query_regex
+    texts = ["follow them", "like this song by drake", "add them to my top tracks playlist",
+             "how about my wrapped", "songs like creep by radiohead", "artists like radiohead"]
+    for text in texts:
+        assert scanner.scan(text) == {name for name in scanner.names if scanner._single[name].search(text)}
+
+
+def test_long_context_is_scanned_in_linear_time():
+    import time
+
+    # A long tool output of letters and spaces only: greedy captures would rescan it from every position
+    filler = "la la land " * 20000
+    text = filler + "blackpink is a south korean girl group. would you like to follow them?"
+    started = time.perf_counter()
+    tags = intent_rules.message_tags(text)
+    assert time.perf_counter() - started < 0.5
+    assert {"artist_mention", "follow_prompt", "action_prompt"} <= tags
+    assert intent_rules.message_tags(filler) == frozenset()
+
+
+def test_undefined_set_is_rejected():
+    table = {
+        "keyword_sets": {"wrapped": ["wrapped"]},
+        "classifiers": {"main": {"context_window": 6, "default": "web",
+                                 "rules": [{"name": "x", "route": "spotify", "query_all": ["missing"]}]}},
+    }
+    with pytest.raises(ValueError):
+        IntentRules(table)
+
+
+def with_ids(messages):
+    for i, msg in enumerate(messages):
+        msg.id = f"msg_{i}"
+    return messages
+
+
+def test_conversation_context_only_scans_new_messages(monkeypatch):
+    from src.agent import conversation_context as cc
+
+    messages = with_ids(conversation("who is blackpink", "BLACKPINK is a South Korean girl group", "follow them"))
+    context = cc.update_conversation_context(None, messages[:2])
+
+    scanned = []
+    original = cc._message_entry
+    monkeypatch.setattr(cc, "_message_entry", lambda msg: scanned.append(msg.content) or original(msg))
+    context = cc.update_conversation_context(context, messages)
+
+    assert scanned == ["follow them"]
+    assert context["last_artist"] == "blackpink"
+    assert context["last_topic"] == "follow"
+    assert intent_rules.classify("main", messages, context) == intent_rules.classify("main", messages)
+
+
+def test_conversation_context_tracks_topic_and_window():
+    from src.agent.conversation_context import CONTEXT_WINDOW, update_conversation_context
+
+    messages = with_ids(conversation(*[f"filler message {i}" for i in range(20)] + ["show me my spotify wrapped"]))
+    context = update_conversation_context(None, messages)
+
+    assert len(context["window"]) == CONTEXT_WINDOW
+    assert context["last_topic"] == "wrapped"
+    assert "wrapped" in context["keywords"]
+
+
+def test_router_node_answers_remember_and_skips_classification(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from src.agent import main_graph
+
+    state = {"messages": with_ids([HumanMessage(content="remember I love shoegaze")])}
+    update = main_graph.router_node(state)
+
+    assert [type(m).__name__ for m in update["messages"]] == ["SystemMessage", "AIMessage"]
+    assert main_graph.router({"messages": state["messages"] + update["messages"]}) == "conversation_handled"
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the local knowledge store the web agent consults before searching the web
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from evaluation.synthetic_catalogue import write_synthetic_catalogue
+from src.agent import web_agent as web_agent_module
+from src.core import metrics
+from src.tools import database_search_tool, knowledge_store, tavily_tool
+from src.tools.database_search_tool import MusicDatabaseSearcher
+from src.tools.knowledge_store import parse_question
+from src.utils.cache import LRUCache
+
+
+@pytest.fixture(scope="module")
+def searcher(tmp_path_factory):
+    path = write_synthetic_catalogue(str(tmp_path_factory.mktemp("data") / "dataset.csv"), rows=1500)
+    return MusicDatabaseSearcher(path, spotify_fallback=False)
+
+
+class FakeLLM:
+    """Calls search_music_info once, then answers with the tool output"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages):
+        self.calls += 1
+        tool_outputs = [m.content for m in messages if isinstance(m, ToolMessage)]
+        if tool_outputs:
+            return AIMessage(content=f"From the web: {tool_outputs[-1]}")
+        return AIMessage(content="", tool_calls=[{"name": "search_music_info", "id": "call-1",
+                                                  "args": {"query": messages[-1].content}}])
+
+
+@pytest.fixture
+def agent(searcher, monkeypatch):
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    monkeypatch.setattr(knowledge_store, "_answers", LRUCache(16, name="knowledge"))
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    monkeypatch.setattr(tavily_tool, "_search_cache", LRUCache(16, name="tavily"))
+    web_calls = []
+
+    def fake_post(api_key, payload, timeout):
+        web_calls.append(payload)
+        response = tavily_tool.requests.Response()
+        response.status_code = 200
+        response._content = b'{"answer": "A band from Oxford.", "results": []}'
+        return response
+
+    monkeypatch.setattr(tavily_tool, "_post", fake_post)
+    llm = FakeLLM()
+    monkeypatch.setattr(web_agent_module.WebAgent, "_llm", property(lambda self: llm))
+
+    def ask(question):
+        state = {"messages": [HumanMessage(content=question)]}
+        return web_agent_module.web_agent(state)["messages"][-1].content
+
+    return ask, llm, web_calls
+
+
+def test_questions_are_parsed_into_entities():
+    assert parse_question("What genre is Radiohead?") == ("genre", "Radiohead")
+    assert parse_question("what kind of music does Bon Iver make") == ("genre", "Bon Iver")
+    assert parse_question("Who is Phoebe Bridgers?") == ("about", "Phoebe Bridgers")
+    assert parse_question("tell me about jazz music") == ("about", "jazz")
+    assert parse_question("play something chill") is None
+
+
+@pytest.mark.parametrize("question", [
+    "tell me about them", "who is she?", "what genre is that", "What genre is this song?",
+    "what is my top artist", "who are they", "tell me about your favourite band", "who is the artist",
+])
+def test_conversational_references_are_not_entities(question):
+    assert parse_question(question) is None
+
+
+def test_artist_table_aggregates_every_credited_artist(searcher):
+    facts = searcher.artist_table
+    artist = next(a for a in searcher.tracks.artists if ";" in a).split(";")[1]
+    credited = sum(artist in value.split(";") for value in searcher.tracks.artists)
+
+    found = facts.artist(artist.upper())
+    assert found["artist"] == artist and found["tracks"] == credited
+    assert sum(count for _, count in found["genres"]) == credited
+    assert facts.artist("nobody at all") is None
+    assert facts.genre("jazz")["tracks"] == int(searcher.tracks.genre_mask("jazz").sum())
+
+
+def test_genre_questions_skip_the_llm_and_the_web(agent, searcher):
+    ask, llm, web_calls = agent
+    artist = searcher.tracks.artists[0].split(";")[0]
+    local = metrics.knowledge_lookups.value(source="catalogue")
+
+    answer = ask(f"What genre is {artist}?")
+
+    assert answer.startswith(f"{artist} is mostly")
+    assert llm.calls == 0 and web_calls == []
+    assert metrics.knowledge_lookups.value(source="catalogue") == local + 1
+
+
+def test_web_answers_are_remembered_per_entity(agent, searcher):
+    ask, llm, web_calls = agent
+    artist = searcher.tracks.artists[0].split(";")[0]
+    first = ask(f"Who is {artist}?")
+    assert llm.calls == 2 and len(web_calls) == 1
+
+    again = ask(f"who is {artist.lower()}")
+    assert again == first == "From the web: 🎵 A band from Oxford."
+    assert llm.calls == 2 and len(web_calls) == 1
+
+
+def test_answers_about_unknown_entities_are_not_shared(agent):
+    ask, llm, web_calls = agent
+    ask("Who is Radiohead?")
+    ask("who is radiohead")
+    assert llm.calls == 4
+    assert len(knowledge_store._answers) == 0
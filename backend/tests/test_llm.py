@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared LLM client registry and its per-model metrics
+"""
+
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.core import llm
+
+
+def completion(request):
+    return httpx.Response(200, json={
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": "Right on! 🎵"}}],
+        "usage": {"prompt_tokens": 12, "completion_tokens": 4, "total_tokens": 16},
+    })
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    llm.reset_llm_clients()
+    llm.llm_metrics.reset()
+    monkeypatch.setattr(llm, "_http_client", httpx.Client(transport=httpx.MockTransport(completion)))
+    monkeypatch.setattr(llm, "_http_async_client", httpx.AsyncClient(transport=httpx.MockTransport(completion)))
+    yield llm
+    llm.reset_llm_clients()
+    llm.llm_metrics.reset()
+
+
+def test_clients_are_shared_per_model(registry, monkeypatch):
+    assert registry.get_llm("tools") is registry.get_llm("tools")
+    assert registry.get_llm("chat").model_name == "gpt-4o-mini"
+
+    monkeypatch.setenv("LLM_CHAT_MODEL", "gpt-4o")
+    assert registry.get_llm("chat") is registry.get_llm("tools")
+    assert registry.get_llm("tools").http_client is registry._http_client
+
+
+def test_unknown_purpose_is_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.get_llm("poetry")
+
+
+def test_calls_record_latency_and_tokens(registry):
+    chat = registry.get_llm("chat")
+    assert chat.invoke([HumanMessage(content="cool")]).content == "Right on! 🎵"
+    chat.bind_tools([]).invoke([HumanMessage(content="nice")])
+
+    stats = registry.llm_metrics.report()["gpt-4o-mini"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 0
+    assert stats["prompt_tokens"] == 24
+    assert stats["completion_tokens"] == 8
+    assert stats["p50_ms"] is not None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded conversation checkpointer (in-memory and SQLite backends)
+"""
+
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, StateGraph
+
+from src.core.memory import BoundedCheckpointer, SqliteSaver, trim_messages_for_storage
+from src.core.schema import ChatState
+
+
+def echo(state):
+    """Reply to the last user message"""
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(ChatState)
+    builder.add_node("echo", echo)
+    builder.set_entry_point("echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def make_savers():
+    savers = [InMemorySaver()]
+    if SqliteSaver is not None:
+        savers.append(SqliteSaver(sqlite3.connect(":memory:", check_same_thread=False)))
+    return savers
+
+
+def chat(graph, thread_id, text):
+    config = {"configurable": {"thread_id": thread_id}}
+    return graph.invoke({"messages": [HumanMessage(content=text)]}, config=config)
+
+
+def test_trim_keeps_system_prompt_and_starts_at_user_turn():
+    messages = [SystemMessage(content="You are DJ Spotify"), SystemMessage(content="[USER PREFERENCE: jazz]")]
+    for i in range(5):
+        messages += [HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")]
+
+    trimmed = trim_messages_for_storage(messages, 3)
+
+    assert trimmed[0].content == "You are DJ Spotify"
+    assert trimmed[1].content == "[USER PREFERENCE: jazz]"
+    assert [m.content for m in trimmed[2:]] == ["q4", "a4"]
+
+
+@pytest.mark.parametrize("saver", make_savers(), ids=lambda s: type(s).__name__)
+def test_message_cap_and_compaction(saver):
+    checkpointer = BoundedCheckpointer(saver, max_messages=4, keep_checkpoints=2)
+    graph = build_graph(checkpointer)
+
+    for i in range(6):
+        result = chat(graph, "user_a", f"message {i}")
+    assert result["messages"][-1].content == "echo: message 5"
+
+    state = graph.get_state({"configurable": {"thread_id": "user_a"}})
+    assert len(state.values["messages"]) <= 4
+    assert len(list(checkpointer.list({"configurable": {"thread_id": "user_a"}}))) == 2
+
+    report = checkpointer.footprint_report()
+    assert report[0]["thread_id"] == "user_a"
+    assert report[0]["checkpoints"] == 2
+    assert report[0]["bytes"] > 0
+
+
+@pytest.mark.parametrize("saver", make_savers(), ids=lambda s: type(s).__name__)
+def test_idle_threads_are_evicted(saver):
+    checkpointer = BoundedCheckpointer(saver, ttl_seconds=60)
+    graph = build_graph(checkpointer)
+    chat(graph, "user_old", "hi")
+    chat(graph, "user_new", "hi")
+
+    last_seen = checkpointer._activity()["user_new"]
+    evicted = checkpointer.evict_idle_threads(now=last_seen + 30)
+    assert evicted == []
+
+    checkpointer._touch("user_new")
+    checkpointer._last_seen["user_old"] -= 120
+    if checkpointer._is_sqlite:
+        with saver.cursor() as cur:
+            cur.execute("UPDATE thread_activity SET last_seen = last_seen - 120 WHERE thread_id = 'user_old'")
+
+    assert checkpointer.evict_idle_threads() == ["user_old"]
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "user_old"}}) is None
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "user_new"}}) is not None
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics registry and its instrumentation
+"""
+
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+import requests
+from urllib3.util.retry import RequestHistory
+
+from src.core import metrics
+from src.core.metrics import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests_total = registry.counter("demo_requests_total", "Requests", ["status"])
+    in_flight = registry.gauge("demo_in_flight", "In flight")
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests_total.inc(status="ok")
+    requests_total.inc(2, status="ok")
+    requests_total.inc(status='bad "quote"')
+    with in_flight.track_inprogress():
+        assert in_flight.value() == 1
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{status="ok"} 3' in text
+    assert 'demo_requests_total{status="bad \\"quote\\""} 1' in text
+    assert "demo_in_flight 0" in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1"} 2' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_seconds_count 3" in text
+
+    assert registry.counter("demo_requests_total", "Requests", ["status"]) is requests_total
+    with pytest.raises(ValueError):
+        requests_total.inc(code="200")
+
+
+def test_spotify_responses_count_retried_rate_limits():
+    from src.tools.spotify.base import instrument_spotify_client
+
+    class Adapter(requests.adapters.BaseAdapter):
+        def send(self, request, **kwargs):
+            response = requests.Response()
+            response.status_code, response.url, response.request = 200, request.url, request
+            response.raw = io.BytesIO(b"{}")
+            response.raw.retries = SimpleNamespace(history=(RequestHistory("GET", request.url, None, 429, None),) * 2)
+            return response
+
+    session = requests.Session()
+    session.mount("https://", Adapter())
+    client = instrument_spotify_client(SimpleNamespace(_session=session))
+
+    ok, limited = metrics.spotify_requests.value(status="200"), metrics.spotify_rate_limited.value()
+    client._session.get("https://api.spotify.com/v1/me")
+
+    assert metrics.spotify_requests.value(status="200") == ok + 1
+    assert metrics.spotify_rate_limited.value() == limited + 2
+
+
+def test_searcher_reports_load_and_search_paths(tmp_path):
+    from evaluation.synthetic_catalogue import write_synthetic_catalogue
+    from src.tools.database_search_tool import MusicDatabaseSearcher
+
+    searcher = MusicDatabaseSearcher(write_synthetic_catalogue(str(tmp_path / "dataset.csv"), rows=300),
+                                     spotify_fallback=False)
+    vibe = metrics.search_latency.count(path="vibe")
+    searcher.search_similar_music("chill acoustic evening", top_k=3)
+
+    assert metrics.searcher_tracks.value() == len(searcher.tracks)
+    assert metrics.searcher_load_seconds.value() > 0
+    assert metrics.search_latency.count(path="vibe") == vibe + 1
+
+
+def test_metrics_endpoint_serves_text(monkeypatch):
+    from fastapi import Response
+    from src.api import server
+
+    monkeypatch.setattr(server, "get_spotify_oauth", lambda: SimpleNamespace(get_cached_token=lambda: None))
+    errors = metrics.chat_requests.value(status="error")
+    asyncio.run(server.chat(server.ChatMessage(message="hi"), Response(), None))
+
+    response = asyncio.run(server.metrics())
+    body = response.body.decode()
+    assert response.media_type.startswith("text/plain")
+    assert f'musicbot_chat_requests_total{{status="error"}} {int(errors + 1)}' in body
+    assert "musicbot_chats_in_flight 0" in body
+    assert "musicbot_chat_request_seconds_count" in body
+    assert "recent_traces" in asyncio.run(server.trace_metrics())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk playlist tools against a recording Spotify stand-in
+"""
+
+import pytest
+
+from evaluation.synthetic_catalogue import write_synthetic_catalogue
+from src.core import metrics
+from src.tools import database_search_tool
+from src.tools.database_search_tool import MusicDatabaseSearcher
+from src.tools.spotify import base as spotify_base
+from src.tools.spotify import playlists, track_resolver
+from src.tools.spotify.playlists import add_track_to_playlist, add_tracks_to_playlist, remove_tracks_from_playlist
+from src.tools.spotify.track_resolver import TrackResolver
+from src.utils.cache import LRUCache
+
+
+def _track(name, artist):
+    track_id = name.lower().replace(" ", "-")
+    return {"id": track_id, "uri": f"spotify:track:{track_id}", "name": name, "artists": [{"name": artist}]}
+
+
+class RecordingSpotify:
+    """Playlist "Road Trip" holding 150 tracks; search finds every "Song N" but not "Unknown" """
+
+    def __init__(self):
+        self.calls = []
+        self.tracks = [_track(f"Song {i}", f"Artist {i}") for i in range(150)]
+
+    def current_user_playlists(self, limit=50):
+        self.calls.append("current_user_playlists")
+        return {"items": [{"id": "pl1", "name": "Road Trip"}]}
+
+    def playlist(self, playlist_id, fields=None):
+        self.calls.append("playlist")
+        return {"name": "Road Trip", "snapshot_id": "snap1", "tracks": self._page(0)}
+
+    def next(self, page):
+        self.calls.append("next")
+        return self._page(page["offset"] + 100)
+
+    def _page(self, offset):
+        items = [{"track": track} for track in self.tracks[offset:offset + 100]]
+        return {"items": items, "offset": offset, "next": "more" if offset + 100 < len(self.tracks) else None}
+
+    def search(self, q, type, limit):
+        self.calls.append("search")
+        if "Unknown" in q:
+            return {"tracks": {"items": []}}
+        name = q.split("track:")[-1].split(" artist:")[0]
+        number = name.split()[-1]
+        return {"tracks": {"items": [_track(name, f"Artist {number}")]}}
+
+    def playlist_add_items(self, playlist_id, items):
+        self.calls.append(("add", list(items)))
+
+    def playlist_remove_all_occurrences_of_items(self, playlist_id, items, snapshot_id=None):
+        self.calls.append(("remove", list(items), snapshot_id))
+        return {"snapshot_id": "snap2"}
+
+
+@pytest.fixture
+def spotify(monkeypatch):
+    resolver = TrackResolver(None, LRUCache(64, name="spotify_track_search"))
+    monkeypatch.setattr(playlists, "get_track_resolver", lambda: resolver)
+    fake = RecordingSpotify()
+    spotify_base.set_spotify_client_factory(lambda: fake)
+    yield fake
+    spotify_base.set_spotify_client_factory(None)
+
+
+def test_bulk_add_skips_existing_tracks_and_adds_once(spotify):
+    wanted = [f"Song {i} by Artist {i}" for i in range(140, 160)] + ["Song 155 by Artist 155", "Unknown Song"]
+    output = add_tracks_to_playlist.invoke({"tracks": wanted, "playlist_name": "road"})
+
+    adds = [call for call in spotify.calls if call[0] == "add"]
+    assert len(adds) == 1 and len(adds[0][1]) == 10
+    assert spotify.calls.count("search") == 21
+    assert len(spotify.calls) == 1 + 2 + 21 + 1
+    assert output.startswith("✅ Added 10 tracks to playlist **Road Trip**")
+    assert "Already in the playlist: Song 140 by Artist 140" in output
+    assert "Could not find: Unknown Song" in output
+
+
+def test_bulk_add_lookups_keep_the_request_deadline(spotify, monkeypatch):
+    from src.core.deadline import deadline, remaining
+
+    budgets = []
+    search = spotify.search
+
+    def timed_search(**kwargs):
+        budgets.append(remaining())
+        return search(**kwargs)
+
+    monkeypatch.setattr(spotify, "search", timed_search)
+    with deadline(30):
+        add_tracks_to_playlist.invoke({"tracks": [f"Song {i} by Artist {i}" for i in range(200, 205)],
+                                       "playlist_id": "pl1"})
+
+    assert len(budgets) == 5 and all(budget is not None and budget <= 30 for budget in budgets)
+
+
+def test_bulk_add_reuses_cached_searches(spotify):
+    add_tracks_to_playlist.invoke({"tracks": ["Song 200 by Artist 200"], "playlist_id": "pl1"})
+    add_tracks_to_playlist.invoke({"tracks": ["song 200 by artist 200"], "playlist_id": "pl1"})
+    assert spotify.calls.count("search") == 1
+    assert "current_user_playlists" not in spotify.calls
+
+
+def test_bulk_remove_matches_playlist_contents_without_searching(spotify):
+    output = remove_tracks_from_playlist.invoke(
+        {"tracks": ["Song 3 by Artist 3", "Song 120", "Song 120", "Missing Song"], "playlist_name": "Road Trip"})
+
+    removes = [call for call in spotify.calls if call[0] == "remove"]
+    assert removes == [("remove", ["spotify:track:song-3", "spotify:track:song-120"], "snap1")]
+    assert "search" not in spotify.calls
+    assert output.startswith("✅ Removed 2 tracks from playlist **Road Trip**")
+    assert "Could not find: Missing Song" in output
+
+
+@pytest.fixture(scope="module")
+def searcher(tmp_path_factory):
+    path = write_synthetic_catalogue(str(tmp_path_factory.mktemp("data") / "dataset.csv"), rows=1500)
+    return MusicDatabaseSearcher(path, spotify_fallback=False)
+
+
+def test_catalogue_tracks_resolve_without_searching(searcher, spotify, monkeypatch):
+    monkeypatch.setattr(database_search_tool, "_searcher", searcher)
+    monkeypatch.setattr(track_resolver, "_search_cache", LRUCache(64, name="spotify_track_search"))
+    monkeypatch.setattr(playlists, "get_track_resolver", track_resolver.get_track_resolver)
+    record = searcher.tracks.record(7)
+    artist = record.artists.split(";")[-1]
+    avoided = metrics.spotify_searches_avoided.value(source="catalogue")
+
+    output = add_track_to_playlist.invoke({"playlist_id": "pl1", "track_name": record.name.upper(),
+                                           "artist_name": artist})
+
+    assert ("add", [f"spotify:track:{record.track_id}"]) in spotify.calls
+    assert "search" not in spotify.calls and output.startswith("✅ Successfully added")
+    assert metrics.spotify_searches_avoided.value(source="catalogue") == avoided + 1
+
+
+def test_search_results_are_cached_per_query(spotify):
+    resolver = TrackResolver(None, LRUCache(8, name="spotify_track_search"))
+    cached = metrics.spotify_searches_avoided.value(source="cache")
+
+    first = resolver.resolve(spotify, "Song 300", "Artist 300")
+    again = resolver.resolve(spotify, "song 300", "artist 300")
+
+    assert spotify.calls.count("search") == 1
+    assert (first["source"], again["source"]) == ("search", "cache") and first["uri"] == again["uri"]
+    assert resolver.resolve(spotify, "Unknown Song") is None and resolver.resolve(spotify, "unknown song") is None
+    assert spotify.calls.count("search") == 2
+    assert metrics.spotify_searches_avoided.value(source="cache") == cached + 2
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline Spotify/LLM replay layer and the graph benchmark
+"""
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from evaluation.replay import FakeSpotify, RecordingSpotify, ScriptedChatModel
+
+
+def test_fake_spotify_counts_and_replays_recorded_calls(tmp_path):
+    recorder = RecordingSpotify(FakeSpotify(), str(tmp_path / "recording.json"))
+    recorded = recorder.current_user_top_tracks(limit=3, time_range="short_term")
+    recorded["items"][0]["name"] = "Recorded Track"
+    path = recorder.save()
+
+    spotify = FakeSpotify(recording=path)
+    assert spotify.current_user_top_tracks(3, time_range="short_term")["items"][0]["name"] == "Recorded Track"
+    assert spotify.current_user_top_tracks(limit=5)["items"][0]["name"] != "Recorded Track"
+    assert spotify.calls["current_user_top_tracks"] == 2
+
+    spotify.reset_counts()
+    assert sum(spotify.calls.values()) == 0
+
+
+def test_scripted_model_calls_tool_then_summarises():
+    script = {"what are my top tracks": {"tool": "get_top_tracks", "args": {"limit": 5}}}
+    model = ScriptedChatModel(script=script)
+    bound = model.bind_tools([{"name": "get_top_tracks"}, {"name": "get_top_artists"}])
+
+    question = HumanMessage(content="What are my top tracks")
+    call = bound.invoke([question])
+    assert call.tool_calls[0]["name"] == "get_top_tracks"
+    assert call.tool_calls[0]["args"] == {"limit": 5}
+
+    summary = bound.invoke([question, call, ToolMessage(content="1. Song", tool_call_id=call.tool_calls[0]["id"])])
+    assert "1. Song" in summary.content
+    assert model.calls == 2
+
+
+def test_graph_benchmark_times_nodes_and_counts_calls():
+    from evaluation.benchmark_graph import run_benchmark
+
+    conversations = [{"name": "library", "turns": [
+        {"user": "what are my top tracks", "tool": "get_top_tracks", "args": {"time_range": "medium_term", "limit": 5}},
+        {"user": "thanks", "reply": "Anytime! 🎧"},
+    ]}]
+    report = run_benchmark(repeat=1, rows=500, conversations=conversations)
+
+    assert report["turns"] == 2
+    assert report["nodes"]["router"]["n"] == 2
+    assert report["spotify_calls"]["total"]["current_user_top_tracks"] == 1
+    first, second = report["per_turn"]
+    assert first["nodes"][:2] == ["router", "spotify"]
+    assert second["nodes"] == ["router", "conversation_handler"]
+    assert second["reply"] == "Anytime! 🎧"
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for the Tavily web search tool and its answer cache
+"""
+
+import json
+import time
+
+import pytest
+import requests
+
+from src.core import metrics
+from src.tools import tavily_tool
+from src.utils.cache import LRUCache, SQLiteStore
+
+
+class FakeTavily:
+    """Stands in for tavily_tool._post; answers with the posted query (or data) after delay seconds"""
+
+    def __init__(self, status_code=200, delay=0.0, data=None):
+        self.status_code = status_code
+        self.delay = delay
+        self.data = data
+        self.calls = []
+
+    def __call__(self, api_key, payload, timeout):
+        self.calls.append(dict(payload, timeout=timeout))
+        delay = self.delay(payload) if callable(self.delay) else self.delay
+        if delay > timeout:
+            time.sleep(timeout)
+            raise requests.exceptions.ReadTimeout("slow")
+        time.sleep(delay)
+        response = requests.Response()
+        response.status_code = self.status_code
+        data = self.data if self.data is not None else {"answer": f"About {payload['query']}", "results": []}
+        response._content = json.dumps(data).encode()
+        return response
+
+
+@pytest.fixture
+def tavily(monkeypatch):
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    monkeypatch.setattr(tavily_tool, "_search_cache", LRUCache(16, name="tavily"))
+    fake = FakeTavily()
+    monkeypatch.setattr(tavily_tool, "_post", fake)
+    return fake
+
+
+def test_repeated_questions_are_served_from_cache(tavily):
+    saved = metrics.cache_saved_seconds.value(cache="tavily")
+    first = tavily_tool.search_music_info.invoke({"query": "Who is Radiohead?"})
+    again = tavily_tool.search_music_info.invoke({"query": "who is radiohead"})
+
+    assert first == again == "🎵 About Who is Radiohead? artist musician music"
+    assert len(tavily.calls) == 1
+    assert tavily_tool._search_cache.stats()["hits"] == 1
+    assert metrics.cache_saved_seconds.value(cache="tavily") >= saved
+
+
+def test_errors_are_not_cached(tavily):
+    tavily.status_code = 500
+    tavily_tool.search_music_info.invoke({"query": "radiohead discography"})
+    tavily_tool.search_music_info.invoke({"query": "radiohead discography"})
+    assert len(tavily.calls) == 2
+
+
+def test_empty_results_are_not_cached(tavily):
+    tavily.data = {"answer": "", "results": [{"url": "https://example.com", "content": ""}]}
+    first = tavily_tool.search_music_info.invoke({"query": "obscure demo tape"})
+    tavily_tool.search_music_info.invoke({"query": "obscure demo tape"})
+
+    assert first.startswith("I searched for 'obscure demo tape' but couldn't find")
+    assert len(tavily.calls) == 2 and len(tavily_tool._search_cache) == 0
+
+
+def test_news_questions_get_a_short_ttl():
+    assert tavily_tool.cache_ttl("Is Radiohead touring in 2025?") == tavily_tool.TAVILY_NEWS_CACHE_TTL_SECONDS
+    assert tavily_tool.cache_ttl("latest Taylor Swift album") == tavily_tool.TAVILY_NEWS_CACHE_TTL_SECONDS
+    assert tavily_tool.cache_ttl("who is Radiohead") == tavily_tool.TAVILY_CACHE_TTL_SECONDS
+    assert tavily_tool.TAVILY_NEWS_CACHE_TTL_SECONDS < tavily_tool.TAVILY_CACHE_TTL_SECONDS
+
+
+def test_cache_entries_expire(monkeypatch):
+    cache = LRUCache(4, ttl=60)
+    cache.put("bio", "long")
+    cache.put("tour", "short", ttl=1)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+
+    assert cache.get("bio") == "long"
+    assert cache.get("tour") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_store_survives_restarts(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LRUCache(4, store=SQLiteStore(path, table="tavily_cache"))
+    cache.put("who is radiohead", {"answer": "🎵 A band", "seconds": 2.5}, ttl=60)
+    cache.put("radiohead tour", {"answer": "stale", "seconds": 1.0}, ttl=-1)
+
+    restarted = LRUCache(4, store=SQLiteStore(path, table="tavily_cache"))
+    assert restarted.get("who is radiohead") == {"answer": "🎵 A band", "seconds": 2.5}
+    assert "who is radiohead" in restarted
+    assert restarted.get("radiohead tour") is None
+    assert restarted.store.purge() == 1
+    assert len(restarted.store) == 1
+
+
+def test_deadlines_nest_and_keep_the_earliest():
+    from src.core.deadline import deadline, remaining
+
+    assert remaining() is None
+    with deadline(10):
+        with deadline(60):
+            assert 9 < remaining() <= 10
+        with deadline(2):
+            assert remaining() <= 2
+        assert remaining() > 2
+    assert remaining() is None
+
+
+def test_short_budgets_downgrade_or_skip_the_search(tavily):
+    from src.core.deadline import deadline
+
+    with deadline(tavily_tool.TAVILY_ADVANCED_MIN_SECONDS - 2):
+        tavily_tool.search_music_info.invoke({"query": "who produced OK Computer"})
+    assert tavily.calls[-1]["search_depth"] == "basic"
+    assert tavily.calls[-1]["timeout"] <= tavily_tool.TAVILY_ADVANCED_MIN_SECONDS - 2
+
+    with deadline(tavily_tool.TAVILY_MIN_SECONDS / 2):
+        answer = tavily_tool.search_music_info.invoke({"query": "who mixed OK Computer"})
+    assert len(tavily.calls) == 1
+    assert "ran out of time" in answer
+
+
+def test_slow_searches_are_hedged_with_a_basic_search(tavily, monkeypatch):
+    monkeypatch.setattr(tavily_tool, "TAVILY_HEDGE_AFTER_SECONDS", 0.05)
+    tavily.delay = lambda payload: 1.0 if payload["search_depth"] == "advanced" else 0.0
+    wins = metrics.tavily_hedges.value(winner="hedge")
+
+    started = time.perf_counter()
+    answer = tavily_tool.search_music_info.invoke({"query": "Radiohead label history"})
+
+    assert answer.startswith("🎵 About Radiohead label history")
+    assert time.perf_counter() - started < 0.9
+    assert [call["search_depth"] for call in tavily.calls] == ["advanced", "basic"]
+    assert metrics.tavily_hedges.value(winner="hedge") == wins + 1
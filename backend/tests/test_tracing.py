@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for request tracing: spans, JSONL export, graph callbacks and HTTP hooks
+"""
+
+import json
+
+import httpx
+import pytest
+import requests
+from langchain_core.messages import HumanMessage
+
+from src.core import tracing
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    exported = tracing.Tracer(exporter=tracing.JSONLExporter(str(tmp_path / "traces.jsonl")))
+    monkeypatch.setattr(tracing, "tracer", exported)
+    monkeypatch.setattr(tracing, "tracing_callback", tracing.TracingCallback(exported))
+    return exported
+
+
+def exported_spans(tracer):
+    with open(tracer.exporter.path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_nest_and_export(tracer):
+    with tracing.span("chat", kind="request", trace_id="trace-1") as root:
+        with tracing.span("lookup"):
+            pass
+        with pytest.raises(ValueError):
+            with tracing.span("broken"):
+                raise ValueError("boom")
+    assert tracing.current_trace_id() is None
+
+    spans = {s["name"]: s for s in exported_spans(tracer)}
+    assert {s["trace_id"] for s in spans.values()} == {"trace-1"}
+    assert spans["lookup"]["parent_id"] == root["span_id"]
+    assert spans["broken"]["status"] == "error"
+    assert spans["chat"]["duration_ms"] >= spans["lookup"]["duration_ms"]
+
+    summary = tracer.summary()
+    assert summary["spans"]["internal"]["broken"]["errors"] == 1
+    assert summary["recent_traces"][0]["trace_id"] == "trace-1"
+    assert summary["recent_traces"][0]["spans"] == 3
+
+
+def test_graph_turn_is_traced(tracer):
+    from evaluation.replay import install_replay, uninstall_replay
+
+    install_replay({"what are my top tracks": {"tool": "get_top_tracks", "args": {"limit": 5}}})
+    try:
+        from src.agent.main_graph import graph
+
+        with tracing.span("chat", kind="request", trace_id="trace-2"):
+            config = tracing.traced_config({"configurable": {"thread_id": "tracing"}}, "trace-2")
+            graph.invoke({"messages": [HumanMessage(content="what are my top tracks")]}, config=config)
+    finally:
+        uninstall_replay()
+
+    spans = exported_spans(tracer)
+    assert {s["trace_id"] for s in spans} == {"trace-2"}
+    by_id = {s["span_id"]: s for s in spans}
+    nodes = [s["name"] for s in spans if s["kind"] == "node"]
+    assert {"router", "spotify", "spotify_router", "song"} <= set(nodes)
+    assert nodes.count("router") == 1
+
+    tool = next(s for s in spans if s["kind"] == "tool")
+    assert tool["name"] == "get_top_tracks"
+    assert tool["attributes"]["output_chars"] > 0
+    assert by_id[tool["parent_id"]]["name"] == "song"
+
+    llm = [s for s in spans if s["kind"] == "llm"]
+    assert llm and all(s["attributes"]["completion_tokens"] > 0 for s in llm)
+
+
+def test_outbound_requests_are_traced(tracer):
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(429)),
+                          event_hooks=tracing.httpx_event_hooks())
+
+    class Adapter(requests.adapters.BaseAdapter):
+        def send(self, request, **kwargs):
+            response = requests.Response()
+            response.status_code, response.url, response.request = 200, request.url, request
+            return response
+
+    session = tracing.traced_session()
+    session.mount("https://", Adapter())
+
+    with tracing.span("chat", kind="request", trace_id="trace-3") as root:
+        client.post("https://api.openai.com/v1/chat/completions")
+        session.get("https://api.spotify.com/v1/me")
+
+    http = {s["attributes"]["host"]: s for s in exported_spans(tracer) if s["kind"] == "http"}
+    assert http["api.openai.com"]["status"] == "error"
+    assert http["api.openai.com"]["attributes"]["status_code"] == 429
+    assert http["api.spotify.com"]["parent_id"] == root["span_id"]
+    assert http["api.spotify.com"]["trace_id"] == "trace-3"